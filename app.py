@@ -8,6 +8,7 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_migrate import Migrate
 from config import Config
+from json_provider import init_json_provider
 import logging
 from flask_cors import CORS
 
@@ -36,6 +37,7 @@ def create_app():
     # Configure CORS to allow credentials
     CORS(app, resources={r"/*": {"origins": "http://localhost:3000"}}, supports_credentials=True)
     app.config.from_object(Config)
+    init_json_provider(app)
 
     # Initialize extensions with the app
     db.init_app(app)
@@ -59,6 +61,20 @@ def create_app():
     app.register_blueprint(users_bp, url_prefix='/user')
     app.register_blueprint(inventory_bp, url_prefix='/inventory')
 
+    # CLI commands
+    from services.orders.sales_rollup import rebuild_sales_rollups_command
+    app.cli.add_command(rebuild_sales_rollups_command)
+    from services.orders.archive import archive_orders_command
+    app.cli.add_command(archive_orders_command)
+    from services.inventory.levels import recompute_product_stock_command
+    app.cli.add_command(recompute_product_stock_command)
+    from services.inventory.alerts import rebuild_stock_alerts_command
+    app.cli.add_command(rebuild_stock_alerts_command)
+    from services.inventory.ledger import snapshot_stock_command
+    app.cli.add_command(snapshot_stock_command)
+    from services.inventory.forecast import forecast_demand_command
+    app.cli.add_command(forecast_demand_command)
+
     logger.info("Application initialized with enhanced security configurations.")
 
     return app
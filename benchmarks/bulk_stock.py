@@ -0,0 +1,148 @@
+#authentic_lebanese_sentiment_shop/benchmarks/bulk_stock.py
+# Time setting N location stock levels through POST /inventory/update_stock, one
+# request per row, against one POST /inventory/bulk_update_stock with all N rows as
+# JSON and as a CSV upload. Requests go through the Flask test client, so the times
+# cover routing, validation and the database but not the network. Each pass sets
+# every level to a new value, so every row is a real change.
+#
+# Runs against a throwaway SQLite file migrated to the current schema, or against
+# an empty scratch database given with --database-url.
+#
+#   python benchmarks/bulk_stock.py [--rows 2000] [--locations 2] [--database-url URL]
+import argparse
+import datetime
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKDIR = tempfile.mkdtemp(prefix='bulk-stock-benchmark-')
+SECRET_KEY = os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-' + 'x' * 32)
+os.environ.setdefault('AUDIT_SPOOL_DIR', os.path.join(WORKDIR, 'audit_spool'))
+CSRF_TOKEN = 'benchmark-csrf-token'
+HEADERS = {'X-CSRF-Token': CSRF_TOKEN}
+LOCATIONS = ['Main Warehouse', 'Beirut', 'Tripoli', 'Sidon', 'Tyre']
+
+
+def seed(db, rows, locations):
+    """Products stocked at `locations` locations each, enough for `rows` levels; returns the (product_id, location) keys."""
+    from sqlalchemy import insert
+    from services.products.models import Category, Product
+    from services.inventory.models import Inventory
+    from services.user_management.models import AdminUser
+
+    admin = AdminUser(username='benchmark-root', email='benchmark-root@example.com', role='SuperAdmin')
+    admin.set_password('benchmark-password')
+    db.session.add(admin)
+    db.session.commit()
+
+    products = -(-rows // locations)
+    with db.engine.begin() as connection:
+        category_id = connection.execute(insert(Category.__table__).values(name='benchmark-category')).inserted_primary_key[0]
+        connection.execute(insert(Product.__table__), [
+            {"name": f"benchmark-product-{i}", "description": 'd', "price": 10, "stock": 10 * locations,
+             "category_id": category_id}
+            for i in range(products)
+        ])
+        product_ids = sorted(connection.execute(
+            Product.__table__.select().with_only_columns(Product.id).where(Product.category_id == category_id)
+        ).scalars())
+        keys = [(product_id, location) for product_id in product_ids for location in LOCATIONS[:locations]][:rows]
+        connection.execute(insert(Inventory.__table__), [
+            {"product_id": product_id, "location": location, "stock_level": 10} for product_id, location in keys
+        ])
+    return admin.id, keys
+
+
+def make_client(app, admin_id):
+    import jwt
+
+    token = jwt.encode(
+        {"user_id": admin_id, "role": 'SuperAdmin', "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+        SECRET_KEY, algorithm='HS256'
+    )
+    client = app.test_client()
+    client.set_cookie('jwt_token', token)
+    client.set_cookie('csrf_token', CSRF_TOKEN)
+    return client
+
+
+def per_row(client, keys, level):
+    for product_id, location in keys:
+        response = client.post('/inventory/update_stock', json={
+            "product_id": product_id, "location": location, "stock_level": level
+        }, headers=HEADERS)
+        assert response.status_code == 200, response.get_data(as_text=True)
+
+
+def bulk_json(client, keys, level):
+    response = client.post('/inventory/bulk_update_stock', json={"changes": [
+        {"product_id": product_id, "location": location, "stock_level": level} for product_id, location in keys
+    ]}, headers=HEADERS)
+    assert response.status_code == 200 and response.get_json()["failed"] == 0, response.get_data(as_text=True)
+
+
+def bulk_csv(client, keys, level):
+    content = "product_id,location,stock_level\n" + "".join(f"{product_id},{location},{level}\n" for product_id, location in keys)
+    response = client.post('/inventory/bulk_update_stock', data={
+        'file': (io.BytesIO(content.encode('utf-8')), 'stock.csv', 'text/csv')
+    }, content_type='multipart/form-data', headers=HEADERS)
+    assert response.status_code == 200 and response.get_json()["failed"] == 0, response.get_data(as_text=True)
+
+
+def check_totals(db, keys, level):
+    """Every product's total must equal the sum of its levels after each pass."""
+    from sqlalchemy import select, func
+    from services.products.models import Product
+    from services.inventory.models import Inventory
+
+    product_ids = sorted({product_id for product_id, _ in keys})
+    with db.engine.connect() as connection:
+        mismatched = connection.execute(
+            select(func.count()).select_from(Product)
+            .where(Product.id.in_(product_ids))
+            .where(Product.stock != select(func.sum(Inventory.stock_level)).where(Inventory.product_id == Product.id).scalar_subquery())
+        ).scalar()
+        levels = set(connection.execute(select(Inventory.stock_level).where(Inventory.product_id.in_(product_ids))).scalars())
+    assert mismatched == 0 and levels == {level}, (mismatched, levels)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--locations', type=int, default=2, choices=range(1, len(LOCATIONS) + 1))
+    parser.add_argument('--database-url', default=f"sqlite:///{os.path.join(WORKDIR, 'benchmark.db')}")
+    args = parser.parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = args.database_url
+    Config.SECRET_KEY = SECRET_KEY
+    Config.RATELIMIT_ENABLED = False
+    import app as app_module
+    from flask_migrate import upgrade
+
+    app = app_module.create_app()
+    app_module.limiter.enabled = False
+    with app.app_context():
+        upgrade()
+        admin_id, keys = seed(app_module.db, args.rows, args.locations)
+        app_module.db.session.remove()
+        client = make_client(app, admin_id)
+
+        results = {}
+        for level, (name, run) in enumerate((('per-row', per_row), ('bulk JSON', bulk_json), ('bulk CSV', bulk_csv)), start=11):
+            began = time.perf_counter()
+            run(client, keys, level)
+            results[name] = time.perf_counter() - began
+            check_totals(app_module.db, keys, level)
+            print(f"{name:10} {results[name]:8.2f} s  {len(keys) / results[name]:10.0f} rows/s")
+        for name in ('bulk JSON', 'bulk CSV'):
+            print(f"{name} speedup {results['per-row'] / results[name]:6.1f}x")
+        print(f"({len(keys)} levels over {len(keys) // args.locations} products, {app_module.db.engine.dialect.name})")
+
+
+if __name__ == '__main__':
+    main()
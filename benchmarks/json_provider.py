@@ -0,0 +1,78 @@
+#authentic_lebanese_sentiment_shop/benchmarks/json_provider.py
+# Time jsonify() of an order listing with Flask's default JSON provider and with
+# json_provider.OrjsonProvider. The payload is built from real Order/OrderItem
+# to_dict() output, so it has the same datetimes and decimal strings as
+# GET /orders/; building it is timed too. No database is needed.
+#
+#   python benchmarks/json_provider.py [--orders 10000] [--items 3] [--repeat 5]
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-' + 'x' * 32)
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app import create_app  # noqa: E402
+from json_provider import OrjsonProvider  # noqa: E402
+
+
+def build_orders(orders, items):
+    from services.orders.models import Order, OrderItem
+
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(orders):
+        order = Order(
+            id=i + 1, user_id=i % 500 + 1, total_price=Decimal('59.97'), order_date=start + timedelta(minutes=i),
+            status='Pending', delivery_option='Standard', created_at=start, updated_at=start + timedelta(minutes=i)
+        )
+        order.items = [
+            OrderItem(id=i * items + j + 1, order_id=i + 1, product_id=j + 1, quantity=1, price=Decimal('19.99'))
+            for j in range(items)
+        ]
+        rows.append(order)
+    return rows
+
+
+def build_payload(orders):
+    return {"orders": [order.to_dict() for order in orders], "next_cursor": None, "total": len(orders)}
+
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - began)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--items', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        orders = build_orders(args.orders, args.items)
+        payload = build_payload(orders)
+        print(f"to_dict  {best_of(args.repeat, lambda: build_payload(orders)) * 1000:8.1f} ms")
+        results = {}
+        for name, provider in (('default', DefaultJSONProvider(app)), ('orjson', OrjsonProvider(app))):
+            app.json = provider
+            body = provider.response(payload).get_data()
+            results[name] = best_of(args.repeat, lambda: provider.response(payload).get_data())
+            print(f"{name:8} {results[name] * 1000:8.1f} ms  ({len(body) / 1024:.0f} KiB)")
+        print(f"speedup  {results['default'] / results['orjson']:8.1f}x  "
+              f"({args.orders} orders x {args.items} items, best of {args.repeat})")
+
+
+if __name__ == '__main__':
+    main()
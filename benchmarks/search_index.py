@@ -0,0 +1,111 @@
+#authentic_lebanese_sentiment_shop/benchmarks/search_index.py
+# Time product searches against the in-process search index, alone and while a
+# writer thread keeps committing changes: renames of a large category (every one
+# of its products is re-indexed) and single product updates. Reports search
+# latency and the time each commit takes to apply. The index is built from
+# synthetic products, so no database is needed.
+#
+#   python benchmarks/search_index.py [--products 20000] [--searches 2000] [--readers 4]
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key-' + 'x' * 32)
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app  # noqa: E402
+from services.products import search_index  # noqa: E402
+
+CATEGORIES = 20
+
+
+def build_index(products, rng):
+    words = [f"{a}{b}{c}" for a in 'bcdfgklmnprst' for b in 'aeiou' for c in ('ra', 'ni', 'lo', 'sa', 'te', 'mu', 'ko', 'di')]
+    index = search_index.ProductSearchIndex()
+    index.category_names = {category_id: f"category {words[category_id]}" for category_id in range(1, CATEGORIES + 1)}
+    for product_id in range(1, products + 1):
+        # Half the catalog sits in category 1, so renaming it re-indexes that many products
+        category_id = 1 if product_id % 2 else rng.randint(2, CATEGORIES)
+        index.upsert(product_id, ' '.join(rng.sample(words, 3)), ' '.join(rng.choices(words, k=15)), category_id, None)
+    return index, words
+
+
+def percentile(times, fraction):
+    return sorted(times)[int(fraction * (len(times) - 1))] * 1000
+
+
+def run_searches(app, queries, latencies):
+    with app.app_context():
+        for query in queries:
+            began = time.perf_counter()
+            search_index.search(query)
+            latencies.append(time.perf_counter() - began)
+
+
+def measure(app, args, queries, writer=None):
+    """Search latencies across the reader threads, and the writer's per-commit apply times."""
+    latencies, applies, done = [], [], threading.Event()
+
+    def write():
+        rng = random.Random(1)
+        while not done.is_set():
+            began = time.perf_counter()
+            writer(rng)
+            applies.append(time.perf_counter() - began)
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=write) if writer else None
+    if thread:
+        thread.start()
+    readers = [
+        threading.Thread(target=run_searches, args=(app, queries[i::args.readers], latencies)) for i in range(args.readers)
+    ]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    done.set()
+    if thread:
+        thread.join()
+    return latencies, applies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=20000)
+    parser.add_argument('--searches', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    app = create_app()
+    app.config['SEARCH_INDEX_MAX_AGE'] = 10 ** 9
+    with app.app_context():
+        index, words = build_index(args.products, rng)
+        search_index._index, search_index._built_at = index, time.monotonic()
+        queries = [f"{rng.choice(words)} {rng.choice(words)[:2]}" for _ in range(args.searches)]
+
+        def rename(rng):
+            search_index.apply_changes([('category', 1, f"category {rng.choice(words)}")])
+
+        def update(rng):
+            product_id = rng.randint(1, args.products)
+            search_index.apply_changes([('product', product_id, (' '.join(rng.sample(words, 3)), 'd', 2, None))])
+
+        for name, writer in (('idle', None), ('renames', rename), ('updates', update)):
+            latencies, applies = measure(app, args, queries, writer)
+            line = (f"{name:8} search p50 {percentile(latencies, 0.5):7.2f} ms  p99 {percentile(latencies, 0.99):7.2f} ms  "
+                    f"max {max(latencies) * 1000:7.2f} ms")
+            if applies:
+                line += f"  | {len(applies)} commits, {statistics.median(applies) * 1000:.2f} ms median apply"
+            print(line)
+        print(f"({args.products} products, {args.searches} searches over {args.readers} reader threads)")
+
+
+if __name__ == '__main__':
+    main()
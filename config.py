@@ -21,6 +21,67 @@ class Config:
     # Rate Limiting (optional, if needed for enhanced API security)
     RATE_LIMIT = os.getenv('RATE_LIMIT', '200 per day; 50 per hour')  # Example rate limit settings
 
+    # Bulk product upload: rows per multi-row INSERT, file size cap and error-report cap
+    BULK_UPLOAD_BATCH_SIZE = int(os.getenv('BULK_UPLOAD_BATCH_SIZE', 1000))
+    BULK_UPLOAD_MAX_BYTES = int(os.getenv('BULK_UPLOAD_MAX_BYTES', 512 * 1024 * 1024))
+    BULK_UPLOAD_MAX_ERRORS = int(os.getenv('BULK_UPLOAD_MAX_ERRORS', 1000))
+    # Upper bound on products touched by one /products/bulk_update request
+    BULK_UPDATE_MAX_PRODUCTS = int(os.getenv('BULK_UPDATE_MAX_PRODUCTS', 50000))
+    # Upper bound on orders (or returns) moved by one /orders/bulk_status (/orders/returns/batch) request
+    BULK_STATUS_MAX_ORDERS = int(os.getenv('BULK_STATUS_MAX_ORDERS', 50000))
+    # Upper bound on rows in one /inventory/bulk_update_stock request (JSON or CSV)
+    BULK_STOCK_MAX_ROWS = int(os.getenv('BULK_STOCK_MAX_ROWS', 50000))
+
+    # Low-stock alert feed: how often waiters re-read it for commits made by other processes, how long a
+    # long-poll or an SSE stream stays open, SSE keep-alive spacing, events per read and feed retention
+    STOCK_ALERT_POLL_INTERVAL = float(os.getenv('STOCK_ALERT_POLL_INTERVAL', 1.0))
+    STOCK_ALERT_LONG_POLL_TIMEOUT = int(os.getenv('STOCK_ALERT_LONG_POLL_TIMEOUT', 25))
+    STOCK_ALERT_STREAM_SECONDS = int(os.getenv('STOCK_ALERT_STREAM_SECONDS', 300))
+    STOCK_ALERT_HEARTBEAT = int(os.getenv('STOCK_ALERT_HEARTBEAT', 15))
+    STOCK_ALERT_BATCH_SIZE = int(os.getenv('STOCK_ALERT_BATCH_SIZE', 500))
+    STOCK_ALERT_EVENT_TTL = int(os.getenv('STOCK_ALERT_EVENT_TTL', 24 * 3600))
+    # Stock ledger snapshots (flask snapshot-stock): movements younger than the grace period wait for the next
+    # snapshot, since ids of still-open transactions may commit late; older snapshots beyond KEEP are pruned
+    STOCK_SNAPSHOT_GRACE = int(os.getenv('STOCK_SNAPSHOT_GRACE', 300))
+    STOCK_SNAPSHOT_KEEP = int(os.getenv('STOCK_SNAPSHOT_KEEP', 90))
+    # Demand forecasts (flask forecast-demand): days of sales history used, supplier lead time in days and the
+    # service level (chance of not running out during the lead time) that sizes the safety stock
+    STOCK_FORECAST_WINDOW_DAYS = int(os.getenv('STOCK_FORECAST_WINDOW_DAYS', 365))
+    STOCK_FORECAST_LEAD_TIME_DAYS = int(os.getenv('STOCK_FORECAST_LEAD_TIME_DAYS', 7))
+    STOCK_FORECAST_SERVICE_LEVEL = float(os.getenv('STOCK_FORECAST_SERVICE_LEVEL', 0.95))
+    # Background bulk upload jobs (?async=true): worker threads and how long finished jobs stay pollable
+    BULK_UPLOAD_WORKERS = int(os.getenv('BULK_UPLOAD_WORKERS', 2))
+    BULK_UPLOAD_JOB_TTL = int(os.getenv('BULK_UPLOAD_JOB_TTL', 3600))
+
+    # In-process category/subcategory tree cache; commits invalidate it locally, the TTL bounds staleness across worker processes
+    CATEGORY_CACHE_TTL = int(os.getenv('CATEGORY_CACHE_TTL', 60))
+
+    # In-process product search index; local writes update it on commit, a full rebuild every SEARCH_INDEX_MAX_AGE seconds picks up writes from other processes
+    SEARCH_INDEX_MAX_AGE = int(os.getenv('SEARCH_INDEX_MAX_AGE', 600))
+
+    # Conditional GET validators: seconds a write made by another worker process can go unnoticed (0 = single process)
+    HTTP_CACHE_VALIDATOR_TTL = int(os.getenv('HTTP_CACHE_VALIDATOR_TTL', 30))
+
+    # Response JSON encoder: 'orjson' (used when installed) or 'default' for Flask's built-in provider
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+
+    # Order archival (`flask archive-orders`): Delivered/Canceled orders older than this many days move
+    # to the archive tables, in batches of ORDER_ARCHIVE_BATCH_SIZE with ORDER_ARCHIVE_PAUSE seconds between them
+    ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv('ORDER_ARCHIVE_AFTER_DAYS', 365))
+    ORDER_ARCHIVE_BATCH_SIZE = int(os.getenv('ORDER_ARCHIVE_BATCH_SIZE', 500))
+    ORDER_ARCHIVE_PAUSE = float(os.getenv('ORDER_ARCHIVE_PAUSE', 0.5))
+
+    # Audit log writer: events are spooled to disk and inserted in batches every AUDIT_FLUSH_INTERVAL
+    # seconds or once AUDIT_FLUSH_SIZE are waiting; the spool defaults to <instance path>/audit_spool
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 1.0))
+    AUDIT_FLUSH_SIZE = int(os.getenv('AUDIT_FLUSH_SIZE', 500))
+    AUDIT_SPOOL_DIR = os.getenv('AUDIT_SPOOL_DIR')
+
+    # Seconds a stored Idempotency-Key response is replayed to retries of the same POST
+    IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+    # Seconds a request holds its key while running; after that a retry may run it again
+    IDEMPOTENCY_PROCESSING_LEASE = int(os.getenv('IDEMPOTENCY_PROCESSING_LEASE', 300))
+
     # JWT and Password Hashing (if using JWTs or Bcrypt for password management)
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-default-jwt-secret')
     BCRYPT_LOG_ROUNDS = 12  # Adjust based on security/performance needs
@@ -4,6 +4,7 @@ import React, { useEffect, useState } from 'react';
 import {
     updateStock,
     getLowStockAlerts,
+    subscribeToLowStockAlerts,
     getInventoryReport,
     fetchInventory,
     addInventory
@@ -60,10 +61,20 @@ function InventoryManagement() {
 
     // Fetch data on component mount
     useEffect(() => {
+        let unsubscribe = null;
+        let unmounted = false;
         fetchAllInventory();
-        fetchLowStockAlerts();
+        fetchLowStockAlerts().then((lastEventId) => {
+            if (lastEventId !== undefined && !unmounted) {
+                unsubscribe = subscribeToLowStockAlerts(lastEventId, applyLowStockEvent);
+            }
+        });
         fetchInventoryReport();
         fetchProductsList();
+        return () => {
+            unmounted = true;
+            if (unsubscribe) unsubscribe();
+        };
     }, []);
 
     // Fetch list of products for dropdown
@@ -92,11 +103,12 @@ function InventoryManagement() {
         }
     };
 
-    // Fetches low stock alerts
+    // Fetches low stock alerts; returns the event id to subscribe from
     const fetchLowStockAlerts = async () => {
         try {
             const data = await getLowStockAlerts();
             setLowStockAlerts(data.low_stock_alerts);
+            return data.last_event_id;
         } catch (error) {
             console.error("Error fetching low stock alerts:", error);
             setError('Failed to fetch low stock alerts.');
@@ -104,6 +116,22 @@ function InventoryManagement() {
         }
     };
 
+    // Applies one pushed alert change: Raised/Updated replace the location's entry, Cleared removes it
+    const applyLowStockEvent = (event) => {
+        setLowStockAlerts((alerts) => {
+            const others = alerts.filter(
+                (alert) => alert.product_id !== event.product_id || alert.location !== event.location
+            );
+            if (event.kind === 'Cleared') return others;
+            return [...others, {
+                product_id: event.product_id,
+                location: event.location,
+                stock_level: event.stock_level,
+                stock_threshold: event.stock_threshold
+            }];
+        });
+    };
+
     // Fetches inventory report
     const fetchInventoryReport = async () => {
         try {
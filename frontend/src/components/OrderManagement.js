@@ -421,7 +421,7 @@ function OrderManagement() {
         try {
             const updatedReturn = await updateReturnStatus(selectedReturn.id, newStatus);  // API call
             setReturns(returns.map(returnItem =>
-                returnItem.id === updatedReturn.id ? updatedReturn : returnItem
+                returnItem.id === updatedReturn.id ? { ...returnItem, ...updatedReturn } : returnItem
             ));
             setSuccess('Return status updated successfully!');
             setReturnDialogOpen(false);
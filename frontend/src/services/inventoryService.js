@@ -19,6 +19,65 @@ export const updateStock = async (product_id, location, stock_level) => {
     }
 };
 
+// Apply many stock changes at once: [{product_id, location, stock_level | delta}]; returns per-row results
+export const bulkUpdateStock = async (changes) => {
+    if (!Array.isArray(changes) || changes.length === 0) throw new Error("Invalid stock changes.");
+    try {
+        const response = await api.post(`/inventory/bulk_update_stock`, { changes });
+        return response.data;
+    } catch (error) {
+        console.error("Error updating stock in bulk:", error);
+        throw error.response?.data || new Error("Failed to update stock.");
+    }
+};
+
+// Same as bulkUpdateStock, from a CSV file with product_id, location and stock_level or delta columns
+export const uploadStockCsv = async (file) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    try {
+        const response = await api.post(`/inventory/bulk_update_stock`, formData, {
+            headers: { 'Content-Type': 'multipart/form-data' }
+        });
+        return response.data;
+    } catch (error) {
+        console.error("Error uploading stock CSV:", error);
+        throw error.response?.data || new Error("Failed to upload stock CSV.");
+    }
+};
+
+// Page through the stock ledger; filters: product_id, location, reason, date_from, date_to, cursor, limit
+export const getStockMovements = async (params = {}) => {
+    try {
+        const response = await api.get(`/inventory/movements`, { params });
+        return response.data;
+    } catch (error) {
+        console.error("Error fetching stock movements:", error);
+        throw error.response?.data || new Error("Failed to fetch stock movements.");
+    }
+};
+
+// Stock per product and location as of an ISO date/time, optionally for one product and/or location
+export const getStockAt = async (at, params = {}) => {
+    try {
+        const response = await api.get(`/inventory/stock_at`, { params: { ...params, at } });
+        return response.data;
+    } catch (error) {
+        console.error("Error fetching stock history:", error);
+        throw error.response?.data || new Error("Failed to fetch stock history.");
+    }
+};
+
+// Page through the forecast demand and reorder points; filters: product_id, location, cursor, limit
+export const getReorderPoints = async (params = {}) => {
+    try {
+        const response = await api.get(`/inventory/reorder_points`, { params });
+        return response.data;
+    } catch (error) {
+        console.error("Error fetching reorder points:", error);
+        throw error.response?.data || new Error("Failed to fetch reorder points.");
+    }
+};
 
 // Get low stock alerts with secure headers and error handling
 export const getLowStockAlerts = async () => {
@@ -31,6 +90,17 @@ export const getLowStockAlerts = async () => {
     }
 };
 
+// Subscribe to low stock alert changes after `afterId` (Server-Sent Events); returns a function that closes the stream
+export const subscribeToLowStockAlerts = (afterId, onEvent) => {
+    const source = new EventSource(
+        `${api.defaults.baseURL}/inventory/low_stock_alerts/stream?after=${encodeURIComponent(afterId)}`,
+        { withCredentials: true }
+    );
+    source.addEventListener('stock_alert', (message) => onEvent(JSON.parse(message.data)));
+    source.onerror = (error) => console.error("Low stock alert stream error:", error);  // EventSource retries on its own
+    return () => source.close();
+};
+
 // Get inventory report with secure headers and error handling
 export const getInventoryReport = async () => {
     try {
@@ -42,11 +112,31 @@ export const getInventoryReport = async () => {
     }
 };
 
-// Fetch all inventory records with secure headers and error handling
-export const fetchInventory = async () => {
+// Fetch one page of inventory; filters: product_id, location, category_id, min_stock, max_stock, include_product, cursor, limit
+export const getInventoryPage = async (params = {}) => {
+    if (typeof params !== 'object') throw new Error("Invalid query parameters.");
+    try {
+        const response = await api.get(`/inventory/all`, { params });
+        return response.data;
+    } catch (error) {
+        console.error("Error fetching inventory:", error);
+        throw error.response?.data || new Error("Failed to fetch inventory.");
+    }
+};
+
+// Fetch all inventory records by following the next_cursor token page by page
+export const fetchInventory = async (params = {}) => {
+    if (typeof params !== 'object') throw new Error("Invalid query parameters.");
     try {
-        const response = await api.get(`/inventory/all`);
-        return response.data.inventory;
+        const inventory = [];
+        let cursor = null;
+        do {
+            const query = cursor ? { ...params, cursor } : params;
+            const response = await api.get(`/inventory/all`, { params: query });
+            inventory.push(...response.data.inventory);
+            cursor = response.data.next_cursor;
+        } while (cursor);
+        return inventory;
     } catch (error) {
         console.error("Error fetching inventory:", error);
         throw error.response?.data || new Error("Failed to fetch inventory.");
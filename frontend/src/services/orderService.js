@@ -2,10 +2,18 @@
 import api from './api';
 
 // Fetch all orders with secure headers and error handling
-export const fetchOrders = async () => {
+export const fetchOrders = async (params = {}) => {
+    if (typeof params !== 'object') throw new Error("Invalid query parameters.");
     try {
-        const response = await api.get(`/orders/`);
-        return response.data;
+        const orders = [];
+        let cursor = null;
+        do {
+            const query = cursor ? { ...params, cursor } : params;
+            const response = await api.get(`/orders/`, { params: query });
+            orders.push(...response.data.orders);
+            cursor = response.data.next_cursor;
+        } while (cursor);
+        return orders;
     } catch (error) {
         console.error("Error fetching orders:", error);
         throw error.response?.data || new Error("Failed to fetch orders.");
@@ -78,10 +86,18 @@ export const returnItem = async (orderId, orderItemId, reason) => {
 };
 
 // Fetch all returns with secure headers and error handling
-export const fetchReturns = async () => {
+export const fetchReturns = async (params = {}) => {
+    if (typeof params !== 'object') throw new Error("Invalid query parameters.");
     try {
-        const response = await api.get(`/orders/returns`);
-        return response.data.returns;
+        const returns = [];
+        let cursor = null;
+        do {
+            const query = cursor ? { ...params, cursor } : params;
+            const response = await api.get(`/orders/returns`, { params: query });
+            returns.push(...response.data.returns);
+            cursor = response.data.next_cursor;
+        } while (cursor);
+        return returns;
     } catch (error) {
         console.error("Error fetching returns:", error);
         throw error.response?.data || new Error("Failed to fetch returns.");
@@ -103,11 +119,29 @@ export const updateReturnStatus = async (returnId, status) => {
     }
 };
 
+// Approve or deny several returns at once
+export const resolveReturns = async (returnIds, status) => {
+    if (!Array.isArray(returnIds) || typeof status !== 'string') throw new Error("Invalid input.");
+    try {
+        const response = await api.put(`/orders/returns/batch`, { return_ids: returnIds, status });
+        return response.data;
+    } catch (error) {
+        console.error("Error resolving returns:", error);
+        throw error.response?.data || new Error("Failed to resolve returns.");
+    }
+};
+
 // Fetch all products with secure headers and error handling
 export const fetchProducts = async () => {
     try {
-        const response = await api.get(`/products/`);
-        return response.data;
+        const products = [];
+        let cursor = null;
+        do {
+            const response = await api.get(`/products/`, { params: cursor ? { cursor } : {} });
+            products.push(...response.data.products);
+            cursor = response.data.next_cursor;
+        } while (cursor);
+        return products;
     } catch (error) {
         console.error("Error fetching products:", error);
         throw error.response?.data || new Error("Failed to fetch products.");
@@ -1,10 +1,11 @@
 // services/productService.js
 import api from './api';
 
-// Fetch all products with secure headers and error handling
-export const getProducts = async () => {
+// Fetch one page of products; filters and cursor are passed as query parameters
+export const getProductsPage = async (params = {}) => {
+    if (typeof params !== 'object') throw new Error("Invalid query parameters.");
     try {
-        const response = await api.get(`/products/`);
+        const response = await api.get(`/products/`, { params });
         return response.data;
     } catch (error) {
         console.error('Error fetching products:', error);
@@ -12,6 +13,25 @@ export const getProducts = async () => {
     }
 };
 
+// Fetch all products by following the next_cursor token page by page
+export const getProducts = async (params = {}) => {
+    if (typeof params !== 'object') throw new Error("Invalid query parameters.");
+    try {
+        const products = [];
+        let cursor = null;
+        do {
+            const query = cursor ? { ...params, cursor } : params;
+            const response = await api.get(`/products/`, { params: query });
+            products.push(...response.data.products);
+            cursor = response.data.next_cursor;
+        } while (cursor);
+        return products;
+    } catch (error) {
+        console.error('Error fetching products:', error);
+        throw error.response?.data || new Error("Failed to fetch products.");
+    }
+};
+
 // Add a new product with input validation and secure headers
 export const addProduct = async (productData) => {
     if (typeof productData !== 'object') throw new Error("Invalid product data.");
@@ -0,0 +1,88 @@
+#authentic_lebanese_sentiment_shop/json_provider.py
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Fall back to Flask's provider when orjson is not installed
+    orjson = None
+
+_WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date(value):
+    """Format a date or datetime as an RFC 822 HTTP date, as Flask's default provider does.
+
+    Same output as werkzeug.http.http_date (naive values are UTC, dates are midnight
+    UTC) without its detour through email.utils, which dominates encoding time.
+    """
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return "%s, %02d %s %04d %02d:%02d:%02d GMT" % (
+        _WEEKDAYS[value.weekday()], value.day, _MONTHS[value.month - 1], value.year, value.hour, value.minute, value.second
+    )
+
+
+def _default(obj):
+    """Types orjson is told to pass through or does not serialize natively."""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson.
+
+    Output matches the default provider's: datetimes and dates as RFC 822 HTTP dates,
+    Decimals as strings. Keys keep insertion order unless sort_keys is set. dumps()
+    arguments orjson has no option for (e.g. separators) go to the default provider.
+    """
+
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+    sort_keys = False
+
+    def _option(self, sort_keys=None, indent=None):
+        """orjson option flags for these json.dumps arguments, or None if orjson cannot honor them."""
+        if indent not in (None, 2):
+            return None
+        option = self.options
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = None if kwargs.keys() - {'sort_keys', 'indent'} else self._option(**kwargs)
+        if option is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is False or (self.compact is None and self._app.debug) else None
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self._option(indent=indent)),
+            mimetype=self.mimetype
+        )
+
+
+def init_json_provider(app):
+    """Install the provider named by JSON_PROVIDER ('orjson' or 'default')."""
+    if app.config.get('JSON_PROVIDER') == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,212 @@
+#authentic_lebanese_sentiment_shop/services/audit.py
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError, DataError
+from app import db
+from .user_management.models import ActivityLog
+from .chunking import chunks
+
+logger = logging.getLogger(__name__)
+
+_SPOOL_NAME = re.compile(r'^audit-(\d+)\.ndjson(\.\d+\.flushing)?$')
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditWriter:
+    """Buffers audit events in an on-disk spool and writes them to activity_logs in batches.
+
+    Each event is appended to this process's spool file before log_activity returns,
+    so it survives a crash of the process. A background thread wakes every
+    AUDIT_FLUSH_INTERVAL seconds, or as soon as AUDIT_FLUSH_SIZE events are waiting.
+    It swaps the spool for a fresh file, inserts the swapped-out events with
+    multi-row INSERTs in one transaction, and deletes the file once that commits.
+    Delivery is at-least-once: a crash between that commit and the delete replays
+    the file on the next start.
+
+    A batch the database rejects (e.g. a foreign key violation because the admin was
+    deleted meanwhile) is retried one row per transaction; the rows still rejected are
+    moved to a `.failed` dead-letter file next to the spool and the queue moves on.
+    Any other error (database down) leaves the batch on disk for the next cycle.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pid = os.getpid()
+        self.flush_interval = app.config['AUDIT_FLUSH_INTERVAL']
+        self.flush_size = app.config['AUDIT_FLUSH_SIZE']
+        self.spool_dir = app.config['AUDIT_SPOOL_DIR'] or os.path.join(app.instance_path, 'audit_spool')
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.spool_path = os.path.join(self.spool_dir, f'audit-{self.pid}.ndjson')
+
+        self._lock = threading.Lock()  # Guards the live spool file and the pending count
+        self._flush_lock = threading.Lock()  # One drain at a time
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._pending = 0
+        self._sequence = 0
+
+        self._recover()
+        self._spool = open(self.spool_path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+    def _next_batch_path(self):
+        self._sequence += 1
+        return f"{self.spool_path}.{self._sequence:08d}.flushing"
+
+    def _recover(self):
+        """Adopt spool files left behind by processes that are no longer running."""
+        for name in sorted(os.listdir(self.spool_dir)):
+            match = _SPOOL_NAME.match(name)
+            if not match:
+                continue
+            pid = int(match.group(1))
+            if pid != self.pid and _process_alive(pid):
+                continue
+            try:
+                os.replace(os.path.join(self.spool_dir, name), self._next_batch_path())
+            except FileNotFoundError:
+                pass  # Adopted by another process first
+
+    def enqueue(self, admin_id, action, timestamp=None):
+        line = json.dumps({
+            "admin_id": admin_id,
+            "action": action,
+            "timestamp": (timestamp or datetime.utcnow()).isoformat()
+        })
+        with self._lock:
+            self._spool.write(line + '\n')
+            self._spool.flush()
+            self._pending += 1
+            full = self._pending >= self.flush_size
+        if full:
+            self._wakeup.set()
+
+    def _rotate(self):
+        with self._lock:
+            if not self._pending:
+                return
+            self._spool.close()
+            os.replace(self.spool_path, self._next_batch_path())
+            self._spool = open(self.spool_path, 'a', encoding='utf-8')
+            self._pending = 0
+
+    def _drain(self, path):
+        rows = []
+        with open(path, encoding='utf-8') as spool:
+            for line in spool:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                    rows.append({
+                        "admin_id": event['admin_id'],
+                        "action": event['action'],
+                        "timestamp": datetime.fromisoformat(event['timestamp'])
+                    })
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable audit event in {path}")  # e.g. a line torn by a crash
+        if rows:
+            with self.app.app_context():
+                try:
+                    with db.engine.begin() as connection:
+                        for chunk in chunks(rows, self.flush_size):
+                            connection.execute(insert(ActivityLog.__table__), chunk)
+                except (IntegrityError, DataError) as e:
+                    logger.warning(f"Audit batch {path} rejected, retrying row by row: {str(e)}")
+                    self._drain_rows(path, rows)
+        os.remove(path)
+
+    def _drain_rows(self, path, rows):
+        """Insert `rows` one per transaction; dead-letter the ones the database rejects."""
+        rejected = []
+        for row in rows:
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(insert(ActivityLog.__table__), [row])
+            except (IntegrityError, DataError):
+                rejected.append(row)
+        if rejected:
+            failed_path = path[:-len('.flushing')] + '.failed'
+            with open(failed_path, 'a', encoding='utf-8') as failed:
+                for row in rejected:
+                    failed.write(json.dumps({**row, "timestamp": row['timestamp'].isoformat()}) + '\n')
+            logger.error(f"{len(rejected)} audit events rejected by the database, moved to {failed_path}")
+
+    def flush(self):
+        """Write everything spooled so far; batches that fail stay on disk for the next attempt."""
+        with self._flush_lock:
+            self._rotate()
+            for path in sorted(glob.glob(f"{glob.escape(self.spool_path)}.*.flushing")):
+                try:
+                    self._drain(path)
+                except Exception as e:
+                    # Not a rejected row (those are dead-lettered): the database is unavailable
+                    logger.error(f"Audit log flush failed, will retry: {str(e)}")
+                    break
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def shutdown(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    with _writer_lock:
+        # A forked worker gets its own writer, thread and spool file
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = AuditWriter(current_app._get_current_object())
+        return _writer
+
+
+def log_activity(admin_id, action):
+    """Record an audit event; it reaches activity_logs within AUDIT_FLUSH_INTERVAL seconds."""
+    _get_writer().enqueue(admin_id, action)
+
+
+def record_activity(admin_id, action):
+    """Add an audit row to the current transaction, for changes whose record must commit or roll back with them."""
+    db.session.add(ActivityLog(admin_id=admin_id, action=action))
+
+
+def flush():
+    """Write pending audit events now (e.g. before reading the log back)."""
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.flush()
+
+
+def shutdown():
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.shutdown()
+
+
+atexit.register(shutdown)
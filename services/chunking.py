@@ -0,0 +1,18 @@
+#authentic_lebanese_sentiment_shop/services/chunking.py
+
+CHUNK_SIZE = 1000  # ids per IN list or CASE, rows per multi-row statement
+
+
+def chunks(values, size=CHUNK_SIZE):
+    """Consecutive slices of at most `size` items of a list (or array)."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def id_chunks(ids, size=CHUNK_SIZE):
+    """The distinct ids in ascending order, `size` at a time.
+
+    Row locks taken chunk by chunk are then taken in id order, like every other
+    writer's, so concurrent writers queue up instead of deadlocking.
+    """
+    yield from chunks(sorted(set(ids)), size)
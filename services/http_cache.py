@@ -0,0 +1,102 @@
+#authentic_lebanese_sentiment_shop/services/http_cache.py
+import hashlib
+import threading
+import uuid
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+
+# Per-table write counters, bumped whenever a transaction that wrote to the table commits.
+# They live in this process only: the boot id keeps another process from validating our
+# ETags, and HTTP_CACHE_VALIDATOR_TTL bounds how long a write made elsewhere can go unseen.
+_BOOT_ID = uuid.uuid4().hex
+_BOOT_TIME = datetime.now(timezone.utc).replace(microsecond=0)
+_lock = threading.Lock()
+_versions = {}
+_last_modified = {}
+
+
+def bump(*tables):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+            _last_modified[table] = now
+
+
+def table_state(tables):
+    """Return ({table: version}, last_modified) for the given table names."""
+    with _lock:
+        versions = {table: _versions.get(table, 0) for table in tables}
+        last_modified = max((_last_modified.get(table, _BOOT_TIME) for table in tables), default=_BOOT_TIME)
+    return versions, last_modified
+
+
+# Every INSERT/UPDATE/DELETE, whether issued by an ORM flush or a Core statement, is seen here
+@event.listens_for(Engine, 'after_execute')
+def _track_written_tables(conn, clauseelement, multiparams, params, execution_options, result):
+    if isinstance(clauseelement, UpdateBase):
+        conn.info.setdefault('written_tables', set()).add(clauseelement.table.name)
+
+
+@event.listens_for(Engine, 'commit')
+def _bump_on_commit(conn):
+    tables = conn.info.pop('written_tables', None)
+    if tables:
+        bump(*tables)
+
+
+@event.listens_for(Engine, 'rollback')
+def _discard_on_rollback(conn):
+    conn.info.pop('written_tables', None)
+
+
+def conditional_get(*tables, max_age_by_role=None, refresh=None):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view builds its body.
+
+    The ETag covers the write counters of `tables`, the full request URL and the
+    caller's role. `max_age_by_role` maps roles to a Cache-Control max-age;
+    roles not listed must revalidate on every use. `refresh` is called first for
+    data that is brought up to date lazily on read.
+    """
+    max_age_by_role = max_age_by_role or {}
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if refresh is not None:
+                refresh()
+            versions, last_modified = table_state(tables)
+            # Validators expire at each TTL window boundary so writes from other processes are picked up
+            ttl = current_app.config['HTTP_CACHE_VALIDATOR_TTL']
+            if ttl:
+                now = datetime.now(timezone.utc).timestamp()
+                window_start = datetime.fromtimestamp(now - now % ttl, timezone.utc).replace(microsecond=0)
+                last_modified = max(last_modified, window_start)
+            seed = f"{_BOOT_ID}|{last_modified.timestamp()}|{sorted(versions.items())}|{request.full_path}|{request.user_role}"
+            etag = hashlib.sha1(seed.encode('utf-8')).hexdigest()
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            response.cache_control.private = True
+            response.cache_control.max_age = max_age_by_role.get(request.user_role, 0)
+            response.cache_control.must_revalidate = True
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorator
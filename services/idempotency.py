@@ -0,0 +1,173 @@
+#authentic_lebanese_sentiment_shop/services/idempotency.py
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, current_app, jsonify
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+KEY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+PURGE_INTERVAL = timedelta(seconds=60)  # How often one process sweeps expired keys
+FINGERPRINT_MAX_BYTES = 1024 * 1024  # Larger bodies are fingerprinted by length only
+FINGERPRINT_BLOCK_SIZE = 64 * 1024  # Uploaded files are hashed in blocks of this size
+CLAIM_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+_purge_lock = threading.Lock()
+_next_purge = datetime.min
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    # sha256 of (user, method, endpoint, client key), so keys never collide across users or routes
+    key = db.Column(db.String(64), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)  # NULL while the original request is still running
+    # While running, the claim's lease: a retry may take the key over once it lapses, and only the
+    # holder of this exact lease may store or release. NULL once the response is stored.
+    processing_until = db.Column(db.DateTime)
+    content_type = db.Column(db.String(255))
+    body = db.Column(db.LargeBinary(length=16 * 1024 * 1024))
+    created_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+_table = IdempotencyKey.__table__
+
+
+def _scoped_key(client_key):
+    seed = f"{request.user_id}|{request.method}|{request.endpoint}|{request.view_args}|{client_key}"
+    return hashlib.sha256(seed.encode('utf-8')).hexdigest()
+
+
+def _file_digest(file):
+    """sha256 of an uploaded file's contents, read in blocks; the stream is rewound for the view."""
+    digest = hashlib.sha256()
+    position = file.stream.tell()
+    for block in iter(lambda: file.stream.read(FINGERPRINT_BLOCK_SIZE), b''):
+        digest.update(block)
+    file.stream.seek(position)
+    return digest.hexdigest()
+
+
+def _fingerprint():
+    """Hash of the request payload, used to reject a key reused for a different request."""
+    digest = hashlib.sha256(f"{request.full_path}|{request.mimetype}".encode('utf-8'))
+    if request.mimetype.startswith('multipart/'):
+        # Boundaries differ between retries; uploads are identified by field, file name and contents
+        digest.update(repr(sorted(
+            (name, file.filename, _file_digest(file)) for name, file in request.files.items(multi=True)
+        )).encode('utf-8'))
+        digest.update(repr(sorted(request.form.items(multi=True))).encode('utf-8'))
+    elif (request.content_length or 0) <= FINGERPRINT_MAX_BYTES:
+        digest.update(request.get_data(cache=True))
+    else:
+        digest.update(str(request.content_length).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _purge_expired(now):
+    global _next_purge
+    with _purge_lock:
+        if now < _next_purge:
+            return
+        _next_purge = now + PURGE_INTERVAL
+    with db.engine.begin() as connection:
+        connection.execute(delete(_table).where(_table.c.expires_at <= now))
+
+
+def _claim(key, fingerprint, now, lease_until):
+    """Insert an in-progress row for `key` leased until `lease_until`; return the existing row if the key is taken.
+
+    The in-progress row expires with its lease, so a key whose request died with its
+    worker can be claimed again by a retry once the lease lapses.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(_table).values(
+                    key=key, fingerprint=fingerprint, created_at=now, processing_until=lease_until, expires_at=lease_until
+                ))
+            return None
+        except IntegrityError:
+            with db.engine.begin() as connection:
+                row = connection.execute(select(_table).where(_table.c.key == key)).first()
+                if row is not None and row.expires_at > now:
+                    return row
+                # Expired response or lapsed lease, not yet swept: drop it and claim again
+                connection.execute(delete(_table).where(_table.c.key == key, _table.c.expires_at <= now))
+    raise RuntimeError(f"Could not claim idempotency key after {CLAIM_ATTEMPTS} attempts")
+
+
+def _release(key, lease_until):
+    with db.engine.begin() as connection:
+        connection.execute(delete(_table).where(_table.c.key == key, _table.c.processing_until == lease_until))
+
+
+def _store(key, lease_until, response):
+    ttl = timedelta(seconds=current_app.config['IDEMPOTENCY_KEY_TTL'])
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            update(_table)
+            .where(_table.c.key == key, _table.c.processing_until == lease_until)
+            .values(status_code=response.status_code, content_type=response.content_type, body=response.get_data(),
+                    processing_until=None, expires_at=datetime.utcnow() + ttl)
+        )
+    if result.rowcount == 0:
+        logger.warning(f"{KEY_HEADER} lease lapsed before the response was stored; a retry took the key over")
+
+
+def idempotent(f):
+    """Honor an Idempotency-Key header on a state-changing route.
+
+    The first request with a key runs the view and its response is stored for
+    IDEMPOTENCY_KEY_TTL seconds; retries with the same key get that response back
+    (with an Idempotent-Replayed header) without running the view again. A retry
+    that arrives while the original is still running gets 409; once the original's
+    IDEMPOTENCY_PROCESSING_LEASE lapses without a response, a retry runs the view
+    again (the original's worker is presumed dead). Reusing a key
+    for a different payload gets 422. Server errors are not stored, so the client
+    can retry them. Requests without the header are not affected.
+    Must be applied after jwt_required.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        client_key = request.headers.get(KEY_HEADER)
+        if not client_key:
+            return f(*args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{KEY_HEADER} must be at most {MAX_KEY_LENGTH} characters"}), 400
+
+        key = _scoped_key(client_key)
+        fingerprint = _fingerprint()
+        now = datetime.utcnow().replace(microsecond=0)  # The lease is compared exactly, so no sub-second precision
+        lease_until = now + timedelta(seconds=current_app.config['IDEMPOTENCY_PROCESSING_LEASE'])
+        _purge_expired(now)
+
+        existing = _claim(key, fingerprint, now, lease_until)
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                return jsonify({"error": f"{KEY_HEADER} was already used for a different request"}), 422
+            if existing.status_code is None:
+                return jsonify({"error": f"A request with this {KEY_HEADER} is still being processed"}), 409
+            response = current_app.response_class(existing.body, status=existing.status_code, content_type=existing.content_type)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+
+        try:
+            response = current_app.make_response(f(*args, **kwargs))
+        except Exception:
+            _release(key, lease_until)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            _release(key, lease_until)
+        else:
+            _store(key, lease_until, response)
+        return response
+    return decorated_function
@@ -0,0 +1,256 @@
+#authentic_lebanese_sentiment_shop/services/inventory/alerts.py
+import threading
+import time
+import click
+from datetime import datetime, timedelta
+from flask.cli import with_appcontext
+from sqlalchemy import event, select, insert, update, delete, tuple_, bindparam, func, and_
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+from app import db
+from .models import Inventory, StockAlert, StockAlertEvent, DemandForecast
+from . import levels
+from ..products.models import Product
+from ..chunking import id_chunks
+
+PURGE_INTERVAL = timedelta(minutes=10)
+# How long a gap in event ids may stay open before it is taken to be a rolled-back write
+GAP_GRACE = timedelta(seconds=10)
+
+_alerts = StockAlert.__table__
+_events = StockAlertEvent.__table__
+_changed = threading.Condition()  # Notified when a commit in this process wrote alert events
+_purge_lock = threading.Lock()
+_next_purge = datetime.min
+
+
+def refresh(connection, product_ids):
+    """Bring the alert set of the given products up to date and record what changed.
+
+    Runs in the writer's transaction right after its stock or threshold change, so the
+    alerts commit or roll back together with it. The work is proportional to the
+    products' locations, not to the whole inventory. Returns the number of events written.
+    """
+    now = datetime.utcnow()
+    written = 0
+    # A computed reorder point (see forecast.py) takes the place of the hand-set threshold
+    threshold = func.coalesce(DemandForecast.reorder_point, Product.stock_threshold).label('stock_threshold')
+    for chunk in id_chunks(product_ids):
+        levels = {
+            (row.product_id, row.location): (row.stock_level or 0, row.stock_threshold)
+            for row in connection.execute(
+                select(Inventory.product_id, Inventory.location, Inventory.stock_level, threshold)
+                .join(Product, Product.id == Inventory.product_id)
+                .outerjoin(DemandForecast, and_(
+                    DemandForecast.product_id == Inventory.product_id, DemandForecast.location == Inventory.location
+                ))
+                .where(Inventory.product_id.in_(chunk))
+            )
+        }
+        low = {key: value for key, value in levels.items() if value[0] <= value[1]}
+        existing = {
+            (row.product_id, row.location): (row.stock_level, row.stock_threshold)
+            for row in connection.execute(
+                select(_alerts.c.product_id, _alerts.c.location, _alerts.c.stock_level, _alerts.c.stock_threshold)
+                .where(_alerts.c.product_id.in_(chunk))
+            )
+        }
+
+        raised = [key for key in low if key not in existing]
+        changed = [key for key in low if key in existing and low[key] != existing[key]]
+        cleared = [key for key in existing if key not in low]
+        events = (
+            [("Raised", key, low[key]) for key in raised]
+            + [("Updated", key, low[key]) for key in changed]
+            + [("Cleared", key, levels.get(key, (None, None))) for key in cleared]
+        )
+        if not events:
+            continue
+
+        if raised:
+            connection.execute(insert(_alerts), [
+                {"product_id": key[0], "location": key[1], "stock_level": low[key][0],
+                 "stock_threshold": low[key][1], "raised_at": now, "updated_at": now}
+                for key in raised
+            ])
+        if changed:
+            connection.execute(
+                update(_alerts)
+                .where(_alerts.c.product_id == bindparam('b_product_id'), _alerts.c.location == bindparam('b_location'))
+                .values(stock_level=bindparam('b_stock_level'), stock_threshold=bindparam('b_stock_threshold'), updated_at=now),
+                [{"b_product_id": key[0], "b_location": key[1], "b_stock_level": low[key][0], "b_stock_threshold": low[key][1]}
+                 for key in changed]
+            )
+        if cleared:
+            connection.execute(delete(_alerts).where(tuple_(_alerts.c.product_id, _alerts.c.location).in_(cleared)))
+        connection.execute(insert(_events), [
+            {"kind": kind, "product_id": key[0], "location": key[1], "stock_level": level,
+             "stock_threshold": threshold, "created_at": now}
+            for kind, key, (level, threshold) in events
+        ])
+        written += len(events)
+    return written
+
+
+def refresh_products(product_ids):
+    """refresh() in the current session's transaction; waiters are woken once it commits."""
+    if product_ids and refresh(db.session.connection(), product_ids):
+        db.session.info['stock_alert_events'] = True
+
+
+def _refresh_from_listener(connection, target):
+    if refresh(connection, [target.id]):
+        session = object_session(target)
+        if session is not None:
+            session.info['stock_alert_events'] = True
+
+
+# A new product's default location, a threshold change or a deleted product can raise or clear alerts
+@event.listens_for(Product, 'after_insert')
+def _refresh_new_product(mapper, connection, target):
+    _refresh_from_listener(connection, target)
+
+
+@event.listens_for(Product, 'after_update')
+def _refresh_on_threshold_change(mapper, connection, target):
+    if get_history(target, 'stock_threshold').has_changes():
+        _refresh_from_listener(connection, target)
+
+
+@event.listens_for(Product, 'after_delete')
+def _refresh_deleted_product(mapper, connection, target):
+    _refresh_from_listener(connection, target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_on_commit(session):
+    if session.info.pop('stock_alert_events', False):
+        with _changed:
+            _changed.notify_all()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('stock_alert_events', None)
+
+
+def current_alerts():
+    """The alert set and the event id a subscription picks up from, read in one transaction."""
+    last_event_id = last_event()
+    alerts = db.session.execute(select(StockAlert).order_by(StockAlert.product_id, StockAlert.location)).scalars().all()
+    return alerts, last_event_id
+
+
+def last_event(limit=1000):
+    """The highest event id a reader can start after without skipping an event still being committed.
+
+    max(id) is not safe: a lower id may belong to a transaction that has not committed
+    yet, and a cursor past it would never deliver it. Events older than GAP_GRACE have
+    no open gap below them (the same rule as _deliverable), so the cursor starts at the
+    newest of those and follows the recent events up to the first open gap. Events the
+    snapshot already reflects may be delivered again; they carry the resulting state,
+    so applying one twice is harmless.
+    """
+    cutoff = datetime.utcnow() - GAP_GRACE
+    event_id = db.session.execute(
+        select(StockAlertEvent.id).where(StockAlertEvent.created_at <= cutoff).order_by(StockAlertEvent.id.desc()).limit(1)
+    ).scalar() or 0
+    while True:
+        deliverable = _deliverable(events_after(event_id, limit), event_id)
+        if deliverable:
+            event_id = deliverable[-1]["id"]
+        if len(deliverable) < limit:
+            return event_id
+
+
+def events_after(event_id, limit):
+    events = db.session.execute(
+        select(StockAlertEvent).where(StockAlertEvent.id > event_id).order_by(StockAlertEvent.id).limit(limit)
+    ).scalars()
+    return [alert_event.to_dict() for alert_event in events]
+
+
+def _deliverable(events, event_id):
+    """The events a reader at `event_id` may consume without ever skipping one.
+
+    Ids are assigned at insert but become visible at commit, so a gap may be an event
+    whose transaction is still open. Delivery stops at a gap until the event after it
+    is GAP_GRACE old, by which time the missing id is assumed rolled back.
+    """
+    cutoff = datetime.utcnow() - GAP_GRACE
+    deliverable = []
+    for alert_event in events:
+        if alert_event["id"] != event_id + 1 and alert_event["created_at"] > cutoff:
+            break
+        deliverable.append(alert_event)
+        event_id = alert_event["id"]
+    return deliverable
+
+
+def wait_for_events(event_id, timeout, poll_interval, limit):
+    """Return the events after `event_id`, waiting up to `timeout` seconds for the first one.
+
+    A commit in this process wakes the waiter at once; commits in other processes
+    are picked up by re-reading the feed every `poll_interval` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        events = _deliverable(events_after(event_id, limit), event_id)
+        # End the read transaction: frees the connection while waiting and lets the next read see new commits
+        db.session.rollback()
+        remaining = deadline - time.monotonic()
+        if events or remaining <= 0:
+            return events
+        with _changed:
+            _changed.wait(min(poll_interval, remaining))
+
+
+def stream_events(event_id, dumps, max_seconds, poll_interval, heartbeat, limit):
+    """Server-Sent Events for the feed after `event_id`, ending after `max_seconds` (EventSource reconnects)."""
+    yield "retry: 3000\n\n"
+    deadline = time.monotonic() + max_seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = wait_for_events(event_id, min(heartbeat, remaining), poll_interval, limit)
+        if not events:
+            yield ": keep-alive\n\n"
+            continue
+        for alert_event in events:
+            event_id = alert_event["id"]
+            yield f"id: {event_id}\nevent: stock_alert\ndata: {dumps(alert_event)}\n\n"
+
+
+def purge_events(ttl_seconds):
+    """Delete feed entries older than the retention window, at most once per PURGE_INTERVAL."""
+    global _next_purge
+    now = datetime.utcnow()
+    with _purge_lock:
+        if now < _next_purge:
+            return
+        _next_purge = now + PURGE_INTERVAL
+    with db.engine.begin() as connection:
+        connection.execute(delete(_events).where(_events.c.created_at < now - timedelta(seconds=ttl_seconds)))
+
+
+def rebuild():
+    """Recompute the whole alert set from inventory, recording the differences as events.
+
+    One transaction per chunk of products, each holding the chunk's product locks (taken
+    in id order, as every stock writer does) so no stock write interleaves with its refresh.
+    """
+    product_ids = set(db.session.execute(select(Inventory.product_id).distinct()).scalars())
+    product_ids.update(db.session.execute(select(_alerts.c.product_id).distinct()).scalars())
+    for chunk in id_chunks(product_ids):
+        levels.lock_products(chunk)
+        refresh_products(chunk)
+        db.session.commit()
+
+
+@click.command('rebuild-stock-alerts')
+@with_appcontext
+def rebuild_stock_alerts_command():
+    """Recompute the low-stock alert set from the inventory."""
+    rebuild()
+    click.echo("Low-stock alerts rebuilt.")
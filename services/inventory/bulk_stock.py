@@ -0,0 +1,97 @@
+#authentic_lebanese_sentiment_shop/services/inventory/bulk_stock.py
+import csv
+import io
+
+REQUIRED_COLUMNS = ['product_id', 'location']
+MAX_LOCATION_LENGTH = 255
+
+
+class RowError(ValueError):
+    """Raised when a single stock change fails validation."""
+
+
+def _to_int(value, field):
+    if isinstance(value, bool):
+        raise RowError(f"{field} must be an integer")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip():
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise RowError(f"{field} must be an integer")
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def parse_change(row):
+    """Validate one change, from a JSON object or a CSV row, into (product_id, location, field, value)."""
+    if not isinstance(row, dict):
+        raise RowError("Each change must be an object")
+    product_id = _to_int(row.get('product_id'), 'product_id')
+    location = row.get('location')
+    if not isinstance(location, str) or not location.strip():
+        raise RowError("location is required")
+    location = location.strip()
+    if len(location) > MAX_LOCATION_LENGTH:
+        raise RowError(f"location must be at most {MAX_LOCATION_LENGTH} characters")
+
+    has_level = not _is_blank(row.get('stock_level'))
+    has_delta = not _is_blank(row.get('delta'))
+    if has_level == has_delta:
+        raise RowError("Provide exactly one of stock_level or delta")
+    if has_level:
+        stock_level = _to_int(row['stock_level'], 'stock_level')
+        if stock_level < 0:
+            raise RowError("stock_level must be a non-negative integer")
+        return product_id, location, 'stock_level', stock_level
+    return product_id, location, 'delta', _to_int(row['delta'], 'delta')
+
+
+def read_json(items, max_rows):
+    """Parse a JSON list of changes into [(row number, change or error message)]."""
+    if not isinstance(items, list) or not items:
+        raise ValueError("changes must be a non-empty list")
+    if len(items) > max_rows:
+        raise ValueError(f"At most {max_rows} changes per request")
+    parsed = []
+    for number, item in enumerate(items, start=1):
+        try:
+            parsed.append((number, parse_change(item)))
+        except RowError as e:
+            parsed.append((number, str(e)))
+    return parsed
+
+
+def read_csv(binary_stream, max_rows):
+    """Parse a CSV with product_id, location and a stock_level or delta column into [(line, change or error message)]."""
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text_stream)
+        fieldnames = reader.fieldnames or []
+        missing = [field for field in REQUIRED_COLUMNS if field not in fieldnames]
+        if missing:
+            raise ValueError(f"Missing required column(s) in CSV: {', '.join(missing)}")
+        if 'stock_level' not in fieldnames and 'delta' not in fieldnames:
+            raise ValueError("CSV needs a stock_level or a delta column")
+
+        parsed = []
+        for row in reader:
+            if len(parsed) >= max_rows:
+                raise ValueError(f"At most {max_rows} changes per request")
+            try:
+                parsed.append((reader.line_num, parse_change(row)))
+            except RowError as e:
+                parsed.append((reader.line_num, str(e)))
+        if not parsed:
+            raise ValueError("CSV has no rows")
+        return parsed
+    except UnicodeDecodeError:
+        raise ValueError("CSV file must be UTF-8 encoded")
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV on line {reader.line_num}: {str(e)}")
+    finally:
+        text_stream.detach()
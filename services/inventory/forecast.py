@@ -0,0 +1,168 @@
+#authentic_lebanese_sentiment_shop/services/inventory/forecast.py
+from datetime import datetime, timedelta
+from statistics import NormalDist
+import click
+import numpy as np
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, insert, delete, func
+from app import db
+from .models import Inventory, StockMovement, DemandForecast
+from . import alerts, levels
+from ..products.models import Product
+from ..orders.models import ProductSalesDaily
+from ..chunking import chunks
+
+CHUNK_SIZE = 5000  # products per history query, rows per insert
+
+_forecasts = DemandForecast.__table__
+
+# Demand comes from the per-product, per-day sales rollup rather than order_items: it already
+# nets out returns and cancellations, still covers orders moved to the archive tables, and
+# reading it costs one row per product and selling day. Everything after the reads is array
+# math over the whole catalog at once.
+
+
+def _catalog(start):
+    """Product ids (sorted) and their creation days, window start when unknown."""
+    rows = db.session.execute(select(Product.id, Product.created_at).order_by(Product.id)).all()
+    product_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    created = np.array([row[1].date() if row[1] else start for row in rows], dtype='datetime64[D]')
+    return product_ids, created
+
+
+def _positions(product_ids, values):
+    """Index of each value in the sorted product_ids, and a mask of the values found there."""
+    index = np.searchsorted(product_ids, values).clip(max=max(len(product_ids) - 1, 0))
+    return index, product_ids[index] == values
+
+
+def _sales_moments(product_ids, start, end):
+    """Sum and sum of squares of daily net units and first selling day per product, one grouped range query per chunk."""
+    total = np.zeros(len(product_ids))
+    squares = np.zeros(len(product_ids))
+    first_sale = np.full(len(product_ids), np.datetime64(end, 'D'))
+    net = ProductSalesDaily.units_sold - ProductSalesDaily.units_returned
+    for chunk in chunks(product_ids, CHUNK_SIZE):
+        rows = db.session.execute(
+            select(ProductSalesDaily.product_id, func.sum(net), func.sum(net * net), func.min(ProductSalesDaily.day))
+            .where(
+                ProductSalesDaily.product_id.between(int(chunk[0]), int(chunk[-1])),
+                ProductSalesDaily.day >= start,
+                ProductSalesDaily.day < end
+            )
+            .group_by(ProductSalesDaily.product_id)
+        ).all()
+        if not rows:
+            continue
+        data = np.array([tuple(row[:3]) for row in rows], dtype=np.float64)
+        days = np.array([row[3] for row in rows], dtype='datetime64[D]')
+        index, found = _positions(product_ids, data[:, 0].astype(np.int64))
+        total[index[found]] = data[found, 1]
+        squares[index[found]] = data[found, 2]
+        first_sale[index[found]] = days[found]
+    return total, squares, first_sale
+
+
+def _location_shares(product_ids, start):
+    """Split each product's demand over its locations by where orders drew stock since `start`.
+
+    Products without draws in the ledger put all demand on their primary location, which
+    is where orders draw from first. Returns (product index, location, share) arrays.
+    """
+    draws = db.session.execute(
+        select(StockMovement.product_id, StockMovement.location, func.sum(-StockMovement.delta).label('units'))
+        .where(StockMovement.reason == 'Order', StockMovement.created_at >= start)
+        .group_by(StockMovement.product_id, StockMovement.location)
+    ).all()
+    primary = db.session.execute(
+        select(Inventory.product_id, Inventory.location)
+        .where(Inventory.id.in_(select(func.min(Inventory.id)).group_by(Inventory.product_id)))
+    ).all()
+
+    draw_index, draw_found = _positions(product_ids, np.array([row[0] for row in draws], dtype=np.int64))
+    draw_units = np.array([row[2] for row in draws], dtype=np.float64)
+    draw_found &= draw_units > 0
+    drawn = np.bincount(draw_index[draw_found], weights=draw_units[draw_found], minlength=len(product_ids))
+
+    primary_index, primary_found = _positions(product_ids, np.array([row[0] for row in primary], dtype=np.int64))
+    primary_found &= drawn[primary_index] == 0
+
+    index = np.concatenate([draw_index[draw_found], primary_index[primary_found]])
+    locations = [row[1] for row, keep in zip(draws, draw_found) if keep] + [row[1] for row, keep in zip(primary, primary_found) if keep]
+    shares = np.concatenate([draw_units[draw_found] / drawn[draw_index[draw_found]], np.ones(primary_found.sum())])
+    return index, locations, shares
+
+
+def compute(window_days, lead_time_days, service_level, today=None):
+    """Demand rate, variability and reorder point for every product location with sales in the window.
+
+    Daily demand is the mean of net units sold per day (days without sales count as zero)
+    over the window, or since the product was created if that is later; the reorder point covers the mean
+    demand over the lead time plus z * sigma * sqrt(lead time) of safety stock, z being
+    the normal quantile of the service level. Returns a list of rows for demand_forecasts.
+    """
+    end = today or datetime.utcnow().date()  # Today is still incomplete
+    start = end - timedelta(days=window_days)
+    product_ids, created = _catalog(start)
+    if not len(product_ids):
+        return []
+
+    total, squares, first_sale = _sales_moments(product_ids, start, end)
+    # History starts at creation, or at an earlier first sale (imported history), within the window
+    history_start = np.maximum(np.minimum(created, first_sale), np.datetime64(start, 'D'))
+    days = (np.datetime64(end, 'D') - history_start).astype(np.int64)
+    selling = (days > 0) & (total > 0)
+    days_safe = np.where(days > 0, days, 1)
+    mean = np.where(selling, total / days_safe, 0.0)
+    variance = np.clip(squares / days_safe - mean ** 2, 0, None)
+    variance = np.where(days > 1, variance * days_safe / np.maximum(days_safe - 1, 1), 0.0)  # Sample variance
+    std = np.sqrt(variance)
+
+    index, locations, shares = _location_shares(product_ids, start)
+    keep = selling[index]
+    index, shares = index[keep], shares[keep]
+    locations = [location for location, kept in zip(locations, keep) if kept]
+
+    z = NormalDist().inv_cdf(service_level)
+    daily_demand = mean[index] * shares
+    demand_std = std[index] * shares
+    safety_stock = np.ceil(z * demand_std * np.sqrt(lead_time_days))
+    reorder_point = np.ceil(daily_demand * lead_time_days + safety_stock)
+
+    now = datetime.utcnow()
+    return [
+        {"product_id": int(product_id), "location": location, "daily_demand": float(rate), "demand_std": float(sigma),
+         "safety_stock": int(safety), "reorder_point": int(point), "history_days": int(history), "computed_at": now}
+        for product_id, location, rate, sigma, safety, point, history in zip(
+            product_ids[index], locations, daily_demand, demand_std, safety_stock, reorder_point, days[index]
+        )
+    ]
+
+
+def recompute(window_days, lead_time_days, service_level):
+    """Replace the forecasts and bring the alerts of every affected product up to date, in one transaction."""
+    rows = compute(window_days, lead_time_days, service_level)
+    affected = set(db.session.execute(select(_forecasts.c.product_id).distinct()).scalars())
+    affected.update(row["product_id"] for row in rows)
+    # Reorder points are alert thresholds: hold the products like any stock writer before refreshing their alerts
+    levels.lock_products(affected)
+    db.session.execute(delete(_forecasts))
+    for chunk in chunks(rows, CHUNK_SIZE):
+        db.session.execute(insert(_forecasts), chunk)
+    alerts.refresh_products(affected)
+    db.session.commit()
+    return len(rows)
+
+
+@click.command('forecast-demand')
+@with_appcontext
+def forecast_demand_command():
+    """Recompute demand forecasts and reorder points from sales history (run periodically, e.g. nightly)."""
+    config = current_app.config
+    count = recompute(
+        config['STOCK_FORECAST_WINDOW_DAYS'],
+        config['STOCK_FORECAST_LEAD_TIME_DAYS'],
+        config['STOCK_FORECAST_SERVICE_LEVEL']
+    )
+    click.echo(f"Computed reorder points for {count} product locations.")
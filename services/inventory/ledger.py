@@ -0,0 +1,169 @@
+#authentic_lebanese_sentiment_shop/services/inventory/ledger.py
+from collections import defaultdict
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, select, insert, delete, func, literal, union_all
+from app import db
+from .models import Inventory, StockMovement, StockSnapshot, StockSnapshotLevel
+from ..products.models import Product
+
+_movements = StockMovement.__table__
+_snapshots = StockSnapshot.__table__
+_snapshot_levels = StockSnapshotLevel.__table__
+_COLUMNS = ['product_id', 'location', 'delta', 'reason', 'reference_id', 'created_at']
+
+
+def record(movements, reason, reference_id=None, connection=None):
+    """Append movements to the ledger with one multi-row INSERT in the caller's transaction.
+
+    `movements` is {(product_id, location): delta}, or a list of
+    (product_id, location, delta, reference_id) when one call covers several
+    orders or returns. Zero deltas are dropped.
+    """
+    if isinstance(movements, dict):
+        movements = [(product_id, location, delta, reference_id) for (product_id, location), delta in movements.items()]
+    now = datetime.utcnow()
+    rows = [
+        {"product_id": product_id, "location": location, "delta": delta, "reason": reason,
+         "reference_id": reference, "created_at": now}
+        for product_id, location, delta, reference in movements
+        if delta
+    ]
+    if rows:
+        (connection or db.session).execute(insert(_movements), rows)
+
+
+def _new_stock(product_ids):
+    return select(Inventory.product_id, Inventory.location, Inventory.stock_level, literal('Receipt'), Inventory.id, literal(datetime.utcnow())) \
+        .where(product_ids, func.coalesce(Inventory.stock_level, 0) != 0)
+
+
+# A new product's default location is created by a listener on the products model; record its starting stock
+@event.listens_for(Product, 'after_insert')
+def _record_new_product(mapper, connection, target):
+    connection.execute(insert(_movements).from_select(_COLUMNS, _new_stock(Inventory.product_id == target.id)))
+
+
+def record_new_products(product_ids):
+    """Record the starting stock of products inserted by Core statements, which skip the listener."""
+    db.session.execute(insert(_movements).from_select(_COLUMNS, _new_stock(Inventory.product_id.in_(product_ids))))
+
+
+# Deleting a product deletes its locations through the ORM cascade; record the stock leaving with each row.
+# The level is read from the table, since set-based updates leave the loaded attribute stale.
+@event.listens_for(Inventory, 'before_delete')
+def _record_removed_location(mapper, connection, target):
+    stock_level = connection.execute(select(Inventory.stock_level).where(Inventory.id == target.id)).scalar()
+    record({(target.product_id, target.location): -(stock_level or 0)}, 'Removal', connection=connection)
+
+
+def latest_snapshot(at=None):
+    query = select(StockSnapshot).order_by(StockSnapshot.as_of.desc(), StockSnapshot.id.desc()).limit(1)
+    if at is not None:
+        query = query.where(StockSnapshot.as_of <= at)
+    return db.session.execute(query).scalar()
+
+
+def stock_at(at, product_id=None, location=None):
+    """Stock per (product_id, location) at time `at`: the newest snapshot before it plus the ledger tail.
+
+    Returns ({(product_id, location): stock_level}, snapshot or None). Locations at zero are omitted.
+    """
+    snapshot = latest_snapshot(at)
+    levels = defaultdict(int)
+    if snapshot is not None:
+        query = select(_snapshot_levels.c.product_id, _snapshot_levels.c.location, _snapshot_levels.c.stock_level) \
+            .where(_snapshot_levels.c.snapshot_id == snapshot.id)
+        if product_id is not None:
+            query = query.where(_snapshot_levels.c.product_id == product_id)
+        if location is not None:
+            query = query.where(_snapshot_levels.c.location == location)
+        for row_product_id, row_location, stock_level in db.session.execute(query):
+            levels[(row_product_id, row_location)] += stock_level
+
+    tail = select(_movements.c.product_id, _movements.c.location, func.sum(_movements.c.delta)) \
+        .where(_movements.c.created_at <= at)
+    if snapshot is not None:
+        tail = tail.where(_movements.c.id > snapshot.last_movement_id)
+    if product_id is not None:
+        tail = tail.where(_movements.c.product_id == product_id)
+    if location is not None:
+        tail = tail.where(_movements.c.location == location)
+    for row_product_id, row_location, delta in db.session.execute(tail.group_by(_movements.c.product_id, _movements.c.location)):
+        levels[(row_product_id, row_location)] += int(delta)
+
+    return {key: level for key, level in levels.items() if level}, snapshot
+
+
+def take_snapshot(grace_seconds):
+    """Compact the previous snapshot and the movements since into a new snapshot.
+
+    Only movements older than `grace_seconds` are folded in: ids are assigned at insert
+    but become visible at commit, so the newest ids may still have lower-numbered
+    neighbours in open transactions. Returns the new snapshot, or None if nothing moved.
+    """
+    previous = latest_snapshot()
+    previous_id = previous.last_movement_id if previous is not None else 0
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    last_id, as_of = db.session.execute(
+        select(func.max(_movements.c.id), func.max(_movements.c.created_at))
+        .where(_movements.c.id > previous_id, _movements.c.created_at <= cutoff)
+    ).one()
+    if last_id is None:
+        db.session.rollback()
+        return None
+    # A slow transaction can commit an older id with a later timestamp; as_of covers everything folded in
+    as_of = max(as_of, db.session.execute(
+        select(func.max(_movements.c.created_at)).where(_movements.c.id > previous_id, _movements.c.id <= last_id)
+    ).scalar())
+
+    snapshot = StockSnapshot(last_movement_id=last_id, as_of=as_of, taken_at=datetime.utcnow())
+    db.session.add(snapshot)
+    db.session.flush()
+
+    parts = [
+        select(_movements.c.product_id, _movements.c.location, _movements.c.delta.label('quantity'))
+        .where(_movements.c.id > previous_id, _movements.c.id <= last_id)
+    ]
+    if previous is not None:
+        parts.append(
+            select(_snapshot_levels.c.product_id, _snapshot_levels.c.location, _snapshot_levels.c.stock_level)
+            .where(_snapshot_levels.c.snapshot_id == previous.id)
+        )
+    combined = union_all(*parts).subquery()
+    total = func.sum(combined.c.quantity)
+    db.session.execute(insert(_snapshot_levels).from_select(
+        ['snapshot_id', 'product_id', 'location', 'stock_level'],
+        select(literal(snapshot.id), combined.c.product_id, combined.c.location, total)
+        .group_by(combined.c.product_id, combined.c.location)
+        .having(total != 0)
+    ))
+    db.session.commit()
+    return snapshot
+
+
+def prune_snapshots(keep):
+    """Delete all but the newest `keep` snapshots; the ledger itself is never pruned."""
+    stale = db.session.execute(
+        select(StockSnapshot.id).order_by(StockSnapshot.as_of.desc(), StockSnapshot.id.desc()).offset(keep)
+    ).scalars().all()
+    if stale:
+        db.session.execute(delete(_snapshot_levels).where(_snapshot_levels.c.snapshot_id.in_(stale)))
+        db.session.execute(delete(_snapshots).where(_snapshots.c.id.in_(stale)))
+    db.session.commit()
+    return len(stale)
+
+
+@click.command('snapshot-stock')
+@with_appcontext
+def snapshot_stock_command():
+    """Fold recent stock movements into a new snapshot (run periodically, e.g. nightly)."""
+    config = current_app.config
+    snapshot = take_snapshot(config['STOCK_SNAPSHOT_GRACE'])
+    pruned = prune_snapshots(config['STOCK_SNAPSHOT_KEEP'])
+    if snapshot is None:
+        click.echo(f"No new movements to snapshot; pruned {pruned} old snapshots.")
+    else:
+        click.echo(f"Snapshot {snapshot.id} covers movements up to {snapshot.last_movement_id}; pruned {pruned} old snapshots.")
@@ -0,0 +1,316 @@
+#authentic_lebanese_sentiment_shop/services/inventory/levels.py
+from collections import defaultdict
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, select, insert, update, func
+from app import db
+from .models import Inventory, DEFAULT_LOCATION
+from . import alerts, ledger
+from ..products.models import Product
+from ..chunking import id_chunks
+
+# Per-location Inventory.stock_level is the source of truth and Product.stock is their
+# sum. Every writer changes both in one transaction: by the same delta, or for bulk
+# changes by re-aggregating only the products it holds locked. Writers lock the
+# product rows (in id order) before any inventory row, so concurrent writers of the
+# same product queue up behind each other instead of deadlocking or overwriting each
+# other's totals.
+
+
+def lock_products(product_ids):
+    """Lock the products' rows and return {product_id: stock}."""
+    stock = {}
+    for chunk in id_chunks(product_ids):
+        stock.update(db.session.execute(
+            select(Product.id, Product.stock)
+            .where(Product.id.in_(chunk))
+            .order_by(Product.id)
+            .with_for_update()
+        ).all())
+    return stock
+
+
+def _lock_levels(product_ids):
+    """Lock the products' inventory rows; returned ordered by product, then id (primary location first)."""
+    rows = []
+    for chunk in id_chunks(product_ids):
+        rows.extend(db.session.execute(
+            select(Inventory.id, Inventory.product_id, Inventory.location, Inventory.stock_level)
+            .where(Inventory.product_id.in_(chunk))
+            .order_by(Inventory.product_id, Inventory.id)
+            .with_for_update()
+        ).all())
+    return rows
+
+
+def _add_to_levels(row_deltas):
+    """stock_level += delta for {inventory_id: delta}, one UPDATE per chunk."""
+    row_deltas = {row_id: delta for row_id, delta in row_deltas.items() if delta}
+    for chunk in id_chunks(row_deltas):
+        db.session.execute(
+            update(Inventory)
+            .where(Inventory.id.in_(chunk))
+            .values(stock_level=Inventory.stock_level + case({row_id: row_deltas[row_id] for row_id in chunk}, value=Inventory.id))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _add_to_totals(product_deltas):
+    """stock += delta for {product_id: delta}, one UPDATE per chunk."""
+    product_deltas = {product_id: delta for product_id, delta in product_deltas.items() if delta}
+    for chunk in id_chunks(product_deltas):
+        db.session.execute(
+            update(Product)
+            .where(Product.id.in_(chunk))
+            .values(stock=Product.stock + case({product_id: product_deltas[product_id] for product_id in chunk}, value=Product.id))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _apply(deltas, rows):
+    """Check {(product_id, location): delta} against locked `rows`, then write levels and totals."""
+    by_key = {(row.product_id, row.location): row for row in rows}
+    row_deltas = {}
+    product_deltas = defaultdict(int)
+    for (product_id, location), delta in deltas.items():
+        row = by_key.get((product_id, location))
+        if row is None:
+            raise ValueError(f"No inventory for product {product_id} at {location}")
+        if (row.stock_level or 0) + delta < 0:
+            raise ValueError(f"Not enough stock for product {product_id} at {location}")
+        row_deltas[row.id] = delta
+        product_deltas[product_id] += delta
+    _add_to_totals(product_deltas)
+    _add_to_levels(row_deltas)
+
+
+def adjust_levels(deltas, reason='Adjustment', reference_id=None):
+    """Add {(product_id, location): delta} to existing locations and to their product totals.
+
+    Raises ValueError, before anything is written, if a location does not exist or
+    would go below zero.
+    """
+    product_ids = {product_id for product_id, _ in deltas}
+    lock_products(product_ids)
+    _apply(deltas, _lock_levels(product_ids))
+    ledger.record(deltas, reason, reference_id)
+    alerts.refresh_products(product_ids)
+
+
+def set_levels(levels, reason='Count', reference_id=None):
+    """Set {(product_id, location): stock_level}; the product totals move by the difference."""
+    product_ids = {product_id for product_id, _ in levels}
+    lock_products(product_ids)
+    rows = _lock_levels(product_ids)
+    current = {(row.product_id, row.location): row.stock_level or 0 for row in rows}
+    deltas = {key: level - current.get(key, 0) for key, level in levels.items()}
+    _apply(deltas, rows)
+    ledger.record(deltas, reason, reference_id)
+    alerts.refresh_products(product_ids)
+
+
+def _upsert_levels_statement():
+    """INSERT that overwrites the level of an existing (product_id, location) row instead of failing."""
+    table = Inventory.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table)
+        return statement.on_duplicate_key_update(stock_level=statement.inserted.stock_level, last_updated=func.now())
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    statement = dialect_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=['product_id', 'location'],
+        set_={"stock_level": statement.excluded.stock_level, "last_updated": func.now()}
+    )
+
+
+def _location_total():
+    return (
+        select(func.coalesce(func.sum(Inventory.stock_level), 0))
+        .where(Inventory.product_id == Product.id)
+        .scalar_subquery()
+    )
+
+
+def _resum_totals(product_ids):
+    """Set the (locked) products' stock to the sum of their locations, one UPDATE per chunk."""
+    location_total = _location_total()
+    for chunk in id_chunks(product_ids):
+        db.session.execute(
+            update(Product)
+            .where(Product.id.in_(chunk))
+            .values(stock=location_total)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def apply_changes(changes):
+    """Apply a list of (product_id, location, field, value) changes in order; field is 'stock_level' or 'delta'.
+
+    Setting a stock_level creates the location if it does not exist yet; a delta needs an
+    existing location and may not take it below zero. Changes that fail are reported and
+    skipped. With the rows locked the final level of every touched location is known, so
+    they are written with one multi-row upsert on (product_id, location), and the totals
+    of the touched products are re-aggregated from their locations in one UPDATE per chunk.
+    Returns one result dict per change.
+    """
+    product_ids = {product_id for product_id, _, _, _ in changes}
+    known_products = lock_products(product_ids)
+    initial = {}
+    for row in _lock_levels(product_ids):
+        initial[(row.product_id, row.location)] = row.stock_level or 0
+
+    current = dict(initial)
+    results = []
+    movements = {'stock_level': [], 'delta': []}
+    for product_id, location, field, value in changes:
+        key = (product_id, location)
+        result = {"product_id": product_id, "location": location}
+        if product_id not in known_products:
+            result["error"] = "Product not found"
+        elif field == 'delta' and key not in current:
+            result["error"] = "No inventory for this product at this location"
+        elif field == 'delta' and current[key] + value < 0:
+            result["error"] = f"Not enough stock ({current[key]} available)"
+        else:
+            level = value if field == 'stock_level' else current[key] + value
+            movements[field].append((product_id, location, level - current.get(key, 0), None))
+            current[key] = level
+            result["stock_level"] = level
+        results.append(result)
+
+    changed = [
+        {"product_id": product_id, "location": location, "stock_level": level}
+        for (product_id, location), level in sorted(current.items())
+        if initial.get((product_id, location)) != level
+    ]
+    if changed:
+        product_ids = {row["product_id"] for row in changed}
+        db.session.execute(_upsert_levels_statement(), changed)
+        _resum_totals(product_ids)
+        ledger.record(movements['stock_level'], 'Count')
+        ledger.record(movements['delta'], 'Adjustment')
+        alerts.refresh_products(product_ids)
+    return results
+
+
+def add_location(product_id, location, stock_level):
+    """Create the product's record at a new location and add its stock to the product total."""
+    if not lock_products([product_id]):
+        raise LookupError(f"Product {product_id} not found")
+    record = Inventory(product_id=product_id, location=location, stock_level=stock_level)
+    db.session.add(record)
+    db.session.flush()  # The unique (product_id, location) constraint rejects a concurrent duplicate here
+    _add_to_totals({product_id: stock_level})
+    ledger.record({(product_id, location): stock_level}, 'Receipt', record.id)
+    alerts.refresh_products([product_id])
+    return record
+
+
+def set_product_totals(totals, reason='Adjustment'):
+    """Set {product_id: stock} for product-level edits by moving the primary location by the difference.
+
+    Stock held at other locations is left alone; lowering the total below it raises ValueError.
+    """
+    stock = lock_products(totals)
+    primary = {}
+    for row in _lock_levels(totals):
+        primary.setdefault(row.product_id, row)
+    deltas = {}
+    for product_id, total in totals.items():
+        if product_id not in stock:
+            continue
+        if product_id not in primary:
+            raise ValueError(f"Product {product_id} has no inventory location")
+        row = primary[product_id]
+        elsewhere = (stock[product_id] or 0) - (row.stock_level or 0)
+        if total < elsewhere:
+            raise ValueError(f"Product {product_id} has {elsewhere} units at other locations; adjust those locations first")
+        deltas[(product_id, row.location)] = total - (stock[product_id] or 0)
+    _apply(deltas, primary.values())
+    ledger.record(deltas, reason)
+    alerts.refresh_products({product_id for product_id, _ in deltas})
+
+
+def draw_from_locations(quantities, reason='Order', reference_id=None):
+    """Take {product_id: quantity} out of the product's locations, primary location first.
+
+    Only the inventory rows change: the caller has already taken the same quantities
+    off Product.stock, holding those rows locked. Returns {(product_id, location): quantity}.
+    """
+    remaining = dict(quantities)
+    taken = {}
+    row_deltas = {}
+    for row in _lock_levels(quantities):
+        quantity = min(remaining[row.product_id], row.stock_level or 0)
+        if quantity > 0:
+            remaining[row.product_id] -= quantity
+            row_deltas[row.id] = -quantity
+            taken[(row.product_id, row.location)] = quantity
+    short = [product_id for product_id, quantity in remaining.items() if quantity > 0]
+    if short:
+        raise ValueError(f"Not enough stock for product ID {', '.join(str(product_id) for product_id in sorted(short))}")
+    _add_to_levels(row_deltas)
+    ledger.record({key: -quantity for key, quantity in taken.items()}, reason, reference_id)
+    alerts.refresh_products(quantities)
+    return taken
+
+
+def return_to_locations(quantities, reason, reference_id=None, items=None):
+    """Put {product_id: quantity} back at each product's primary location.
+
+    Only the inventory rows change; the caller adds the same quantities to Product.stock.
+    A product without any location gets one at DEFAULT_LOCATION. `items`, a list of
+    (product_id, reference_id, quantity) summing to `quantities`, itemizes the ledger
+    entries when the call covers several orders or returns.
+    Returns {(product_id, location): quantity}.
+    """
+    primary = {}
+    for row in _lock_levels(quantities):
+        primary.setdefault(row.product_id, row)
+    row_deltas = {}
+    returned = {}
+    new_rows = []
+    for product_id, quantity in quantities.items():
+        row = primary.get(product_id)
+        if row is None:
+            new_rows.append({"product_id": product_id, "location": DEFAULT_LOCATION, "stock_level": quantity})
+            returned[(product_id, DEFAULT_LOCATION)] = quantity
+        else:
+            row_deltas[row.id] = quantity
+            returned[(product_id, row.location)] = quantity
+    _add_to_levels(row_deltas)
+    if new_rows:
+        db.session.execute(insert(Inventory.__table__), new_rows)
+    if items is None:
+        ledger.record(returned, reason, reference_id)
+    else:
+        locations = {product_id: location for product_id, location in returned}
+        ledger.record([(product_id, locations[product_id], quantity, reference) for product_id, reference, quantity in items], reason)
+    alerts.refresh_products(quantities)
+    return returned
+
+
+def recompute_totals():
+    """Set every Product.stock to the sum of its locations; a one-off repair, not part of normal writes."""
+    location_total = _location_total()
+    result = db.session.execute(
+        update(Product)
+        .where(Product.stock != location_total)
+        .values(stock=location_total)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+@click.command('recompute-product-stock')
+@with_appcontext
+def recompute_product_stock_command():
+    """Reset Product.stock to the sum of its per-location inventory levels."""
+    changed = recompute_totals()
+    click.echo(f"Corrected stock of {changed} products.")
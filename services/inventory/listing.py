@@ -0,0 +1,36 @@
+#authentic_lebanese_sentiment_shop/services/inventory/listing.py
+from app import db
+from .models import Inventory
+from ..products.models import Product
+
+COLUMNS = [Inventory.id, Inventory.product_id, Inventory.location, Inventory.stock_level, Inventory.last_updated]
+PRODUCT_COLUMNS = [Product.name.label('product_name'), Product.stock_threshold, Product.category_id]
+
+
+def inventory_query(product_id=None, location=None, category_id=None, min_stock=None, max_stock=None,
+                    include_product=False, after_id=None):
+    """Inventory rows matching the filters, in id order for keyset paging.
+
+    Only the listed columns are selected, no ORM objects. With `include_product` the
+    product's name, threshold and category come from the same query through a join,
+    which the category filter needs anyway.
+    """
+    columns = COLUMNS + PRODUCT_COLUMNS if include_product else COLUMNS
+    query = db.session.query(*columns)
+    if include_product or category_id is not None:
+        query = query.join(Product, Product.id == Inventory.product_id)
+
+    if product_id is not None:
+        query = query.filter(Inventory.product_id == product_id)
+    if location is not None:
+        query = query.filter(Inventory.location == location)
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    if min_stock is not None:
+        query = query.filter(Inventory.stock_level >= min_stock)
+    if max_stock is not None:
+        query = query.filter(Inventory.stock_level <= max_stock)
+    if after_id is not None:
+        query = query.filter(Inventory.id > after_id)
+    return query.order_by(Inventory.id)
+
@@ -1,11 +1,17 @@
 from app import db
+from ..serialization import loaded
+
+DEFAULT_LOCATION = "Main Warehouse"  # Where a new product's initial stock is recorded
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'location', name='uq_inventory_product_id_location'),  # One record per product per location
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
-    location = db.Column(db.String(255), nullable=False)  # e.g., Warehouse A, Store B
+    location = db.Column(db.String(255), nullable=False, index=True)  # e.g., Warehouse A, Store B
     stock_level = db.Column(db.Integer, default=0)
     last_updated = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
 
@@ -15,3 +21,140 @@ class Inventory(db.Model):
 
 
 
+
+
+class StockAlert(db.Model):
+    """A location currently at or below its threshold: the forecast reorder point
+    where one has been computed, otherwise the product's stock threshold.
+
+    Maintained at write time by the stock mutation paths (see alerts.refresh),
+    so reading the alert set never scans the whole inventory.
+    """
+    __tablename__ = 'stock_alerts'
+
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    location = db.Column(db.String(255), primary_key=True)
+    stock_level = db.Column(db.Integer, nullable=False)
+    stock_threshold = db.Column(db.Integer, nullable=False)
+    raised_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "product_id": self.product_id,
+            "location": self.location,
+            "stock_level": self.stock_level,
+            "stock_threshold": self.stock_threshold,
+            "raised_at": self.raised_at,
+            "updated_at": self.updated_at
+        }
+
+
+class StockAlertEvent(db.Model):
+    """Change feed of the alert set, read by the long-poll and SSE endpoints in id order."""
+    __tablename__ = 'stock_alert_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.Enum('Raised', 'Updated', 'Cleared'), nullable=False)
+    product_id = db.Column(db.Integer, nullable=False)
+    location = db.Column(db.String(255), nullable=False)
+    stock_level = db.Column(db.Integer)  # NULL when the location no longer exists
+    stock_threshold = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "product_id": self.product_id,
+            "location": self.location,
+            "stock_level": self.stock_level,
+            "stock_threshold": self.stock_threshold,
+            "created_at": self.created_at
+        }
+
+
+MOVEMENT_REASONS = ('Opening', 'Order', 'Cancel', 'Return', 'Count', 'Adjustment', 'Receipt', 'Removal')
+
+
+class StockMovement(db.Model):
+    """Append-only ledger of stock changes per product and location.
+
+    Rows are only ever inserted, in the same transaction as the level change they
+    describe. No foreign key, so the history outlives deleted products.
+    """
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_product_id_id', 'product_id', 'id'),  # One product's history / ledger tail
+    )
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    location = db.Column(db.String(255), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.Enum(*MOVEMENT_REASONS), nullable=False)
+    reference_id = db.Column(db.Integer)  # Order id for Order/Cancel, return id for Return, inventory id for Receipt
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    _serialized = frozenset(('id', 'product_id', 'location', 'delta', 'reason', 'reference_id', 'created_at'))
+
+    def to_dict(self):
+        values = loaded(self, self._serialized)
+        return {
+            "id": values['id'],
+            "product_id": values['product_id'],
+            "location": values['location'],
+            "delta": values['delta'],
+            "reason": values['reason'],
+            "reference_id": values['reference_id'],
+            "created_at": values['created_at']
+        }
+
+
+class StockSnapshot(db.Model):
+    """Compacted stock levels covering every movement up to last_movement_id."""
+    __tablename__ = 'stock_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_movement_id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), nullable=False)
+    as_of = db.Column(db.DateTime, nullable=False, index=True)  # Time of the newest movement included
+    taken_at = db.Column(db.DateTime, nullable=False)
+
+
+class StockSnapshotLevel(db.Model):
+    __tablename__ = 'stock_snapshot_levels'
+
+    snapshot_id = db.Column(db.Integer, db.ForeignKey('stock_snapshots.id', ondelete="CASCADE"), primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    location = db.Column(db.String(255), primary_key=True)
+    stock_level = db.Column(db.Integer, nullable=False)
+
+
+class DemandForecast(db.Model):
+    """Demand and suggested reorder point per product and location, recomputed in batch (see forecast.py).
+
+    Where a row exists, its reorder_point stands in for the product's stock_threshold
+    when deciding whether the location is low on stock.
+    """
+    __tablename__ = 'demand_forecasts'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete="CASCADE"), primary_key=True)
+    location = db.Column(db.String(255), primary_key=True)
+    daily_demand = db.Column(db.Float, nullable=False)  # Mean net units per day over the history window
+    demand_std = db.Column(db.Float, nullable=False)  # Standard deviation of daily net units
+    safety_stock = db.Column(db.Integer, nullable=False)
+    reorder_point = db.Column(db.Integer, nullable=False)
+    history_days = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "product_id": self.product_id,
+            "location": self.location,
+            "daily_demand": self.daily_demand,
+            "demand_std": self.demand_std,
+            "safety_stock": self.safety_stock,
+            "reorder_point": self.reorder_point,
+            "history_days": self.history_days,
+            "computed_at": self.computed_at
+        }
@@ -1,35 +1,60 @@
 #authentic_lebanese_sentiment_shop/services/inventory/routes.py
-from flask import Blueprint, request, jsonify, abort
-from .models import Inventory
+from flask import Blueprint, request, jsonify, abort, current_app, stream_with_context
+import logging
+from sqlalchemy import tuple_
+from .models import Inventory, StockMovement, DemandForecast, MOVEMENT_REASONS
 from app import db
-from ..user_management.models import ActivityLog
+from ..audit import log_activity
 from .decorators import jwt_required, role_required
 from ..products.models import Product
-from ..orders.models import OrderItem
-from sqlalchemy import func, desc
+from ..http_cache import conditional_get
+from ..idempotency import idempotent
+from ..pagination import get_bool_arg, get_datetime_arg, get_int_arg, get_page_args, paginate
+from ..orders import sales_rollup
+from ..streaming import generate_ndjson, row_to_dict
+from ..uploads import csv_upload_stream
+from . import alerts, bulk_stock, ledger, levels, listing
 
 
 inventory_bp = Blueprint('inventory', __name__)
 
+# Get inventory, one keyset page at a time, or every matching row as an NDJSON stream (?format=ndjson)
 @inventory_bp.route('/all', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'InventoryManager'])
+@conditional_get('inventory', 'products')
 def view_all_inventory():
+    limit, cursor = get_page_args()
+    after_id = None
+    if cursor is not None:
+        after_id = cursor.get('id')
+        if not isinstance(after_id, int):
+            abort(400, "Invalid cursor")
+    export_format = request.args.get('format', 'json').lower()
+    if export_format not in ('json', 'ndjson'):
+        abort(400, "format must be json or ndjson")
+
+    # Server-side filters; include_product adds name, threshold and category from the same query
+    query = listing.inventory_query(
+        product_id=get_int_arg('product_id'),
+        location=request.args.get('location') or None,
+        category_id=get_int_arg('category_id'),
+        min_stock=get_int_arg('min_stock'),
+        max_stock=get_int_arg('max_stock'),
+        include_product=bool(get_bool_arg('include_product')),
+        after_id=after_id
+    )
+
+    if export_format == 'ndjson':
+        body = generate_ndjson(current_app.json.dumps, query.statement)
+        return current_app.response_class(stream_with_context(body), mimetype='application/x-ndjson')
+
     try:
-        inventory_records = Inventory.query.all()
-        
-        inventory_list = [
-            {
-                "id": record.id,
-                "product_id": record.product_id,
-                "location": record.location,
-                "stock_level": record.stock_level,
-                "last_updated": record.last_updated
-            }
-            for record in inventory_records
-        ]
-        
-        return jsonify({"inventory": inventory_list}), 200
+        rows, next_cursor = paginate(query, limit, lambda row: {"id": row.id})
+        return jsonify({
+            "inventory": [row_to_dict(row) for row in rows],
+            "next_cursor": next_cursor
+        }), 200
 
     except Exception as e:
         return jsonify({"error": "Failed to process request."}), 500
@@ -38,6 +63,7 @@ def view_all_inventory():
 @inventory_bp.route('/add', methods=['POST'])
 @jwt_required
 @role_required(['SuperAdmin', 'InventoryManager'])
+@idempotent
 def add_inventory():
     data = request.get_json()
     try:
@@ -47,6 +73,8 @@ def add_inventory():
 
     except (TypeError, ValueError):
         return jsonify({"error": "Invalid input types"}), 400
+    if stock_level < 0:
+        return jsonify({"error": "Stock level must be a non-negative integer"}), 400
     
 
     try:
@@ -60,25 +88,12 @@ def add_inventory():
         if existing_inventory:
             return jsonify({"message": "Inventory record for this product and location already exists"}), 400
 
-        # Create a new Inventory record
-        new_inventory = Inventory(
-            product_id=product_id,
-            location=location,
-            stock_level=stock_level
-        )
-        db.session.add(new_inventory)
-        
-        # Update the product's total stock to include the new inventory stock level
-        total_stock_level = db.session.query(db.func.sum(Inventory.stock_level)).filter_by(product_id=product_id).scalar()
-        product.stock = total_stock_level
-
-        
+        # Create the new Inventory record and add its stock to the product's total
+        levels.add_location(product_id, location, stock_level)
         db.session.commit()
 
         
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"New inventory added by admin {request.user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"New inventory added by admin {request.user_id}")
 
         return jsonify({"message": "Inventory added successfully", "inventory": {
             "product_id": product_id,
@@ -99,28 +114,22 @@ def update_stock():
     product_id = data.get('product_id')
     location = data.get('location')
     new_stock_level = data.get('stock_level')
+    if not isinstance(new_stock_level, int) or isinstance(new_stock_level, bool) or new_stock_level < 0:
+        return jsonify({"error": "Stock level must be a non-negative integer"}), 400
 
     try:
-        # Find or create the inventory record for the product at the specific location
+        # Find the inventory record for the product at the specific location
         inventory_record = Inventory.query.filter_by(product_id=product_id, location=location).first()
 
         if not inventory_record:
             return jsonify({"message": "Inventory Item Not Found"}), 400
-        else:
-            inventory_record.stock_level = new_stock_level
-
-        # Update the Product's stock level
-            product = Product.query.get(product_id)
-            if product:
-                # Update the product's stock level to the new stock level
-                product.stock = new_stock_level
 
+        # Set this location's level; the product's total moves by the difference
+        levels.set_levels({(inventory_record.product_id, inventory_record.location): new_stock_level})
         db.session.commit()
 
         # Log the inventory additon 
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"New inventory updated by admin {request.user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"New inventory updated by admin {request.user_id}")
 
 
         return jsonify({"message": "Stock updated successfully"}), 200
@@ -130,37 +139,253 @@ def update_stock():
         return jsonify({"error": "Failed to process request."}), 500
 
 
+# Apply many stock changes in one transaction, from a JSON list or a CSV upload; each row gets its own result
+@inventory_bp.route('/bulk_update_stock', methods=['POST'])
+@jwt_required
+@role_required(['SuperAdmin', 'InventoryManager'])
+@idempotent
+def bulk_update_stock():
+    max_rows = current_app.config['BULK_STOCK_MAX_ROWS']
+    file = request.files.get('file')
+    try:
+        if file is not None:
+            stream = csv_upload_stream(file)
+            parsed = bulk_stock.read_csv(stream, max_rows)
+        elif request.is_json:
+            data = request.get_json()
+            # Either {"changes": [...]} or a bare list
+            parsed = bulk_stock.read_json(data.get('changes') if isinstance(data, dict) else data, max_rows)
+        else:
+            abort(400, "Send a JSON body with changes or a CSV file")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    valid = [(row, change) for row, change in parsed if not isinstance(change, str)]
+    try:
+        applied = iter(levels.apply_changes([change for _, change in valid]))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Bulk stock update failed: {str(e)}")
+        return jsonify({"error": "Failed to process request."}), 500
+
+    # Results in request order: validation errors in place, the rest from apply_changes
+    results = []
+    for row, change in parsed:
+        if isinstance(change, str):
+            results.append({"row": row, "error": change})
+        else:
+            results.append({"row": row, **next(applied)})
+    failed = sum(1 for result in results if 'error' in result)
+
+    log_activity(request.user_id, f"Bulk stock update by admin {request.user_id}: {len(results) - failed} changes applied, {failed} rejected")
+
+    return jsonify({
+        "message": "Stock updated",
+        "applied": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }), 200
+
+
+# The stock ledger, oldest first: every change to a location's level with its reason and order/return reference
+@inventory_bp.route('/movements', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'InventoryManager'])
+def stock_movements():
+    limit, cursor = get_page_args()
+    query = StockMovement.query
+
+    product_id = get_int_arg('product_id')
+    if product_id is not None:
+        query = query.filter(StockMovement.product_id == product_id)
+    location = request.args.get('location')
+    if location:
+        query = query.filter(StockMovement.location == location)
+    reason = request.args.get('reason')
+    if reason:
+        if reason not in MOVEMENT_REASONS:
+            abort(400, f"reason must be one of {', '.join(MOVEMENT_REASONS)}")
+        query = query.filter(StockMovement.reason == reason)
+    date_from = get_datetime_arg('date_from')
+    if date_from is not None:
+        query = query.filter(StockMovement.created_at >= date_from)
+    date_to = get_datetime_arg('date_to')
+    if date_to is not None:
+        query = query.filter(StockMovement.created_at < date_to)
+
+    if cursor is not None:
+        last_id = cursor.get('id')
+        if not isinstance(last_id, int):
+            abort(400, "Invalid cursor")
+        query = query.filter(StockMovement.id > last_id)
+    query = query.order_by(StockMovement.id)
+
+    try:
+        movements, next_cursor = paginate(query, limit, lambda movement: {"id": movement.id})
+        return jsonify({
+            "movements": [movement.to_dict() for movement in movements],
+            "next_cursor": next_cursor
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": "Could not retrieve stock movements"}), 500
+
+
+# Stock per product and location as it was at ?at=, rebuilt from the newest snapshot before then plus the ledger
+@inventory_bp.route('/stock_at', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'InventoryManager'])
+def stock_at():
+    at = get_datetime_arg('at')
+    if at is None:
+        abort(400, "at is required")
+    product_id = get_int_arg('product_id')
+    location = request.args.get('location') or None
+    try:
+        stock, snapshot = ledger.stock_at(at, product_id, location)
+        return jsonify({
+            "at": at,
+            "snapshot_id": snapshot.id if snapshot is not None else None,
+            "stock": [
+                {"product_id": row_product_id, "location": row_location, "stock_level": stock_level}
+                for (row_product_id, row_location), stock_level in sorted(stock.items())
+            ]
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": "Could not retrieve stock history"}), 500
+
+
+# Forecast demand and reorder points per product and location, as last computed by `flask forecast-demand`
+@inventory_bp.route('/reorder_points', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'InventoryManager'])
+@conditional_get('demand_forecasts')
+def reorder_points():
+    limit, cursor = get_page_args()
+    query = DemandForecast.query
+
+    product_id = get_int_arg('product_id')
+    if product_id is not None:
+        query = query.filter(DemandForecast.product_id == product_id)
+    location = request.args.get('location')
+    if location:
+        query = query.filter(DemandForecast.location == location)
+
+    # Keyset on the (product_id, location) primary key
+    if cursor is not None:
+        last_product_id, last_location = cursor.get('product_id'), cursor.get('location')
+        if not isinstance(last_product_id, int) or not isinstance(last_location, str):
+            abort(400, "Invalid cursor")
+        query = query.filter(tuple_(DemandForecast.product_id, DemandForecast.location) > (last_product_id, last_location))
+    query = query.order_by(DemandForecast.product_id, DemandForecast.location)
+
+    try:
+        forecasts, next_cursor = paginate(query, limit, lambda forecast: {
+            "product_id": forecast.product_id,
+            "location": forecast.location
+        })
+        return jsonify({
+            "reorder_points": [forecast.to_dict() for forecast in forecasts],
+            "next_cursor": next_cursor
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": "Could not retrieve reorder points"}), 500
+
+
 @inventory_bp.route('/low_stock_alerts', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'InventoryManager'])
 def low_stock_alerts():
     try:
-        low_stock_products = db.session.query(Inventory)\
-            .join(Product, Inventory.product_id == Product.id)\
-            .filter(Inventory.stock_level <= Product.stock_threshold).all()
-            
-        alerts = [{"product_id": item.product_id, "location": item.location, "stock_level": item.stock_level} for item in low_stock_products]
-        
-        return jsonify({"low_stock_alerts": alerts}), 200
+        # The alert set is maintained by the stock writes; last_event_id is where a subscription picks up from
+        alert_rows, last_event_id = alerts.current_alerts()
+        return jsonify({
+            "low_stock_alerts": [alert.to_dict() for alert in alert_rows],
+            "last_event_id": last_event_id
+        }), 200
 
     except Exception as e:
         return jsonify({"error": "Could not retrieve low stock alerts"}), 500
 
 
+def _alert_cursor():
+    """Where a subscriber resumes: ?after=, then the SSE Last-Event-ID header, else from now on."""
+    after = get_int_arg('after')
+    if after is None and request.headers.get('Last-Event-ID', '').isdigit():
+        after = int(request.headers['Last-Event-ID'])
+    return alerts.last_event() if after is None else after
+
+
+# Long-poll for alert changes: returns as soon as there are events after ?after=, or empty after the timeout
+@inventory_bp.route('/low_stock_alerts/events', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'InventoryManager'])
+def low_stock_alert_events():
+    config = current_app.config
+    timeout = get_int_arg('timeout')
+    timeout = config['STOCK_ALERT_LONG_POLL_TIMEOUT'] if timeout is None else max(0, min(timeout, config['STOCK_ALERT_LONG_POLL_TIMEOUT']))
+    try:
+        alerts.purge_events(config['STOCK_ALERT_EVENT_TTL'])
+        after = _alert_cursor()
+        events = alerts.wait_for_events(after, timeout, config['STOCK_ALERT_POLL_INTERVAL'], config['STOCK_ALERT_BATCH_SIZE'])
+        return jsonify({
+            "events": events,
+            "last_event_id": events[-1]["id"] if events else after
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Could not retrieve low stock alerts"}), 500
+
+
+# The same feed as Server-Sent Events; EventSource reconnects with Last-Event-ID when the stream ends
+@inventory_bp.route('/low_stock_alerts/stream', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'InventoryManager'])
+def low_stock_alert_stream():
+    config = current_app.config
+    alerts.purge_events(config['STOCK_ALERT_EVENT_TTL'])
+    body = alerts.stream_events(
+        _alert_cursor(),
+        current_app.json.dumps,
+        config['STOCK_ALERT_STREAM_SECONDS'],
+        config['STOCK_ALERT_POLL_INTERVAL'],
+        config['STOCK_ALERT_HEARTBEAT'],
+        config['STOCK_ALERT_BATCH_SIZE']
+    )
+    response = current_app.response_class(stream_with_context(body), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep proxies from buffering the stream
+    return response
+
+
 @inventory_bp.route('/inventory_report', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'InventoryManager'])
 def inventory_report():
+    date_from = get_datetime_arg('date_from')
+    date_to = get_datetime_arg('date_to')
     try:
-        report_data = db.session.query(Product.name, func.sum(OrderItem.quantity).label('total_sold'))\
-            .join(OrderItem, OrderItem.product_id == Product.id)\
-            .group_by(Product.name)\
-            .order_by(desc('total_sold')).all()
+        # Read from the per-product, per-day sales rollup instead of scanning every order item
+        report_data = sales_rollup.report(
+            date_from.date() if date_from else None,
+            date_to.date() if date_to else None
+        )
 
-        report = [{"product_name": item[0], "total_sold": int(item[1])} for item in report_data]
+        report = [{
+            "product_id": row.product_id,
+            "product_name": row.name,
+            "total_sold": int(row.units_sold) - int(row.units_returned),  # Net of approved returns
+            "units_sold": int(row.units_sold),
+            "revenue": str(row.revenue),
+            "units_returned": int(row.units_returned),
+            "returned_revenue": str(row.returned_revenue)
+        } for row in report_data]
         
         return jsonify({"inventory_report": report}), 200
 
     except Exception as e:
         return jsonify({"error": "Could not generate inventory report"}), 500
-
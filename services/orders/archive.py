@@ -0,0 +1,110 @@
+#authentic_lebanese_sentiment_shop/services/orders/archive.py
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, insert, delete, literal
+from app import db
+from .models import Order, OrderItem, Return, ArchivedOrder, ArchivedOrderItem, ArchivedReturn
+
+ARCHIVABLE_STATUSES = ('Delivered', 'Canceled')
+
+# (hot model, archive model) pairs, children first for deletes
+_TABLES = ((Return, ArchivedReturn), (OrderItem, ArchivedOrderItem), (Order, ArchivedOrder))
+
+
+def _copy(hot, cold, where, now):
+    """INSERT INTO <archive> SELECT ... FROM <hot> WHERE ..., matching columns by name."""
+    columns = [column.name for column in cold.__table__.columns if column.name != 'archived_at']
+    values = [hot.__table__.c[name] for name in columns]
+    if 'archived_at' in cold.__table__.c:
+        columns.append('archived_at')
+        values.append(literal(now, type_=cold.__table__.c.archived_at.type))
+    db.session.execute(insert(cold.__table__).from_select(columns, select(*values).where(where)))
+
+
+def _archivable_ids(cutoff, batch_size):
+    # Orders with a return still pending stay hot until it is resolved
+    open_returns = (
+        select(OrderItem.order_id)
+        .join(Return, Return.order_item_id == OrderItem.id)
+        .where(Return.status == 'Pending')
+    )
+    return list(db.session.execute(
+        select(Order.id)
+        .where(
+            Order.status.in_(ARCHIVABLE_STATUSES),
+            Order.order_date < cutoff,
+            Order.id.not_in(open_returns)
+        )
+        .order_by(Order.id)
+        .limit(batch_size)
+        .with_for_update()
+    ).scalars())
+
+
+def archive_batch(cutoff, batch_size):
+    """Move one batch of old finished orders, with their items and returns, to the archive tables.
+
+    Copy and delete happen in one transaction, so an order is always in exactly one place.
+    Returns the number of orders moved.
+    """
+    order_ids = _archivable_ids(cutoff, batch_size)
+    if not order_ids:
+        db.session.rollback()
+        return 0
+    now = datetime.utcnow()
+    item_ids = select(OrderItem.id).where(OrderItem.order_id.in_(order_ids)).scalar_subquery()
+    conditions = {
+        Return: Return.order_item_id.in_(item_ids),
+        OrderItem: OrderItem.order_id.in_(order_ids),
+        Order: Order.id.in_(order_ids),
+    }
+    for hot, cold in _TABLES:
+        _copy(hot, cold, conditions[hot], now)
+    for hot, _ in _TABLES:
+        db.session.execute(delete(hot).where(conditions[hot]).execution_options(synchronize_session=False))
+    db.session.commit()
+    return len(order_ids)
+
+
+def archive_orders(older_than_days, batch_size, pause, max_orders=None):
+    """Archive finished orders older than `older_than_days` in batches, sleeping `pause` seconds between them.
+
+    Short transactions with pauses keep row locks brief and leave room for live traffic.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+    while max_orders is None or moved < max_orders:
+        size = batch_size if max_orders is None else min(batch_size, max_orders - moved)
+        count = archive_batch(cutoff, size)
+        moved += count
+        if count < size:
+            break
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def find_order(order_id):
+    """Look an order up in the archive (for read paths that miss the hot table)."""
+    return db.session.get(ArchivedOrder, order_id)
+
+
+@click.command('archive-orders')
+@click.option('--days', type=int, default=None, help='Archive orders older than this many days (default: ORDER_ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=None, help='Orders moved per transaction (default: ORDER_ARCHIVE_BATCH_SIZE).')
+@click.option('--pause', type=float, default=None, help='Seconds to sleep between batches (default: ORDER_ARCHIVE_PAUSE).')
+@click.option('--limit', type=int, default=None, help='Stop after this many orders.')
+@with_appcontext
+def archive_orders_command(days, batch_size, pause, limit):
+    """Move old Delivered/Canceled orders to the archive tables."""
+    config = current_app.config
+    moved = archive_orders(
+        config['ORDER_ARCHIVE_AFTER_DAYS'] if days is None else days,
+        config['ORDER_ARCHIVE_BATCH_SIZE'] if batch_size is None else batch_size,
+        config['ORDER_ARCHIVE_PAUSE'] if pause is None else pause,
+        limit
+    )
+    click.echo(f"Archived {moved} orders.")
@@ -0,0 +1,93 @@
+#authentic_lebanese_sentiment_shop/services/orders/bulk_status.py
+from collections import defaultdict
+from sqlalchemy import select, update, func
+from app import db
+from .models import Order, OrderItem
+from .stock import release_stock
+from . import sales_rollup
+from ..pagination import parse_datetime
+from ..chunking import id_chunks
+
+# Target status -> statuses an order may move to it from
+ALLOWED_TRANSITIONS = {
+    'Processing': ('Pending',),
+    'Shipped': ('Pending', 'Processing'),
+    'Delivered': ('Shipped',),
+    'Canceled': ('Pending', 'Processing'),
+}
+FILTER_FIELDS = ('status', 'delivery_option', 'user_id', 'date_from', 'date_to')
+
+
+def filter_conditions(filters, valid_statuses, valid_delivery_options):
+    """Translate a filter object (same fields as the GET /orders/ query parameters) to WHERE clauses."""
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError("filter must be a non-empty object")
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+    conditions = []
+    if 'status' in filters:
+        if filters['status'] not in valid_statuses:
+            raise ValueError("Invalid status value")
+        conditions.append(Order.status == filters['status'])
+    if 'delivery_option' in filters:
+        if filters['delivery_option'] not in valid_delivery_options:
+            raise ValueError("Invalid delivery option value")
+        conditions.append(Order.delivery_option == filters['delivery_option'])
+    if 'user_id' in filters:
+        if not isinstance(filters['user_id'], int) or isinstance(filters['user_id'], bool):
+            raise ValueError("user_id must be an integer")
+        conditions.append(Order.user_id == filters['user_id'])
+    if 'date_from' in filters:
+        conditions.append(Order.order_date >= parse_datetime(filters['date_from'], 'date_from'))
+    if 'date_to' in filters:
+        conditions.append(Order.order_date < parse_datetime(filters['date_to'], 'date_to'))
+    return conditions
+
+
+def eligible_order_ids(target, order_ids=None, conditions=None):
+    """Ids of the selected orders whose current status allows moving to `target`.
+
+    The rows are locked (SELECT ... FOR UPDATE) so a concurrent transition cannot
+    move, and restock, the same order twice.
+    """
+    sources = ALLOWED_TRANSITIONS[target]
+    base = select(Order.id).where(Order.status.in_(sources)).with_for_update()
+    if order_ids is None:
+        return list(db.session.execute(base.where(*conditions).order_by(Order.id)).scalars())
+    eligible = []
+    for chunk in id_chunks(order_ids):
+        eligible.extend(db.session.execute(base.where(Order.id.in_(chunk)).order_by(Order.id)).scalars())
+    return eligible
+
+
+def transition_orders(order_ids, target):
+    """Move the (already eligible) orders to `target`: one UPDATE per chunk of ids.
+
+    Cancellations put stock back with per-product totals over all canceled orders,
+    applied by release_stock with one UPDATE per table and recorded in the ledger
+    per order, and come off the sales rollup. Items with an approved return were
+    already restocked and are left out.
+    """
+    restock = defaultdict(int)
+    items = []
+    if target == 'Canceled':
+        sales_rollup.record_canceled_orders(order_ids)
+    for chunk in id_chunks(order_ids):
+        if target == 'Canceled':
+            rows = db.session.execute(
+                select(OrderItem.order_id, OrderItem.product_id, func.sum(OrderItem.quantity))
+                .where(OrderItem.order_id.in_(chunk), ~sales_rollup.approved_return())
+                .group_by(OrderItem.order_id, OrderItem.product_id)
+            )
+            for order_id, product_id, quantity in rows:
+                restock[product_id] += int(quantity)
+                items.append((product_id, order_id, int(quantity)))
+        db.session.execute(
+            update(Order)
+            .where(Order.id.in_(chunk))
+            .values(status=target)
+            .execution_options(synchronize_session=False)
+        )
+    release_stock(restock, 'Cancel', items=items)
+    return dict(restock)
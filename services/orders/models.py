@@ -2,15 +2,20 @@
 from app import db
 from sqlalchemy.orm import validates
 from datetime import datetime
+from ..serialization import loaded
 
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_user_id_status_order_date', 'user_id', 'status', 'order_date'),  # A user's orders, optionally by status
+        db.Index('ix_orders_status_order_date', 'status', 'order_date'),  # Admin status filters, bulk transitions, archiving
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     total_price = db.Column(db.Numeric(10, 2), nullable=False)
-    order_date = db.Column(db.DateTime, default=db.func.now())
+    order_date = db.Column(db.DateTime, default=db.func.now(), index=True)
     status = db.Column(db.Enum('Pending', 'Processing', 'Shipped', 'Delivered', 'Canceled'), default='Pending')
     delivery_option = db.Column(db.Enum('Standard', 'Express', 'In-Store Pickup'))
     created_at = db.Column(db.DateTime, default=db.func.now())
@@ -20,18 +25,21 @@ class Order(db.Model):
     user = db.relationship('User', back_populates='orders')
     items = db.relationship('OrderItem', backref='order', cascade='all, delete-orphan')
 
+    _serialized = frozenset(('id', 'user_id', 'total_price', 'order_date', 'status', 'delivery_option', 'items', 'created_at', 'updated_at'))
+
     def to_dict(self):
         """Converts model data to a dictionary, excludes sensitive information if necessary."""
+        values = loaded(self, self._serialized)
         return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "total_price": str(self.total_price),
-            "order_date": self.order_date,
-            "status": self.status,
-            "delivery_option": self.delivery_option,
-            "items": [item.to_dict() for item in self.items],
-            "created_at": self.created_at,
-            "updated_at": self.updated_at
+            "id": values['id'],
+            "user_id": values['user_id'],
+            "total_price": str(values['total_price']),
+            "order_date": values['order_date'],
+            "status": values['status'],
+            "delivery_option": values['delivery_option'],
+            "items": [item.to_dict() for item in values['items']],
+            "created_at": values['created_at'],
+            "updated_at": values['updated_at']
         }
 
     @validates('status')
@@ -47,8 +55,8 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete="CASCADE"), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete="CASCADE"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
 
@@ -64,24 +72,31 @@ class OrderItem(db.Model):
             raise ValueError(f"{key.capitalize()} must be a positive number")
         return value
 
+    _serialized = frozenset(('id', 'order_id', 'product_id', 'quantity', 'price'))
+
     def to_dict(self):
         """Converts model data to a dictionary."""
+        values = loaded(self, self._serialized)
         return {
-            "id": self.id,
-            "order_id": self.order_id,
-            "product_id": self.product_id,
-            "quantity": self.quantity,
-            "price": str(self.price)
+            "id": values['id'],
+            "order_id": values['order_id'],
+            "product_id": values['product_id'],
+            "quantity": values['quantity'],
+            "price": str(values['price'])
         }
 
 class Return(db.Model):
     __tablename__ = 'returns'
+    __table_args__ = (
+        db.Index('ix_returns_status_id', 'status', 'id'),  # Returns queue: filter by status, page by id
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    order_item_id = db.Column(db.Integer, db.ForeignKey('order_items.id', ondelete="CASCADE"), nullable=False)
+    order_item_id = db.Column(db.Integer, db.ForeignKey('order_items.id', ondelete="CASCADE"), nullable=False, index=True)
     reason = db.Column(db.String(255), nullable=False)
     status = db.Column(db.Enum('Pending', 'Approved', 'Denied'), default='Pending', nullable=False)
-    created_at = db.Column(db.DateTime, default=db.func.now())
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True)
+    resolved_at = db.Column(db.DateTime)  # When the return was approved or denied
 
     def to_dict(self):
         return {
@@ -89,5 +104,84 @@ class Return(db.Model):
             "order_item_id": self.order_item_id,
             "reason": self.reason,
             "status": self.status,
-            "created_at": self.created_at
+            "created_at": self.created_at,
+            "resolved_at": self.resolved_at
+        }
+
+
+class ProductSalesDaily(db.Model):
+    """Sales per product and calendar day, kept up to date by the order routes (see sales_rollup)."""
+    __tablename__ = 'product_sales_daily'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete="CASCADE"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True, index=True)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    units_returned = db.Column(db.Integer, nullable=False, default=0)
+    returned_revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+
+# Cold storage for old Delivered/Canceled orders (see archive.py). Same columns as the hot
+# tables plus archived_at; no foreign keys, so products and users can still be deleted.
+class ArchivedOrder(db.Model):
+    __tablename__ = 'orders_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    total_price = db.Column(db.Numeric(10, 2), nullable=False)
+    order_date = db.Column(db.DateTime)
+    status = db.Column(db.String(20))
+    delivery_option = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    items = db.relationship(
+        'ArchivedOrderItem',
+        primaryjoin='ArchivedOrder.id == foreign(ArchivedOrderItem.order_id)',
+        viewonly=True
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "total_price": str(self.total_price),
+            "order_date": self.order_date,
+            "status": self.status,
+            "delivery_option": self.delivery_option,
+            "items": [item.to_dict() for item in self.items],
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "archived_at": self.archived_at
         }
+
+
+class ArchivedOrderItem(db.Model):
+    __tablename__ = 'order_items_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, nullable=False, index=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "order_id": self.order_id,
+            "product_id": self.product_id,
+            "quantity": self.quantity,
+            "price": str(self.price)
+        }
+
+
+class ArchivedReturn(db.Model):
+    __tablename__ = 'returns_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_item_id = db.Column(db.Integer, nullable=False, index=True)
+    reason = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime)
+    resolved_at = db.Column(db.DateTime)
@@ -0,0 +1,113 @@
+#authentic_lebanese_sentiment_shop/services/orders/returns.py
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import case, select, update
+from app import db
+from .models import Order, OrderItem, Return
+from ..products.models import Product
+from .stock import release_stock
+from . import sales_rollup
+from ..chunking import id_chunks
+
+RESOLUTIONS = ('Approved', 'Denied')
+
+
+def queue_query():
+    """Returns with their order item, order and product context, as one joined query.
+
+    Outer joins keep returns whose order item no longer exists (older returns removed the item).
+    """
+    return (
+        db.session.query(
+            Return.id, Return.order_item_id, Return.reason, Return.status, Return.created_at, Return.resolved_at,
+            OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price,
+            Order.user_id, Order.status.label('order_status'), Order.order_date,
+            Product.name.label('product_name')
+        )
+        .outerjoin(OrderItem, OrderItem.id == Return.order_item_id)
+        .outerjoin(Order, Order.id == OrderItem.order_id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+    )
+
+
+def queue_row_to_dict(row):
+    return {
+        "id": row.id,
+        "order_item_id": row.order_item_id,
+        "reason": row.reason,
+        "status": row.status,
+        "created_at": row.created_at,
+        "resolved_at": row.resolved_at,
+        "order_id": row.order_id,
+        "product_id": row.product_id,
+        "product_name": row.product_name,
+        "quantity": row.quantity,
+        "price": str(row.price) if row.price is not None else None,
+        "user_id": row.user_id,
+        "order_status": row.order_status,
+        "order_date": row.order_date
+    }
+
+
+def approved_item_ids(order_id):
+    """Ids of the order's items with an approved return."""
+    return set(db.session.execute(
+        select(OrderItem.id).where(OrderItem.order_id == order_id, sales_rollup.approved_return())
+    ).scalars())
+
+
+def resolve_returns(return_ids, status):
+    """Approve or deny pending returns with set-based statements; returns the ids resolved.
+
+    Pending rows are locked first so a return is only resolved (and restocked) once.
+    Approval puts each product's returned quantity back in one UPDATE, takes the
+    items off their orders' totals with one CASE UPDATE per chunk, and records
+    the returns in the sales rollup.
+    """
+    pending = []
+    for chunk in id_chunks(return_ids):
+        pending.extend(db.session.execute(
+            select(Return.id)
+            .where(Return.id.in_(chunk), Return.status == 'Pending')
+            .order_by(Return.id)
+            .with_for_update()
+        ).scalars())
+    if not pending:
+        return []
+
+    now = datetime.utcnow()
+    if status == 'Approved':
+        restock = defaultdict(int)
+        refunds = defaultdict(int)
+        returned = []
+        items = []
+        for chunk in id_chunks(pending):
+            rows = db.session.execute(
+                select(Return.id, OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+                .join(Return, Return.order_item_id == OrderItem.id)
+                .where(Return.id.in_(chunk))
+            )
+            for return_id, order_id, product_id, quantity, price in rows:
+                restock[product_id] += quantity
+                refunds[order_id] += price
+                returned.append((product_id, quantity, price))
+                items.append((product_id, return_id, quantity))
+        release_stock(restock, 'Return', items=items)
+        for chunk in id_chunks(refunds):
+            refund = case({order_id: refunds[order_id] for order_id in chunk}, value=Order.id)
+            db.session.execute(
+                update(Order)
+                .where(Order.id.in_(chunk))
+                .values(total_price=Order.total_price - refund)
+                .execution_options(synchronize_session=False)
+            )
+        sales_rollup.record_returns(returned, now.date())
+
+    for chunk in id_chunks(pending):
+        db.session.execute(
+            update(Return)
+            .where(Return.id.in_(chunk))
+            .values(status=status, resolved_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    return pending
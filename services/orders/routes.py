@@ -1,30 +1,127 @@
 #authentic_lebanese_sentiment_shop/services/orders/routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort, current_app
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import selectinload
 from werkzeug.exceptions import BadRequest
 from .models import Order, OrderItem, Return
 from app import db
-from ..user_management.models import ActivityLog
+from ..audit import log_activity, record_activity
 from .decorators import role_required, jwt_required
 from datetime import datetime
+from collections import defaultdict
 from ..products.models import Product
+from ..products import promotions
+from .stock import reserve_stock, release_stock
+from . import archive, bulk_status, returns, sales_rollup
+from ..http_cache import conditional_get
+from ..idempotency import idempotent
+from ..pagination import get_page_args, get_int_arg, get_datetime_arg, paginate, parse_datetime
 import logging
 
 logging.basicConfig(level=logging.ERROR)
 
 orders_bp = Blueprint('orders', __name__)
 
+VALID_ORDER_STATUSES = ['Pending', 'Processing', 'Shipped', 'Delivered', 'Canceled']
+VALID_DELIVERY_OPTIONS = ['Standard', 'Express', 'In-Store Pickup']
+VALID_RETURN_STATUSES = ['Pending', 'Approved', 'Denied']
+
 
 @orders_bp.route('/', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'OrderManager'])
+@conditional_get('orders', 'order_items')
 def get_orders():
-    orders = Order.query.all()
-    return jsonify([order.to_dict() for order in orders])
+    limit, cursor = get_page_args()
+
+    # Server-side filters
+    query = Order.query
+    status = request.args.get('status')
+    if status:
+        if status not in VALID_ORDER_STATUSES:
+            abort(400, "Invalid status value")
+        query = query.filter(Order.status == status)
+    delivery_option = request.args.get('delivery_option')
+    if delivery_option:
+        if delivery_option not in VALID_DELIVERY_OPTIONS:
+            abort(400, "Invalid delivery option value")
+        query = query.filter(Order.delivery_option == delivery_option)
+    user_id = get_int_arg('user_id')
+    if user_id is not None:
+        query = query.filter(Order.user_id == user_id)
+    date_from = get_datetime_arg('date_from')
+    if date_from is not None:
+        query = query.filter(Order.order_date >= date_from)
+    date_to = get_datetime_arg('date_to')
+    if date_to is not None:
+        query = query.filter(Order.order_date < date_to)
+
+    # The total is only counted for the first page; clients keep it while paging
+    total = query.order_by(None).count() if cursor is None else None
+
+    # Keyset on (sort column, id) in the requested direction
+    sort = request.args.get('sort', 'id')
+    if sort not in ('id', 'order_date'):
+        abort(400, "sort must be id or order_date")
+    order = request.args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        abort(400, "order must be asc or desc")
+    descending = order == 'desc'
+    if cursor is not None:
+        query = query.filter(_after_cursor(sort, descending, cursor))
+    if sort == 'order_date':
+        query = query.order_by(_order_date_key(descending))
+    query = query.order_by(Order.id.desc() if descending else Order.id.asc())
+
+    # Items for the whole page are loaded with one extra IN query instead of one per order
+    query = query.options(selectinload(Order.items))
+    orders, next_cursor = paginate(query, limit, lambda order: {
+        "id": order.id,
+        "order_date": order.order_date.isoformat() if order.order_date else None
+    })
+    return jsonify({
+        "orders": [order.to_dict() for order in orders],
+        "next_cursor": next_cursor,
+        "total": total
+    })
+
+
+def _order_date_key(descending):
+    """Orders without a date sort as the oldest: MySQL and SQLite already order NULLs that way."""
+    key = Order.order_date.desc() if descending else Order.order_date.asc()
+    if db.engine.dialect.name == 'postgresql':
+        key = key.nulls_last() if descending else key.nulls_first()
+    return key
+
+
+def _after_cursor(sort, descending, cursor):
+    """Row-value comparison that resumes a keyset page after the cursor row."""
+    last_id = cursor.get('id')
+    if not isinstance(last_id, int):
+        abort(400, "Invalid cursor")
+    if sort == 'id':
+        return Order.id < last_id if descending else Order.id > last_id
+    if 'order_date' not in cursor:
+        abort(400, "Invalid cursor")
+    if cursor['order_date'] is None:
+        # The cursor row is undated: the undated rows are the last ones newest first, the first ones oldest first
+        if descending:
+            return and_(Order.order_date.is_(None), Order.id < last_id)
+        return or_(and_(Order.order_date.is_(None), Order.id > last_id), Order.order_date.isnot(None))
+    try:
+        last_date = parse_datetime(cursor['order_date'], 'cursor')
+    except ValueError:
+        abort(400, "Invalid cursor")
+    if descending:
+        return or_(Order.order_date < last_date, and_(Order.order_date == last_date, Order.id < last_id),
+                   Order.order_date.is_(None))
+    return or_(Order.order_date > last_date, and_(Order.order_date == last_date, Order.id > last_id))
 
 
 @orders_bp.route('/', methods=['POST'])
 @jwt_required
 @role_required(['SuperAdmin', 'OrderManager'])
+@idempotent
 def create_order():
     # Ensure JSON data is present in the request
     if not request.is_json:
@@ -37,10 +134,25 @@ def create_order():
         user_id = data.get('user_id')
         status = data.get('status', 'Pending')
         delivery_option = data.get('delivery_option', 'Standard')
-        order_date = data.get('order_date', datetime.utcnow())
+        order_date = parse_datetime(data['order_date'], 'order_date') if data.get('order_date') else datetime.utcnow()
         items = data.get('items', [])
 
-        # Create a new Order instance with initial total_price as 0
+        # Merge repeated products so each one is reserved once
+        quantities = {}
+        for item in items:
+            product_id = item.get('product_id')
+            quantity = item.get('quantity')
+            if not isinstance(product_id, int) or not isinstance(quantity, int) or quantity <= 0:
+                raise ValueError("Each item needs an integer product_id and a positive integer quantity")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        # Current prices, promotions included, with one lookup for all line items
+        prices = promotions.current_prices(list(quantities))
+        missing = [product_id for product_id in quantities if product_id not in prices]
+        if missing:
+            raise ValueError(f"Not enough stock for product ID {', '.join(str(product_id) for product_id in missing)}")
+
+        # Create a new Order instance with its order items
         new_order = Order(
             user_id=user_id,
             total_price=0,  
@@ -50,44 +162,31 @@ def create_order():
         )
 
         total_price = 0 
-
-        # Add order items to the order
-        for item in items:
-            product_id = item['product_id']
-            quantity = item['quantity']
-            
-          
-            product = Product.query.get(product_id)
-            if not product or product.stock < quantity:
-                raise ValueError(f"Not enough stock for product ID {product_id}")
-            
+        for product_id, quantity in quantities.items():
             # price for the order item
-            item_price = product.price * quantity
-            
-            # Decrease product stock
-            product.stock -= quantity
-
-            # Create and add order item to the order
-            order_item = OrderItem(
+            item_price = prices[product_id] * quantity
+            new_order.items.append(OrderItem(
                 product_id=product_id,
                 quantity=quantity,
                 price=item_price  
-            )
-            new_order.items.append(order_item)
-            
-            
+            ))
             total_price += item_price
 
         # total_price for the order
         new_order.total_price = total_price
 
-        
         db.session.add(new_order)
-        db.session.commit()
+        db.session.flush()
+
+        # Conditional decrement in SQL: no read-check-write race, so concurrent checkouts cannot oversell.
+        # Reserved after the flush so the ledger entries carry the order id.
+        reserve_stock(quantities, new_order.id)
+
+        if new_order.status != 'Canceled':
+            sales_rollup.record_order(new_order)
 
-        # Log the creation of a new order
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Order created by user {request.user_id}: {new_order.to_dict()}")
-        db.session.add(activity_log)
+        # Log the creation of a new order in the same transaction
+        record_activity(request.user_id, f"Order created by user {request.user_id}: {new_order.to_dict()}")
         db.session.commit()
 
         return jsonify(new_order.to_dict()), 201
@@ -116,9 +215,11 @@ def update_order_info(order_id):
             raise BadRequest("Invalid status value")
         
         if new_status == 'Canceled' and order.status != 'Canceled':
-            for item in order.items:
-                product = item.product
-                product.stock += item.quantity  # Restore stock for each item
+            returned = returns.approved_item_ids(order.id)
+            restore_stock(order, returned)
+            sales_rollup.record_order(order, sign=-1, returned=returned)
+        elif new_status and new_status != 'Canceled' and order.status == 'Canceled':
+            sales_rollup.record_order(order, returned=returns.approved_item_ids(order.id))
 
         if new_status:
             order.status = new_status
@@ -136,12 +237,7 @@ def update_order_info(order_id):
 
         # Log the update for audit purposes
         updated_fields = {k: v for k, v in data.items() if v is not None}
-        activity_log = ActivityLog(
-            admin_id=request.user_id,
-            action=f"Order {order_id} updated by user {request.user_id}: {updated_fields}"
-        )
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Order {order_id} updated by user {request.user_id}: {updated_fields}")
 
         return jsonify({
             "message": "Order information updated successfully",
@@ -153,12 +249,66 @@ def update_order_info(order_id):
         return jsonify({"error": "Failed to update order info"}), 400
 
 
-# Restore stock function
-def restore_stock(order):
+# Move many orders to one status; invalid transitions are skipped, cancellations restock in bulk
+@orders_bp.route('/bulk_status', methods=['PUT'])
+@jwt_required
+@role_required(['SuperAdmin', 'OrderManager'])
+def bulk_update_order_status():
+    if not request.is_json:
+        abort(400, "Request must be JSON")
+    data = request.json
+    target = data.get('status')
+    if target not in bulk_status.ALLOWED_TRANSITIONS:
+        return jsonify({"error": f"status must be one of {', '.join(bulk_status.ALLOWED_TRANSITIONS)}"}), 400
+    max_orders = current_app.config['BULK_STATUS_MAX_ORDERS']
+
+    try:
+        if 'order_ids' in data:
+            order_ids = data['order_ids']
+            if not isinstance(order_ids, list) or not order_ids or not all(isinstance(order_id, int) and not isinstance(order_id, bool) for order_id in order_ids):
+                return jsonify({"error": "order_ids must be a non-empty list of integers"}), 400
+            if len(order_ids) > max_orders:
+                return jsonify({"error": f"At most {max_orders} orders can be updated per request"}), 400
+            eligible = bulk_status.eligible_order_ids(target, order_ids=order_ids)
+            # Unknown ids and orders whose current status does not allow the move
+            skipped = sorted(set(order_ids) - set(eligible))
+        elif 'filter' in data:
+            conditions = bulk_status.filter_conditions(data['filter'], VALID_ORDER_STATUSES, VALID_DELIVERY_OPTIONS)
+            eligible = bulk_status.eligible_order_ids(target, conditions=conditions)
+            if len(eligible) > max_orders:
+                db.session.rollback()
+                return jsonify({"error": f"Filter matches {len(eligible)} orders; at most {max_orders} can be updated per request"}), 400
+            skipped = []
+        else:
+            return jsonify({"error": "Provide either order_ids or filter"}), 400
+
+        restocked = bulk_status.transition_orders(eligible, target)
+
+        # One summarized audit record, committed with the changes
+        record_activity(request.user_id, f"Bulk status change by user {request.user_id}: {len(eligible)} orders to {target}, {len(restocked)} products restocked")
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Bulk order status update failed: {str(e)}")
+        return jsonify({"error": "Failed to process request"}), 500
+
+    return jsonify({
+        "message": f"Orders moved to {target}",
+        "updated": len(eligible),
+        "skipped": skipped
+    }), 200
+
+
+# Restore stock function; items with an approved return (ids in `returned`) were restocked by the approval
+def restore_stock(order, returned=()):
+    quantities = defaultdict(int)
     for item in order.items:
-        product = item.product
-        if product:
-            product.stock += item.quantity
+        if item.id not in returned:
+            quantities[item.product_id] += item.quantity
+    release_stock(quantities, 'Cancel', order.id)
 
 @orders_bp.route('/<int:order_id>', methods=['DELETE'])
 @jwt_required
@@ -166,13 +316,15 @@ def restore_stock(order):
 def delete_order(order_id):
     order = Order.query.get_or_404(order_id)
     try:
-        restore_stock(order)
+        # A canceled order's stock was already put back when it was canceled
+        if order.status != 'Canceled':
+            returned = returns.approved_item_ids(order.id)
+            restore_stock(order, returned)
+            sales_rollup.record_order(order, sign=-1, returned=returned)
         db.session.delete(order)
         db.session.commit()
 
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Order {order_id} deleted by user {request.user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Order {order_id} deleted by user {request.user_id}")
 
         return jsonify({"message": "Order deleted"}), 200
     except Exception as e:
@@ -186,7 +338,10 @@ def delete_order(order_id):
 @role_required(['SuperAdmin', 'OrderManager'])
 def track_order(order_id):
     try:
-        order = Order.query.get_or_404(order_id)
+        # Old finished orders live in the archive tables
+        order = db.session.get(Order, order_id) or archive.find_order(order_id)
+        if order is None:
+            abort(404)
 
         return jsonify({
             "message": "Order tracked successfully",
@@ -202,6 +357,7 @@ def track_order(order_id):
 @orders_bp.route('/<int:order_id>/return_item', methods=['POST'])
 @jwt_required
 @role_required(['SuperAdmin', 'OrderManager'])
+@idempotent
 def return_item(order_id):
     data = request.get_json()
     
@@ -228,17 +384,15 @@ def return_item(order_id):
         if not order_item:
             return jsonify({"error": "Order item not found or does not belong to the specified order"}), 404
 
-        # Restore stock for the returned item
-        product = order_item.product
-        if not product:
-            return jsonify({"error": "Associated product not found"}), 404
-        product.stock += order_item.quantity
+        # One open or approved return per item
+        already_returned = Return.query.filter(
+            Return.order_item_id == order_item.id, Return.status.in_(['Pending', 'Approved'])
+        ).first()
+        if already_returned:
+            return jsonify({"error": "A return already exists for this order item"}), 400
 
-        # Update the order's total price
-        order.total_price -= order_item.price
-        
-        # Delete the returned item from the order
-        db.session.delete(order_item)
+        # The item stays on the order so the return keeps its context; stock, the order
+        # total and the sales rollup are adjusted when the return is approved
         
         # Create the return entry
         new_return = Return(
@@ -271,18 +425,86 @@ def return_item(order_id):
 @orders_bp.route('/returns', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'OrderManager'])
+@conditional_get('returns', 'order_items', 'orders', 'products')
 def get_all_returns():
+    limit, cursor = get_page_args()
+
+    # Server-side filters
+    query = returns.queue_query()
+    status = request.args.get('status')
+    if status:
+        if status not in VALID_RETURN_STATUSES:
+            abort(400, "Invalid status value")
+        query = query.filter(Return.status == status)
+    order_id = get_int_arg('order_id')
+    if order_id is not None:
+        query = query.filter(OrderItem.order_id == order_id)
+    product_id = get_int_arg('product_id')
+    if product_id is not None:
+        query = query.filter(OrderItem.product_id == product_id)
+    date_from = get_datetime_arg('date_from')
+    if date_from is not None:
+        query = query.filter(Return.created_at >= date_from)
+    date_to = get_datetime_arg('date_to')
+    if date_to is not None:
+        query = query.filter(Return.created_at < date_to)
+
+    # Keyset on id, oldest first, so the queue is worked through in arrival order
+    if cursor is not None:
+        last_id = cursor.get('id')
+        if not isinstance(last_id, int):
+            abort(400, "Invalid cursor")
+        query = query.filter(Return.id > last_id)
+    query = query.order_by(Return.id)
+
     try:
-        returns = Return.query.all()
-        return_items = [
-            return_item.to_dict() for return_item in returns
-        ]
-        return jsonify({"returns": return_items}), 200
+        rows, next_cursor = paginate(query, limit, lambda row: {"id": row.id})
+        return jsonify({
+            "returns": [returns.queue_row_to_dict(row) for row in rows],
+            "next_cursor": next_cursor
+        }), 200
 
     except Exception as e:
         return jsonify({"error": "Failed to fetch returns"}), 400
 
 
+# Approve or deny many pending returns at once; approvals restock in bulk
+@orders_bp.route('/returns/batch', methods=['PUT'])
+@jwt_required
+@role_required(['SuperAdmin', 'OrderManager'])
+def resolve_returns_batch():
+    if not request.is_json:
+        abort(400, "Request must be JSON")
+    data = request.json
+    status = data.get('status')
+    if status not in returns.RESOLUTIONS:
+        return jsonify({"error": "status must be Approved or Denied"}), 400
+    return_ids = data.get('return_ids')
+    if not isinstance(return_ids, list) or not return_ids or not all(isinstance(return_id, int) and not isinstance(return_id, bool) for return_id in return_ids):
+        return jsonify({"error": "return_ids must be a non-empty list of integers"}), 400
+    max_returns = current_app.config['BULK_STATUS_MAX_ORDERS']
+    if len(return_ids) > max_returns:
+        return jsonify({"error": f"At most {max_returns} returns can be updated per request"}), 400
+
+    try:
+        resolved = returns.resolve_returns(return_ids, status)
+
+        # One summarized audit record, committed with the changes
+        record_activity(request.user_id, f"Batch return update by user {request.user_id}: {len(resolved)} returns {status}")
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Batch return update failed: {str(e)}")
+        return jsonify({"error": "Failed to process request"}), 500
+
+    return jsonify({
+        "message": f"Returns {status.lower()}",
+        "updated": len(resolved),
+        # Unknown ids and returns that were no longer pending
+        "skipped": sorted(set(return_ids) - set(resolved))
+    }), 200
+
+
 @orders_bp.route('/returns/<int:return_id>', methods=['PUT'])
 @jwt_required
 @role_required(['SuperAdmin', 'OrderManager'])
@@ -290,27 +512,23 @@ def update_return(return_id):
     data = request.get_json()
     new_status = data.get('status')
     
-    # Ensure a valid status is provided
-    valid_statuses = ['Pending', 'Approved', 'Rejected', 'Completed']
-    if new_status not in valid_statuses:
-        return jsonify({"error": "Invalid status value"}), 400
+    # A return only moves once, from Pending to Approved or Denied; its restock and refund are not undone
+    if new_status not in returns.RESOLUTIONS:
+        return jsonify({"error": "status must be Approved or Denied"}), 400
 
     try:
         return_item = Return.query.get_or_404(return_id)
 
-        if new_status:
-            return_item.status = new_status
+        # Same path as the batch endpoint, so approval restocks exactly once
+        if not returns.resolve_returns([return_id], new_status):
+            db.session.rollback()
+            return jsonify({"error": "Only pending returns can be approved or denied"}), 400
+        db.session.refresh(return_item)
 
-        
         db.session.commit()
 
         
-        activity_log = ActivityLog(
-            admin_id=request.user_id,
-            action=f"Return {return_id} updated by user {request.user_id}: Status changed to {new_status}"
-        )
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Return {return_id} updated by user {request.user_id}: Status changed to {new_status}")
 
         return jsonify(return_item.to_dict()), 200
 
@@ -0,0 +1,191 @@
+#authentic_lebanese_sentiment_shop/services/orders/sales_rollup.py
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, func, or_, exists
+from app import db
+from .models import Order, OrderItem, Return, ProductSalesDaily, ArchivedOrder, ArchivedOrderItem, ArchivedReturn
+from ..products.models import Product
+from ..pagination import parse_datetime
+from ..chunking import id_chunks
+
+DELTA_COLUMNS = ('units_sold', 'revenue', 'units_returned', 'returned_revenue')
+_table = ProductSalesDaily.__table__
+
+
+def _day(value):
+    """Calendar day of an order date, which may still be an ISO string or unset before the flush."""
+    if value is None:
+        return datetime.utcnow().date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return parse_datetime(value, 'order_date').date()
+
+
+def approved_return(item_model=OrderItem, return_model=Return):
+    """Criterion for order items with an approved return.
+
+    Their stock is already back and they are counted as returned, so canceling their order leaves them out.
+    """
+    return exists().where(return_model.order_item_id == item_model.id, return_model.status == 'Approved')
+
+
+def _upsert_statement():
+    """INSERT that adds to the counters of an existing (product, day) row instead of failing."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(_table)
+        return statement.on_duplicate_key_update({column: _table.c[column] + statement.inserted[column] for column in DELTA_COLUMNS})
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    statement = insert(_table)
+    return statement.on_conflict_do_update(
+        index_elements=['product_id', 'day'],
+        set_={column: _table.c[column] + statement.excluded[column] for column in DELTA_COLUMNS}
+    )
+
+
+def apply_deltas(deltas):
+    """Add {(product_id, day): {column: delta}} to the rollup in the caller's transaction."""
+    rows = [
+        {'product_id': product_id, 'day': day, **{column: changes.get(column, 0) for column in DELTA_COLUMNS}}
+        for (product_id, day), changes in sorted(deltas.items())
+        if any(changes.values())
+    ]
+    if rows:
+        db.session.execute(_upsert_statement(), rows)
+
+
+def _item_deltas(order_day, items, sign):
+    deltas = defaultdict(lambda: defaultdict(int))
+    for product_id, quantity, price in items:
+        changes = deltas[(product_id, order_day)]
+        changes['units_sold'] += sign * quantity
+        changes['revenue'] += sign * Decimal(price)
+    return deltas
+
+
+def record_order(order, sign=1, returned=()):
+    """Count an order's items as sold on its order day (sign=-1 takes them back out).
+
+    Items whose ids are in `returned` are skipped: their sale stays counted next to their return.
+    """
+    items = [(item.product_id, item.quantity, item.price) for item in order.items if item.id not in returned]
+    apply_deltas(_item_deltas(_day(order.order_date), items, sign))
+
+
+def record_canceled_orders(order_ids):
+    """Take canceled orders' items out of their order days, aggregated per product and day.
+
+    Items with an approved return stay counted, like in record_order.
+    """
+    order_day = func.date(Order.order_date)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for chunk in id_chunks(order_ids):
+        rows = db.session.execute(
+            select(OrderItem.product_id, order_day, func.sum(OrderItem.quantity), func.sum(OrderItem.price))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(OrderItem.order_id.in_(chunk), ~approved_return())
+            .group_by(OrderItem.product_id, order_day)
+        )
+        for product_id, day, quantity, price in rows:
+            changes = deltas[(product_id, _day(day))]
+            changes['units_sold'] -= int(quantity)
+            changes['revenue'] -= Decimal(price)
+    apply_deltas(deltas)
+
+
+def record_returns(items, day):
+    """Count approved returns of (product_id, quantity, price) items on `day`."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for product_id, quantity, price in items:
+        changes = deltas[(product_id, day)]
+        changes['units_returned'] += quantity
+        changes['returned_revenue'] += Decimal(price)
+    apply_deltas(deltas)
+
+
+def report(date_from=None, date_to=None):
+    """Per-product totals over days in [date_from, date_to), read from the rollup only, best sellers first."""
+    units_sold = func.sum(ProductSalesDaily.units_sold).label('units_sold')
+    units_returned = func.sum(ProductSalesDaily.units_returned).label('units_returned')
+    query = (
+        select(
+            ProductSalesDaily.product_id,
+            Product.name,
+            units_sold,
+            func.sum(ProductSalesDaily.revenue).label('revenue'),
+            units_returned,
+            func.sum(ProductSalesDaily.returned_revenue).label('returned_revenue')
+        )
+        .join(Product, Product.id == ProductSalesDaily.product_id)
+        .group_by(ProductSalesDaily.product_id, Product.name)
+        .having(or_(units_sold != 0, units_returned != 0))
+        .order_by(units_sold.desc(), ProductSalesDaily.product_id)
+    )
+    if date_from is not None:
+        query = query.where(ProductSalesDaily.day >= date_from)
+    if date_to is not None:
+        query = query.where(ProductSalesDaily.day < date_to)
+    return db.session.execute(query).all()
+
+
+def _history(order_model, item_model, return_model):
+    """(sales, returns) per product and day from one set of order tables, hot or archived."""
+    order_day = func.date(order_model.order_date)
+    sales = db.session.execute(
+        select(item_model.product_id, order_day, func.sum(item_model.quantity), func.sum(item_model.price))
+        .join(order_model, order_model.id == item_model.order_id)
+        .join(Product, Product.id == item_model.product_id)  # Archived items may outlive their product
+        .where(or_(order_model.status != 'Canceled', approved_return(item_model, return_model)))
+        .group_by(item_model.product_id, order_day)
+    ).all()
+    return_day = func.date(return_model.resolved_at)
+    returns = db.session.execute(
+        select(item_model.product_id, return_day, func.sum(item_model.quantity), func.sum(item_model.price))
+        .join(return_model, return_model.order_item_id == item_model.id)
+        .join(Product, Product.id == item_model.product_id)
+        .where(return_model.status == 'Approved', return_model.resolved_at.isnot(None))
+        .group_by(item_model.product_id, return_day)
+    ).all()
+    return sales, returns
+
+
+def rebuild():
+    """Recompute the rollup from the order history, archived orders included.
+
+    Sales are counted on the order day for orders that are not canceled, and for
+    items of canceled orders that were returned first; returns on the day they were
+    approved. Returns filed before items were kept on their order
+    have no item to count and are left out.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for tables in ((Order, OrderItem, Return), (ArchivedOrder, ArchivedOrderItem, ArchivedReturn)):
+        sales, returns = _history(*tables)
+        for product_id, day, quantity, price in sales:
+            changes = deltas[(product_id, _day(day))]
+            changes['units_sold'] += int(quantity)
+            changes['revenue'] += Decimal(price)
+        for product_id, day, quantity, price in returns:
+            changes = deltas[(product_id, _day(day))]
+            changes['units_returned'] += int(quantity)
+            changes['returned_revenue'] += Decimal(price)
+    db.session.execute(_table.delete())
+    apply_deltas(deltas)
+    db.session.commit()
+    return len(deltas)
+
+
+@click.command('rebuild-sales-rollups')
+@with_appcontext
+def rebuild_sales_rollups_command():
+    """Backfill the product_sales_daily rollup from existing orders."""
+    count = rebuild()
+    click.echo(f"Rebuilt sales rollups: {count} product/day rows.")
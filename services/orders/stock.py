@@ -0,0 +1,54 @@
+#authentic_lebanese_sentiment_shop/services/orders/stock.py
+from sqlalchemy import case, select, update
+from app import db
+from ..products.models import Product
+from ..inventory import levels
+
+
+def reserve_stock(quantities, order_id=None):
+    """Atomically take {product_id: quantity} out of stock, all or nothing.
+
+    A single conditional UPDATE decrements every product whose stock covers the
+    requested quantity. InnoDB locks the rows in primary-key order, so concurrent
+    checkouts cannot deadlock on each other. If fewer rows matched than requested,
+    some product was short and ValueError is raised; the caller rolls back.
+    With the product rows held, the same quantities are drawn from the products'
+    locations and recorded in the ledger against `order_id`.
+    Returns {(product_id, location): quantity}.
+    """
+    if not quantities:
+        return {}
+    product_ids = sorted(quantities)
+    requested = case(quantities, value=Product.id)
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids), Product.stock >= requested)
+        .values(stock=Product.stock - requested)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(product_ids):
+        rows = db.session.execute(select(Product.id, Product.stock).where(Product.id.in_(product_ids))).all()
+        available = dict(rows)
+        short = [product_id for product_id in product_ids if available.get(product_id, 0) < quantities[product_id]]
+        raise ValueError(f"Not enough stock for product ID {', '.join(str(product_id) for product_id in short)}")
+    return levels.draw_from_locations(quantities, 'Order', order_id)
+
+
+def release_stock(quantities, reason, reference_id=None, items=None):
+    """Put {product_id: quantity} back into stock, at each product's primary location.
+
+    `reason` ('Cancel' or 'Return') and `reference_id` go to the ledger; pass `items`
+    as (product_id, reference_id, quantity) to record one entry per order or return.
+    Returns {(product_id, location): quantity}.
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return {}
+    product_ids = sorted(quantities)
+    db.session.execute(
+        update(Product)
+        .where(Product.id.in_(product_ids))
+        .values(stock=Product.stock + case(quantities, value=Product.id))
+        .execution_options(synchronize_session=False)
+    )
+    return levels.return_to_locations(quantities, reason, reference_id, items)
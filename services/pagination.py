@@ -0,0 +1,105 @@
+#authentic_lebanese_sentiment_shop/services/pagination.py
+import base64
+import json
+from datetime import datetime, timezone
+from flask import request, abort
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    """Encode the keyset values of the last row on a page into an opaque token."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor, aborting with 400 if it was tampered with."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        abort(400, "Invalid cursor")
+    if not isinstance(values, dict):
+        abort(400, "Invalid cursor")
+    return values
+
+
+def get_page_args():
+    """Read the `limit` and `cursor` query parameters shared by the keyset-paginated listings."""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        abort(400, "limit must be an integer")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    cursor = request.args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def get_int_arg(name):
+    """Return an optional integer query parameter, aborting with 400 on bad input."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, f"{name} must be an integer")
+
+
+def get_bool_arg(name):
+    """Return an optional boolean query parameter ('true'/'false', '1'/'0')."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    abort(400, f"{name} must be true or false")
+
+
+def parse_datetime(value, name):
+    """Parse an ISO 8601 date/time (a trailing Z included) into the naive UTC datetimes stored in the database.
+
+    Raises ValueError naming `name` when the value is not a date/time.
+    """
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date/time")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def get_datetime_arg(name):
+    """Return an optional ISO 8601 query parameter as a naive UTC datetime."""
+    value = request.args.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return parse_datetime(value, name)
+    except ValueError as e:
+        abort(400, str(e))
+
+
+def escape_like(value):
+    """Escape LIKE wildcards so user input is matched literally (use with escape='\\')."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def paginate(query, limit, key):
+    """Fetch one page plus a look-ahead row and build the next-cursor token.
+
+    `key` maps the last row of the page to the dict stored in the cursor.
+    """
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return rows, next_cursor
@@ -0,0 +1,225 @@
+#authentic_lebanese_sentiment_shop/services/products/bulk_ingest.py
+import csv
+import io
+import logging
+import uuid
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select
+from app import db
+from .models import Product, Category, Subcategory
+from ..inventory.models import Inventory, DEFAULT_LOCATION
+from ..inventory import alerts, ledger
+from . import promotions, search_index
+
+REQUIRED_COLUMNS = ['name', 'description', 'price', 'stock', 'category_id']
+MAX_PRICE = Decimal('99999999.99')  # Upper bound of Numeric(10, 2)
+
+
+class RowError(ValueError):
+    """Raised when a single CSV row fails validation."""
+
+
+class IngestReport:
+    """Running totals for one ingest; errors are capped so memory stays bounded."""
+
+    def __init__(self, max_errors=1000):
+        self.rows_parsed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self):
+        return {
+            "rows_parsed": self.rows_parsed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+def _parse_int(row, field, default=None):
+    value = (row.get(field) or '').strip()
+    if not value:
+        if default is None:
+            raise RowError(f"Missing required field: {field}")
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise RowError(f"{field} must be an integer")
+    if number < 0:
+        raise RowError(f"{field.capitalize()} must be a non-negative number")
+    return number
+
+
+def parse_row(row):
+    """Validate one CSV row and return the column values for a products INSERT."""
+    for field in REQUIRED_COLUMNS:
+        if not (row.get(field) or '').strip():
+            raise RowError(f"Missing required field: {field}")
+
+    name = row['name'].strip()
+    if len(name) > 255:
+        raise RowError("Name must be between 1 and 255 characters")
+
+    try:
+        price = Decimal(row['price'].strip())
+    except InvalidOperation:
+        raise RowError("price must be a number")
+    if not price.is_finite() or price < 0 or price > MAX_PRICE:
+        raise RowError("Price must be a non-negative number")
+
+    subcategory_id = (row.get('subcategory_id') or '').strip()
+    image = (row.get('image') or '').strip()
+    return {
+        "name": name,
+        "description": row['description'],
+        "price": price.quantize(Decimal('0.01')),
+        "stock": _parse_int(row, 'stock'),
+        "stock_threshold": _parse_int(row, 'stock_threshold', default=10),
+        "image": image[:255] or None,
+        "category_id": _parse_int(row, 'category_id'),
+        "subcategory_id": _parse_int(row, 'subcategory_id') if subcategory_id else None,
+    }
+
+
+class _ReferenceChecker:
+    """Batched foreign-key validation: each unseen category/subcategory id costs one IN query per batch."""
+
+    def __init__(self):
+        self.categories = set()
+        self.missing_categories = set()
+        self.subcategories = {}  # subcategory id -> category id
+        self.missing_subcategories = set()
+
+    def load(self, rows):
+        category_ids = {r['category_id'] for _, r in rows} - self.categories - self.missing_categories
+        if category_ids:
+            found = set(db.session.execute(select(Category.id).where(Category.id.in_(category_ids))).scalars())
+            self.categories |= found
+            self.missing_categories |= category_ids - found
+
+        subcategory_ids = {r['subcategory_id'] for _, r in rows if r['subcategory_id'] is not None}
+        subcategory_ids -= set(self.subcategories) | self.missing_subcategories
+        if subcategory_ids:
+            found = dict(db.session.execute(
+                select(Subcategory.id, Subcategory.category_id).where(Subcategory.id.in_(subcategory_ids))
+            ).all())
+            self.subcategories.update(found)
+            self.missing_subcategories |= subcategory_ids - set(found)
+
+    def check(self, row):
+        if row['category_id'] not in self.categories:
+            raise RowError(f"Category {row['category_id']} does not exist")
+        subcategory_id = row['subcategory_id']
+        if subcategory_id is not None:
+            if subcategory_id not in self.subcategories:
+                raise RowError(f"Subcategory {subcategory_id} does not exist")
+            if self.subcategories[subcategory_id] != row['category_id']:
+                raise RowError(f"Subcategory {subcategory_id} does not belong to category {row['category_id']}")
+
+
+def _insert_batch(rows):
+    """Insert products and their default inventory rows with two multi-row statements.
+
+    Core inserts skip the ORM `after_insert` listener, so the inventory rows are
+    created with one INSERT ... SELECT over the new products. MySQL cannot return the
+    ids of a multi-row INSERT, and ids above the previous max(id) may belong to other
+    writers, so the batch's rows carry a random marker and are read back by it.
+    """
+    marker = uuid.uuid4().hex
+    db.session.execute(insert(Product.__table__), [{**row, "ingest_batch": marker} for row in rows])
+    product_ids = db.session.execute(select(Product.id).where(Product.ingest_batch == marker)).scalars().all()
+
+    new_inventory = select(Product.id, db.literal(DEFAULT_LOCATION), Product.stock).where(Product.ingest_batch == marker)
+    db.session.execute(
+        insert(Inventory.__table__).from_select(['product_id', 'location', 'stock_level'], new_inventory)
+    )
+    ledger.record_new_products(product_ids)
+    alerts.refresh_products(product_ids)
+    db.session.commit()
+    search_index.reindex_products(product_ids)
+    promotions.refresh_new_products(product_ids)
+
+
+def _flush(batch, report):
+    if not batch:
+        return
+    rows = [row for _, row in batch]
+    try:
+        _insert_batch(rows)
+        report.inserted += len(rows)
+        return
+    except Exception as e:
+        db.session.rollback()
+        logging.warning(f"Bulk insert batch failed, retrying row by row: {str(e)}")
+
+    # Isolate the offending rows so one bad line does not cost the whole batch
+    for line, row in batch:
+        try:
+            _insert_batch([row])
+            report.inserted += 1
+        except Exception:
+            db.session.rollback()
+            report.add_error(line, "Row rejected by the database")
+
+
+def ingest_products_csv(binary_stream, batch_size=1000, report=None, cancel_event=None):
+    """Stream a products CSV into the database in batches of `batch_size` rows.
+
+    Invalid rows are recorded in the report and skipped; valid rows are committed
+    batch by batch, so memory use depends on the batch size, not the file size.
+    Setting `cancel_event` stops the ingest at the next row; batches already
+    committed are kept.
+    """
+    report = report or IngestReport()
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text_stream)
+        missing = [field for field in REQUIRED_COLUMNS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing required column(s) in CSV: {', '.join(missing)}")
+
+        references = _ReferenceChecker()
+        parsed = []
+        for row in reader:
+            if cancel_event is not None and cancel_event.is_set():
+                return report
+            report.rows_parsed += 1
+            line = reader.line_num
+            try:
+                parsed.append((line, parse_row(row)))
+            except RowError as e:
+                report.add_error(line, str(e))
+
+            if len(parsed) >= batch_size:
+                _flush(_check_references(parsed, references, report), report)
+                parsed = []
+
+        _flush(_check_references(parsed, references, report), report)
+        return report
+    except UnicodeDecodeError:
+        raise ValueError("CSV file must be UTF-8 encoded")
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV on line {reader.line_num}: {str(e)}")
+    finally:
+        text_stream.detach()
+
+
+def _check_references(parsed, references, report):
+    references.load(parsed)
+    valid = []
+    for line, row in parsed:
+        try:
+            references.check(row)
+            valid.append((line, row))
+        except RowError as e:
+            report.add_error(line, str(e))
+    return valid
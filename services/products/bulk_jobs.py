@@ -0,0 +1,142 @@
+#authentic_lebanese_sentiment_shop/services/products/bulk_jobs.py
+import atexit
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from app import db
+from .bulk_ingest import ingest_products_csv, IngestReport
+from ..audit import log_activity
+
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class BulkUploadJob:
+    """State of one background bulk upload, polled by the job endpoints."""
+
+    def __init__(self, admin_id, file_path, max_errors):
+        self.id = uuid.uuid4().hex
+        self.admin_id = admin_id
+        self.file_path = file_path
+        self.status = 'Queued'  # Queued -> Running -> Completed / Failed / Canceled
+        self.error = None
+        self.report = IngestReport(max_errors=max_errors)
+        self.cancel_event = threading.Event()
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def is_finished(self):
+        return self.status in ('Completed', 'Failed', 'Canceled')
+
+    def to_dict(self, include_errors=False):
+        report = self.report.to_dict()
+        if not include_errors:
+            report.pop('errors')
+        return {
+            "job_id": self.id,
+            "admin_id": self.admin_id,
+            "status": self.status,
+            "error": self.error,
+            **report
+        }
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config['BULK_UPLOAD_WORKERS'],
+                thread_name_prefix='bulk-upload'
+            )
+        return _executor
+
+
+def _prune_finished_jobs(ttl):
+    """Forget finished jobs older than `ttl` seconds so the registry stays bounded."""
+    cutoff = time.time() - ttl
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job.finished_at is not None and job.finished_at < cutoff]:
+            del _jobs[job_id]
+
+
+def _run_job(app, job):
+    with app.app_context():
+        try:
+            if job.cancel_event.is_set():
+                job.status = 'Canceled'
+                return
+            job.status = 'Running'
+            with open(job.file_path, 'rb') as csv_file:
+                ingest_products_csv(
+                    csv_file,
+                    batch_size=app.config['BULK_UPLOAD_BATCH_SIZE'],
+                    report=job.report,
+                    cancel_event=job.cancel_event
+                )
+            job.status = 'Canceled' if job.cancel_event.is_set() else 'Completed'
+
+            log_activity(job.admin_id, f"Bulk upload job {job.id} by admin {job.admin_id} added {job.report.inserted} products ({job.report.failed} rows rejected, status {job.status}).")
+        except ValueError as e:
+            db.session.rollback()
+            job.status = 'Failed'
+            job.error = str(e)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Bulk upload job {job.id} failed: {str(e)}")
+            job.status = 'Failed'
+            job.error = "Bulk Upload failed."
+        finally:
+            db.session.remove()
+            job.finished_at = time.time()
+            os.remove(job.file_path)
+
+
+def submit_job(app, admin_id, stream):
+    """Copy the upload to a temp file and queue it on the worker pool; returns the job."""
+    _prune_finished_jobs(app.config['BULK_UPLOAD_JOB_TTL'])
+
+    with tempfile.NamedTemporaryFile(prefix='bulk_upload_', suffix='.csv', delete=False) as temp_file:
+        shutil.copyfileobj(stream, temp_file)
+
+    job = BulkUploadJob(admin_id, temp_file.name, app.config['BULK_UPLOAD_MAX_ERRORS'])
+    with _jobs_lock:
+        _jobs[job.id] = job
+    _get_executor(app).submit(_run_job, app, job)
+    return job
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def cancel_job(job_id):
+    """Request cancellation; a running job stops at its next row."""
+    job = get_job(job_id)
+    if job is not None and not job.is_finished:
+        job.cancel_event.set()
+    return job
+
+
+def shutdown(wait=True):
+    """Cancel outstanding jobs and stop the worker pool."""
+    global _executor
+    with _jobs_lock:
+        for job in _jobs.values():
+            job.cancel_event.set()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,153 @@
+#authentic_lebanese_sentiment_shop/services/products/bulk_update.py
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import case, select, update, func
+from app import db
+from .models import Product, Subcategory
+from ..inventory import alerts, levels
+from ..chunking import id_chunks
+
+# Columns a bulk update may change; name/description edits stay on the single-product route
+BULK_FIELDS = ('price', 'stock', 'stock_threshold', 'image', 'subcategory_id')
+MAX_PRICE = Decimal('99999999.99')
+
+
+def _validate_value(field, value):
+    if field == 'price':
+        try:
+            price = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError("price must be a number")
+        if not price.is_finite() or price < 0 or price > MAX_PRICE:
+            raise ValueError("Price must be a non-negative number")
+        return price.quantize(Decimal('0.01'))
+    if field in ('stock', 'stock_threshold'):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"{field.capitalize()} must be a non-negative integer")
+        return value
+    if field == 'subcategory_id':
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise ValueError("subcategory_id must be an integer or null")
+        return value
+    if value is not None and (not isinstance(value, str) or len(value) > 255):
+        raise ValueError("image must be a string of at most 255 characters")
+    return value
+
+
+def validate_patch(patch):
+    """Validate a {field: value} patch; `price_percent` adjusts prices relatively (e.g. -10 for 10% off)."""
+    if not isinstance(patch, dict) or not patch:
+        raise ValueError("patch must be a non-empty object")
+    unknown = set(patch) - set(BULK_FIELDS) - {'price_percent'}
+    if unknown:
+        raise ValueError(f"Fields cannot be bulk updated: {', '.join(sorted(unknown))}")
+    if 'price' in patch and 'price_percent' in patch:
+        raise ValueError("Use either price or price_percent, not both")
+
+    clean = {field: _validate_value(field, value) for field, value in patch.items() if field != 'price_percent'}
+    if 'price_percent' in patch:
+        try:
+            percent = Decimal(str(patch['price_percent']))
+        except InvalidOperation:
+            raise ValueError("price_percent must be a number")
+        if not percent.is_finite() or percent <= -100 or percent > 1000:
+            raise ValueError("price_percent must be greater than -100 and at most 1000")
+        clean['price_percent'] = percent
+    return clean
+
+
+def validate_updates(updates):
+    """Validate a list of {"id": ..., field: value} items and return {product_id: patch}."""
+    if not isinstance(updates, list) or not updates:
+        raise ValueError("updates must be a non-empty list")
+    by_id = {}
+    for item in updates:
+        if not isinstance(item, dict) or not isinstance(item.get('id'), int):
+            raise ValueError("Each update needs an integer id")
+        changes = {field: value for field, value in item.items() if field != 'id'}
+        if 'price_percent' in changes:
+            raise ValueError("price_percent is only supported with a filter")
+        by_id[item['id']] = validate_patch(changes)
+    return by_id
+
+
+def check_subcategories(assignments):
+    """Check that each {product_id: subcategory_id} names an existing subcategory of that product's category."""
+    assignments = {product_id: subcategory_id for product_id, subcategory_id in assignments.items() if subcategory_id is not None}
+    categories = {}
+    for chunk in id_chunks(assignments.values()):
+        categories.update(db.session.execute(
+            select(Subcategory.id, Subcategory.category_id).where(Subcategory.id.in_(chunk))
+        ).all())
+    missing = sorted(set(assignments.values()) - set(categories))
+    if missing:
+        raise ValueError(f"Subcategory not found: {', '.join(map(str, missing))}")
+    for chunk in id_chunks(assignments):
+        for product_id, category_id in db.session.execute(select(Product.id, Product.category_id).where(Product.id.in_(chunk))):
+            if categories[assignments[product_id]] != category_id:
+                raise ValueError(f"Subcategory {assignments[product_id]} does not belong to the category of product {product_id}")
+
+
+def filter_product_ids(filters):
+    """Resolve a filter object to the matching product ids with one query."""
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError("filter must be a non-empty object")
+    query = select(Product.id)
+    for field in ('category_id', 'subcategory_id'):
+        if field in filters:
+            query = query.where(getattr(Product, field) == filters[field])
+    if 'ids' in filters:
+        if not isinstance(filters['ids'], list):
+            raise ValueError("filter.ids must be a list")
+        query = query.where(Product.id.in_(filters['ids']))
+    if 'min_price' in filters:
+        query = query.where(Product.price >= _validate_value('price', filters['min_price']))
+    if 'max_price' in filters:
+        query = query.where(Product.price <= _validate_value('price', filters['max_price']))
+    if not set(filters) & {'category_id', 'subcategory_id', 'ids', 'min_price', 'max_price'}:
+        raise ValueError("filter needs at least one of category_id, subcategory_id, ids, min_price, max_price")
+    return list(db.session.execute(query.order_by(Product.id)).scalars())
+
+
+def apply_patch(product_ids, patch):
+    """Apply the same patch to every product id: one UPDATE per chunk of ids."""
+    values = {field: value for field, value in patch.items() if field not in ('price_percent', 'stock')}
+    if 'price_percent' in patch:
+        factor = 1 + patch['price_percent'] / 100
+        values['price'] = func.round(Product.price * factor, 2)
+    if values:
+        for chunk in id_chunks(product_ids):
+            db.session.execute(update(Product).where(Product.id.in_(chunk)).values(values).execution_options(synchronize_session=False))
+    if 'stock' in patch:
+        # Stock lives per location; the total moves by applying the difference at the primary location
+        levels.set_product_totals({product_id: patch['stock'] for product_id in product_ids})
+    if 'stock_threshold' in patch:
+        alerts.refresh_products(product_ids)
+
+
+def apply_updates(patches):
+    """Apply per-product patches with CASE expressions: one UPDATE per chunk of ids."""
+    product_ids = sorted(patches)
+    for chunk in id_chunks(product_ids):
+        values = {}
+        for field in BULK_FIELDS:
+            if field == 'stock':
+                continue
+            cases = {product_id: patches[product_id][field] for product_id in chunk if field in patches[product_id]}
+            if cases:
+                values[field] = case(cases, value=Product.id, else_=getattr(Product, field))
+        if values:
+            db.session.execute(update(Product).where(Product.id.in_(chunk)).values(values).execution_options(synchronize_session=False))
+
+    stock_totals = {product_id: patches[product_id]['stock'] for product_id in product_ids if 'stock' in patches[product_id]}
+    if stock_totals:
+        levels.set_product_totals(stock_totals)
+    threshold_changed = [product_id for product_id in product_ids if 'stock_threshold' in patches[product_id]]
+    if threshold_changed:
+        alerts.refresh_products(threshold_changed)
+
+
+def existing_ids(product_ids):
+    found = set()
+    for chunk in id_chunks(product_ids):
+        found.update(db.session.execute(select(Product.id).where(Product.id.in_(chunk))).scalars())
+    return found
@@ -0,0 +1,84 @@
+#authentic_lebanese_sentiment_shop/services/products/category_cache.py
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .models import Category, Subcategory
+
+_lock = threading.Lock()
+_generation = 0  # Bumped on every committed Category/Subcategory write
+_payloads = None  # {"categories": bytes, "subcategories": bytes, "tree": bytes}
+_built_at = 0.0
+
+
+def _build_payloads():
+    """Load the whole tree with two queries and serialize each view exactly once."""
+    categories = Category.query.order_by(Category.id).all()
+    subcategories = Subcategory.query.order_by(Subcategory.id).all()
+
+    category_dicts = {category.id: category.to_dict() for category in categories}
+    subcategory_data = []
+    children = {category_id: [] for category_id in category_dicts}
+    for subcategory in subcategories:
+        subcategory_dict = subcategory.to_dict()
+        children.setdefault(subcategory.category_id, []).append(subcategory_dict)
+        # Reuse the already built category dict instead of serializing it again per row
+        if subcategory.category_id in category_dicts:
+            subcategory_dict = {**subcategory_dict, "category": category_dicts[subcategory.category_id]}
+        subcategory_data.append(subcategory_dict)
+
+    tree = [{**category_dict, "subcategories": children[category_id]} for category_id, category_dict in category_dicts.items()]
+
+    dumps = current_app.json.dumps
+    return {
+        "categories": dumps(list(category_dicts.values())).encode('utf-8'),
+        "subcategories": dumps(subcategory_data).encode('utf-8'),
+        "tree": dumps(tree).encode('utf-8')
+    }
+
+
+def get_payload(name):
+    """Return the pre-serialized JSON bytes for `categories`, `subcategories` or `tree`."""
+    global _payloads, _built_at
+    ttl = current_app.config['CATEGORY_CACHE_TTL']
+    with _lock:
+        if _payloads is not None and time.monotonic() - _built_at < ttl:
+            return _payloads[name]
+        generation = _generation
+
+    payloads = _build_payloads()
+
+    with _lock:
+        # A write committed while we were building makes this snapshot stale; serve it once but do not keep it
+        if generation == _generation:
+            _payloads = payloads
+            _built_at = time.monotonic()
+    return payloads[name]
+
+
+def invalidate():
+    global _generation, _payloads
+    with _lock:
+        _generation += 1
+        _payloads = None
+
+
+# Flag sessions that flushed a Category/Subcategory change, then drop the cache once it commits
+@event.listens_for(Session, 'after_flush')
+def _track_category_writes(session, flush_context):
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (Category, Subcategory)):
+            session.info['category_tree_dirty'] = True
+            return
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('category_tree_dirty', False):
+        invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('category_tree_dirty', None)
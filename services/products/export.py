@@ -0,0 +1,76 @@
+#authentic_lebanese_sentiment_shop/services/products/export.py
+import csv
+import io
+import json
+from sqlalchemy import select, func
+from .bulk_ingest import REQUIRED_COLUMNS
+from .models import Product, Category, Subcategory
+from ..inventory.models import Inventory
+from .. import streaming
+
+# bulk_upload_products reads the first block of columns and ignores the rest, so an export can be re-imported as is
+UPLOAD_COLUMNS = REQUIRED_COLUMNS + ['stock_threshold', 'image', 'subcategory_id']
+EXPORT_COLUMNS = ['id'] + UPLOAD_COLUMNS + ['category_name', 'subcategory_name', 'inventory_total', 'inventory_by_location']
+
+
+def _export_query(category_id=None):
+    # Per-location sums are joined in, giving one row per (product, location) ordered by product
+    per_location = (
+        select(Inventory.product_id, Inventory.location, func.sum(Inventory.stock_level).label('stock_level'))
+        .group_by(Inventory.product_id, Inventory.location)
+        .subquery()
+    )
+    query = (
+        select(
+            Product.id, Product.name, Product.description, Product.price, Product.stock,
+            Product.category_id, Product.stock_threshold, Product.image, Product.subcategory_id,
+            Category.name.label('category_name'), Subcategory.name.label('subcategory_name'),
+            per_location.c.location, per_location.c.stock_level
+        )
+        .join(Category, Category.id == Product.category_id)
+        .outerjoin(Subcategory, Subcategory.id == Product.subcategory_id)
+        .outerjoin(per_location, per_location.c.product_id == Product.id)
+        .order_by(Product.id, per_location.c.location)
+    )
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    return query
+
+
+def _records(rows):
+    """Fold the (product, location) rows, ordered by product, into one export record per product."""
+    record = None
+    for row in rows:
+        if record is None or record['id'] != row.id:
+            if record is not None:
+                yield record
+            record = {column: getattr(row, column) for column in EXPORT_COLUMNS[:-2]}
+            record['inventory_total'] = 0
+            record['inventory_by_location'] = {}
+        if row.location is not None:
+            record['inventory_by_location'][row.location] = int(row.stock_level or 0)
+            record['inventory_total'] += int(row.stock_level or 0)
+    if record is not None:
+        yield record
+
+
+def iter_products(category_id=None):
+    """Yield one export record per product, reading rows through a server-side cursor."""
+    return _records(streaming.stream_rows(_export_query(category_id)))
+
+
+def generate_csv(category_id=None):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for count, record in enumerate(iter_products(category_id), start=1):
+        writer.writerow({**record, "inventory_by_location": json.dumps(record['inventory_by_location'])})
+        if count % streaming.ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_ndjson(dumps, category_id=None):
+    return streaming.generate_ndjson(dumps, _export_query(category_id), records=_records)
@@ -1,8 +1,9 @@
 #authentic_lebanese_sentiment_shop/services/products/models.py
 from app import db
 from sqlalchemy.orm import validates
-from ..inventory.models import Inventory
-from sqlalchemy import event, insert, delete, update
+from ..inventory.models import Inventory, DEFAULT_LOCATION
+from sqlalchemy import event, insert, delete
+from ..serialization import loaded
 
 
 class Category(db.Model):
@@ -30,7 +31,7 @@ class Subcategory(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
 
     products = db.relationship('Product', backref='subcategory', lazy=True)
 
@@ -45,16 +46,17 @@ class Product(db.Model):
     __tablename__ = 'products'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(255), nullable=False)
+    name = db.Column(db.String(255), nullable=False, index=True)  # Indexed for name-prefix search
     description = db.Column(db.Text)
-    price = db.Column(db.Numeric(10, 2), nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False, index=True)
     stock = db.Column(db.Integer, default=0)
     stock_threshold = db.Column(db.Integer, default=10)
     image = db.Column(db.String(255))  # Path or URL to the product image
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
-    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategories.id'), nullable=True) 
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategories.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=db.func.now())
     updated_at = db.Column(db.DateTime, onupdate=db.func.now())
+    ingest_batch = db.Column(db.String(32), index=True)  # Set by bulk uploads to read back the ids of one batch
 
     order_items = db.relationship('OrderItem', back_populates='product', cascade='all, delete-orphan')
     inventory_records = db.relationship('Inventory', back_populates='product', cascade='all, delete-orphan')
@@ -62,19 +64,27 @@ class Product(db.Model):
     def check_stock_level(self):
         return "Low Stock" if self.stock <= self.stock_threshold else "In Stock"
 
-    def to_dict(self):
+    _serialized = frozenset((
+        'id', 'name', 'description', 'price', 'stock', 'stock_threshold', 'image', 'category_id', 'subcategory_id',
+        'created_at', 'updated_at'
+    ))
+
+    def to_dict(self, **extra):
+        """The product's fields, followed by any `extra` ones (e.g. a listing's effective price)."""
+        values = loaded(self, self._serialized)
         return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "price": str(self.price),
-            "stock": self.stock,
-            "stock_threshold": self.stock_threshold,
-            "image": self.image,
-            "category_id": self.category_id,
-            "subcategory_id": self.subcategory_id,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at
+            "id": values['id'],
+            "name": values['name'],
+            "description": values['description'],
+            "price": str(values['price']),
+            "stock": values['stock'],
+            "stock_threshold": values['stock_threshold'],
+            "image": values['image'],
+            "category_id": values['category_id'],
+            "subcategory_id": values['subcategory_id'],
+            "created_at": values['created_at'],
+            "updated_at": values['updated_at'],
+            **extra
         }
 
 
@@ -93,6 +103,56 @@ class Product(db.Model):
         return value
 
 
+class Promotion(db.Model):
+    __tablename__ = 'promotions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    # Exactly one scope is set: a single product, a whole category or a whole subcategory
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete="CASCADE"), nullable=True, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete="CASCADE"), nullable=True, index=True)
+    subcategory_id = db.Column(db.Integer, db.ForeignKey('subcategories.id', ondelete="CASCADE"), nullable=True, index=True)
+    discount_type = db.Column(db.Enum('Percentage', 'Fixed'), nullable=False)
+    discount_value = db.Column(db.Numeric(10, 2), nullable=False)
+    starts_at = db.Column(db.DateTime, nullable=False)
+    ends_at = db.Column(db.DateTime, nullable=True)  # Open-ended when NULL
+    created_at = db.Column(db.DateTime, default=db.func.now())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "product_id": self.product_id,
+            "category_id": self.category_id,
+            "subcategory_id": self.subcategory_id,
+            "discount_type": self.discount_type,
+            "discount_value": str(self.discount_value),
+            "starts_at": self.starts_at,
+            "ends_at": self.ends_at,
+            "created_at": self.created_at
+        }
+
+    @validates('discount_value')
+    def validate_discount_value(self, key, value):
+        if value is None or value <= 0:
+            raise ValueError("Discount value must be a positive number")
+        return value
+
+
+class ProductEffectivePrice(db.Model):
+    """Precomputed price of a product under its best active promotion.
+
+    Rows exist only for products with an active or upcoming promotion; `valid_until`
+    is the next window boundary at which the row must be recomputed.
+    """
+    __tablename__ = 'product_effective_prices'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete="CASCADE"), primary_key=True)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+    promotion_id = db.Column(db.Integer, db.ForeignKey('promotions.id', ondelete="SET NULL"), nullable=True)
+    valid_until = db.Column(db.DateTime, nullable=True, index=True)
+
+
 
 # Event listener to create Inventory after Product insert
 @event.listens_for(Product, 'after_insert')
@@ -101,7 +161,7 @@ def create_inventory_for_product(mapper, connection, target):
     connection.execute(
         insert(Inventory).values(
             product_id=target.id,
-            location="Main Warehouse",  # Default location
+            location=DEFAULT_LOCATION,
             stock_level=target.stock  # Sync with product's initial stock level
         )
     )
@@ -113,16 +173,3 @@ def delete_inventory_for_product(mapper, connection, target):
     connection.execute(
         delete(Inventory).where(Inventory.product_id == target.id)
     )
-
-# Event listener to update Inventory stock level after Product stock is updated
-@event.listens_for(Product, 'after_update')
-def update_inventory_stock_level(mapper, connection, target):
-    # Update the stock level in the Inventory to match the Product's updated stock
-    connection.execute(
-        update(Inventory)
-        .where(Inventory.product_id == target.id)
-        .values(
-            stock_level=target.stock,
-            last_updated=target.updated_at  # Update last_updated timestamp
-        )
-    )
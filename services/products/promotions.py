@@ -0,0 +1,196 @@
+#authentic_lebanese_sentiment_shop/services/products/promotions.py
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import event, select, delete, insert, or_, func
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+from app import db
+from .models import Product, Promotion, ProductEffectivePrice
+from ..chunking import id_chunks
+
+CENT = Decimal('0.01')
+
+_lock = threading.Lock()
+_next_boundary = None  # Earliest valid_until in the table, as last seen by this process
+_checked_at = 0.0
+RECHECK_SECONDS = 30  # Also picks up boundaries created by other processes
+
+
+def discounted_price(base_price, promotion):
+    base_price = Decimal(base_price)
+    if promotion.discount_type == 'Percentage':
+        price = base_price * (1 - Decimal(promotion.discount_value) / 100)
+    else:
+        price = base_price - Decimal(promotion.discount_value)
+    return max(price, Decimal('0')).quantize(CENT)
+
+
+def _resolve(product, promotions, now):
+    """Pick the cheapest active promotion and the next time the answer can change."""
+    best_price, best_promotion, boundary = None, None, None
+    for promotion in promotions:
+        if promotion.ends_at is not None and promotion.ends_at <= now:
+            continue
+        if promotion.starts_at > now:
+            edge = promotion.starts_at
+        else:
+            price = discounted_price(product.price, promotion)
+            if best_price is None or price < best_price:
+                best_price, best_promotion = price, promotion.id
+            edge = promotion.ends_at
+        if edge is not None and (boundary is None or edge < boundary):
+            boundary = edge
+
+    if best_promotion is None and boundary is None:
+        return None
+    return {
+        "product_id": product.id,
+        "price": best_price if best_promotion is not None else Decimal(product.price).quantize(CENT),
+        "promotion_id": best_promotion,
+        "valid_until": boundary
+    }
+
+
+def refresh_effective_prices(connection, product_ids, now=None):
+    """Recompute the effective-price rows of the given products on `connection`."""
+    now = now or datetime.utcnow()
+    for chunk in id_chunks(product_ids):
+        products = connection.execute(
+            select(Product.id, Product.price, Product.category_id, Product.subcategory_id).where(Product.id.in_(chunk))
+        ).all()
+        category_ids = {product.category_id for product in products}
+        subcategory_ids = {product.subcategory_id for product in products if product.subcategory_id is not None}
+
+        candidates = connection.execute(
+            select(Promotion.__table__).where(
+                or_(Promotion.ends_at.is_(None), Promotion.ends_at > now),
+                or_(
+                    Promotion.product_id.in_(chunk),
+                    Promotion.category_id.in_(category_ids),
+                    Promotion.subcategory_id.in_(subcategory_ids)
+                )
+            )
+        ).all() if products else []
+
+        rows = []
+        for product in products:
+            applicable = [
+                promotion for promotion in candidates
+                if promotion.product_id == product.id
+                or promotion.category_id == product.category_id
+                or (promotion.subcategory_id is not None and promotion.subcategory_id == product.subcategory_id)
+            ]
+            row = _resolve(product, applicable, now)
+            if row is not None:
+                rows.append(row)
+
+        connection.execute(delete(ProductEffectivePrice).where(ProductEffectivePrice.product_id.in_(chunk)))
+        if rows:
+            connection.execute(insert(ProductEffectivePrice.__table__), rows)
+    _forget_boundary()
+
+
+def promotion_product_ids(connection, promotion):
+    """All product ids a promotion applies to."""
+    if promotion.product_id is not None:
+        return [promotion.product_id]
+    if promotion.category_id is not None:
+        criterion = Product.category_id == promotion.category_id
+    else:
+        criterion = Product.subcategory_id == promotion.subcategory_id
+    return list(connection.execute(select(Product.id).where(criterion)).scalars())
+
+
+def refresh_new_products(product_ids):
+    """Give products inserted with Core statements their effective prices.
+
+    Skipped when no category or subcategory promotion is live, which is the common case.
+    """
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        scoped = connection.execute(
+            select(Promotion.id).where(
+                or_(Promotion.ends_at.is_(None), Promotion.ends_at > now),
+                or_(Promotion.category_id.isnot(None), Promotion.subcategory_id.isnot(None))
+            ).limit(1)
+        ).first()
+        if scoped is not None:
+            refresh_effective_prices(connection, product_ids, now)
+
+
+def refresh_due(now=None):
+    """Recompute every row whose window boundary has passed, in its own transaction."""
+    now = now or datetime.utcnow()
+    with db.engine.begin() as connection:
+        due = list(connection.execute(
+            select(ProductEffectivePrice.product_id).where(ProductEffectivePrice.valid_until <= now)
+        ).scalars())
+        if due:
+            refresh_effective_prices(connection, due, now)
+    return len(due)
+
+
+def _forget_boundary():
+    global _next_boundary, _checked_at
+    with _lock:
+        _next_boundary, _checked_at = None, 0.0
+
+
+def ensure_current():
+    """Cheap guard for price reads: refresh only when a window boundary has passed."""
+    global _next_boundary, _checked_at
+    now = datetime.utcnow()
+    with _lock:
+        if time.monotonic() - _checked_at < RECHECK_SECONDS and (_next_boundary is None or _next_boundary > now):
+            return
+    refresh_due(now)
+    with db.engine.connect() as connection:
+        boundary = connection.execute(select(func.min(ProductEffectivePrice.valid_until))).scalar()
+    with _lock:
+        _next_boundary, _checked_at = boundary, time.monotonic()
+
+
+def current_prices(product_ids):
+    """Return {product_id: price to charge now} with one indexed lookup per chunk of ids."""
+    ensure_current()
+    prices = {}
+    for chunk in id_chunks(product_ids):
+        rows = db.session.execute(
+            select(Product.id, func.coalesce(ProductEffectivePrice.price, Product.price))
+            .outerjoin(ProductEffectivePrice, ProductEffectivePrice.product_id == Product.id)
+            .where(Product.id.in_(chunk))
+        ).all()
+        prices.update({product_id: Decimal(price) for product_id, price in rows})
+    return prices
+
+
+# Products whose price or category changes need their effective price recomputed after commit
+@event.listens_for(Product, 'after_insert')
+def _track_new_product(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('effective_price_refresh', set()).add(target.id)
+
+
+@event.listens_for(Product, 'after_update')
+def _track_repriced_product(mapper, connection, target):
+    if not any(get_history(target, field).has_changes() for field in ('price', 'category_id', 'subcategory_id')):
+        return
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('effective_price_refresh', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_on_commit(session):
+    product_ids = session.info.pop('effective_price_refresh', None)
+    if product_ids:
+        with db.engine.begin() as connection:
+            refresh_effective_prices(connection, product_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('effective_price_refresh', None)
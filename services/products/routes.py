@@ -1,37 +1,36 @@
-from flask import Blueprint, request, jsonify, abort
-from .models import Product, Category, Subcategory
+from flask import Blueprint, request, jsonify, abort, current_app, stream_with_context
+from .models import Product, Category, Subcategory, Promotion
 from .decorators import role_required, jwt_required
 from app import db
 import csv
-from ..user_management.models import ActivityLog
-import os
-import magic  # For file signature checking
+from ..audit import log_activity, record_activity
 import pyclamd  # For virus scanning
-import tempfile
-from werkzeug.utils import secure_filename
+import logging
+from decimal import Decimal, InvalidOperation
+from datetime import datetime
+from sqlalchemy import or_
+from .bulk_ingest import ingest_products_csv, IngestReport
+from . import bulk_jobs, bulk_update, category_cache, export, promotions, search_index
+from ..http_cache import conditional_get
+from ..idempotency import idempotent
+from ..pagination import get_page_args, get_int_arg, get_bool_arg, escape_like, paginate, parse_datetime
+from ..inventory import levels
+from ..uploads import csv_upload_stream
 
 products_bp = Blueprint('products', __name__)
 
+# Order managers only read the catalog (stock is re-checked when an order is placed), so they may
+# reuse a page briefly; roles that edit products or stock always revalidate
+CATALOG_MAX_AGE = {'OrderManager': 30}
 
-# Get all subcategories
+
+# Get all subcategories, each with its category, from the cached tree
 @products_bp.route('/subcategories', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'ProductManager'])
+@conditional_get('categories', 'subcategories')
 def get_subcategories():
-    # Use a single query to join Category and Subcategory tables
-    subcategories = Subcategory.query.outerjoin(Category).all()
-    subcategory_data = []
-
-    for subcategory in subcategories:
-        subcategory_dict = subcategory.to_dict()
-
-        # Add category data if available
-        if subcategory.category:
-            subcategory_dict['category'] = subcategory.category.to_dict()
-        
-        subcategory_data.append(subcategory_dict)
-
-    return jsonify(subcategory_data)
+    return _cached_json('subcategories')
 
 
 # Update subcategory
@@ -68,13 +67,27 @@ def delete_subcategory(subcategory_id):
         return jsonify({"error": "Failed to delete subcategory"}), 500
 
 
-# Get all categories
+# Get all categories from the cached tree
 @products_bp.route('/categories', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'ProductManager'])
+@conditional_get('categories', 'subcategories')
 def get_categories():
-    categories = Category.query.all()
-    return jsonify([category.to_dict() for category in categories])
+    return _cached_json('categories')
+
+
+# Get the full category -> subcategory tree
+@products_bp.route('/categories/tree', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+@conditional_get('categories', 'subcategories')
+def get_category_tree():
+    return _cached_json('tree')
+
+
+def _cached_json(name):
+    """Serve a pre-serialized view of the category tree; rebuilt after Category/Subcategory commits."""
+    return current_app.response_class(category_cache.get_payload(name), mimetype='application/json')
 
 
 # Update category
@@ -116,9 +129,7 @@ def delete_category(category_id):
         db.session.commit()
         
         # Log deletion for audit
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Category {category_id} deleted by admin {request.user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Category {category_id} deleted by admin {request.user_id}")
         
         return jsonify({"message": "Category deleted successfully"}), 200
     except Exception as e:
@@ -199,9 +210,7 @@ def add_subcategory():
         db.session.commit()
 
         # Log the activity
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Subcategory created by admin {request.user_id}: {subcategory.name}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Subcategory created by admin {request.user_id}: {subcategory.name}")
 
         # Return the subcategory with the associated category details
         subcategory_data = subcategory.to_dict()
@@ -213,19 +222,113 @@ def add_subcategory():
         return jsonify({"error": "Failed to create subcategory. Please try again."}), 500
 
 
-# Get all products
+# Get products, one keyset page at a time
 @products_bp.route('/', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'ProductManager', 'InventoryManager', 'OrderManager'])
+@conditional_get('products', 'product_effective_prices', max_age_by_role=CATALOG_MAX_AGE, refresh=promotions.ensure_current)
 def get_products():
-    products = Product.query.all()
-    return jsonify([product.to_dict() for product in products])
+    limit, cursor = get_page_args()
+    query = Product.query
+
+    # Server-side filters
+    category_id = get_int_arg('category_id')
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    subcategory_id = get_int_arg('subcategory_id')
+    if subcategory_id is not None:
+        query = query.filter(Product.subcategory_id == subcategory_id)
+
+    try:
+        min_price = request.args.get('min_price')
+        if min_price:
+            query = query.filter(Product.price >= Decimal(min_price))
+        max_price = request.args.get('max_price')
+        if max_price:
+            query = query.filter(Product.price <= Decimal(max_price))
+    except InvalidOperation:
+        abort(400, "min_price and max_price must be numbers")
+
+    # Same rule as Product.check_stock_level, evaluated in SQL
+    low_stock = get_bool_arg('low_stock')
+    if low_stock is True:
+        query = query.filter(Product.stock <= Product.stock_threshold)
+    elif low_stock is False:
+        query = query.filter(Product.stock > Product.stock_threshold)
+
+    name_prefix = request.args.get('name_prefix')
+    if name_prefix:
+        query = query.filter(Product.name.like(escape_like(name_prefix) + '%', escape='\\'))
+
+    # Keyset on the primary key so every page costs the same regardless of depth
+    if cursor is not None:
+        if not isinstance(cursor.get('id'), int):
+            abort(400, "Invalid cursor")
+        query = query.filter(Product.id > cursor['id'])
+    query = query.order_by(Product.id)
+
+    products, next_cursor = paginate(query, limit, lambda product: {"id": product.id})
+    prices = promotions.current_prices([product.id for product in products])
+    return jsonify({
+        "products": [product.to_dict(effective_price=str(prices[product.id])) for product in products],
+        "next_cursor": next_cursor
+    })
+
+
+# Stream the whole catalog as CSV (re-importable through bulk_upload) or NDJSON
+@products_bp.route('/export', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def export_products():
+    export_format = request.args.get('format', 'csv').lower()
+    category_id = get_int_arg('category_id')
+    if export_format == 'csv':
+        body, mimetype = export.generate_csv(category_id), 'text/csv'
+    elif export_format == 'ndjson':
+        body, mimetype = export.generate_ndjson(current_app.json.dumps, category_id), 'application/x-ndjson'
+    else:
+        abort(400, "format must be csv or ndjson")
+
+    response = current_app.response_class(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=products.{export_format}'
+    return response
+
+
+# Full-text product search with ranking, prefix matching and per-category facets
+@products_bp.route('/search', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager', 'InventoryManager', 'OrderManager'])
+def search_products():
+    query = request.args.get('q', '').strip()
+    if not query:
+        abort(400, "Missing search query: q")
+    if len(query) > 255:
+        abort(400, "Search query is too long")
+
+    limit = max(1, min(get_int_arg('limit') or 20, 100))
+    offset = max(0, get_int_arg('offset') or 0)
+    result = search_index.search(query, limit=limit, offset=offset, category_id=get_int_arg('category_id'))
+
+    # Load only the page of hits, in rank order
+    ranked_ids = [product_id for product_id, _ in result['results']]
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(ranked_ids)).all()} if ranked_ids else {}
+    hits = [
+        products[product_id].to_dict(score=score)
+        for product_id, score in result['results'] if product_id in products
+    ]
+
+    return jsonify({
+        "total": result['total'],
+        "results": hits,
+        "facets": result['facets']
+    })
 
 
 # Add new product
 @products_bp.route('/add', methods=['POST'])
 @jwt_required
 @role_required(['SuperAdmin', 'ProductManager'])
+@idempotent
 def add_product():
     if not request.is_json:
         abort(400, "Request must be JSON")
@@ -251,9 +354,7 @@ def add_product():
         db.session.commit()
 
         # Log the product addition 
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"New product added by admin {request.user_id}: {new_product.to_dict()}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"New product added by admin {request.user_id}: {new_product.to_dict()}")
 
         return jsonify(new_product.to_dict()), 201
     except Exception as e:
@@ -274,23 +375,95 @@ def update_product(product_id):
         product.name = data.get('name', product.name)
         product.description = data.get('description', product.description)
         product.price = data.get('price', product.price)
-        product.stock = data.get('stock', product.stock)
         product.stock_threshold = data.get('stock_threshold', product.stock_threshold)
         product.image = data.get('image', product.image)
-        product.subcategory_id = data.get('subcategory_id', product.subcategory_id)
+        if 'subcategory_id' in data:
+            # The subcategory has to exist and sit under the product's category
+            subcategory_id = bulk_update.validate_patch({'subcategory_id': data['subcategory_id']})['subcategory_id']
+            bulk_update.check_subcategories({product_id: subcategory_id})
+            product.subcategory_id = subcategory_id
+
+        # The total is the sum of the locations; a new total is applied at the primary location
+        if 'stock' in data:
+            stock = data['stock']
+            if not isinstance(stock, int) or isinstance(stock, bool) or stock < 0:
+                raise ValueError("Stock must be a non-negative integer")
+            levels.set_product_totals({product_id: stock})
 
         db.session.commit()
 
         # Log the update for audit purposes
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Product {product_id} updated by admin {request.user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Product {product_id} updated by admin {request.user_id}")
 
         return jsonify(product.to_dict()), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to process request"}), 500
+
+
+# Update many products at once: either a list of per-product changes or a filter plus one patch
+@products_bp.route('/bulk_update', methods=['PUT'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def bulk_update_products():
+    if not request.is_json:
+        abort(400, "Request must be JSON")
+    data = request.json
+    max_products = current_app.config['BULK_UPDATE_MAX_PRODUCTS']
+
+    try:
+        if 'updates' in data:
+            patches = bulk_update.validate_updates(data['updates'])
+            if len(patches) > max_products:
+                return jsonify({"error": f"At most {max_products} products can be updated per request"}), 400
+            found = bulk_update.existing_ids(patches)
+            not_found = sorted(set(patches) - found)
+            patches = {product_id: patch for product_id, patch in patches.items() if product_id in found}
+            bulk_update.check_subcategories({
+                product_id: patch['subcategory_id'] for product_id, patch in patches.items() if 'subcategory_id' in patch
+            })
+            bulk_update.apply_updates(patches)
+            product_ids = sorted(patches)
+            fields = sorted({field for patch in patches.values() for field in patch})
+        elif 'filter' in data and 'patch' in data:
+            patch = bulk_update.validate_patch(data['patch'])
+            product_ids = bulk_update.filter_product_ids(data['filter'])
+            if len(product_ids) > max_products:
+                return jsonify({"error": f"Filter matches {len(product_ids)} products; at most {max_products} can be updated per request"}), 400
+            not_found = []
+            if 'subcategory_id' in patch:
+                bulk_update.check_subcategories({product_id: patch['subcategory_id'] for product_id in product_ids})
+            bulk_update.apply_patch(product_ids, patch)
+            fields = sorted(patch)
+        else:
+            return jsonify({"error": "Provide either updates or filter and patch"}), 400
+
+        # One summarized audit record, committed with the changes
+        record_activity(request.user_id, f"Bulk update by admin {request.user_id}: {len(product_ids)} products, fields {', '.join(fields)}")
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
+        logging.error(f"Bulk product update failed: {str(e)}")
         return jsonify({"error": "Failed to process request"}), 500
 
+    if 'subcategory_id' in fields:
+        search_index.reindex_products(product_ids)
+    if {'price', 'price_percent', 'subcategory_id'} & set(fields):
+        with db.engine.begin() as connection:
+            promotions.refresh_effective_prices(connection, product_ids)
+
+    return jsonify({
+        "message": "Products updated",
+        "updated": len(product_ids),
+        "not_found": not_found
+    }), 200
+
 
 # Delete product
 @products_bp.route('/<int:product_id>', methods=['DELETE'])
@@ -303,9 +476,7 @@ def delete_product(product_id):
         db.session.commit()
 
         # Log deletion for audit
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Product {product_id} deleted by admin {request.user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Product {product_id} deleted by admin {request.user_id}")
 
         return jsonify({"message": "Product deleted"})
     except Exception as e:
@@ -314,16 +485,10 @@ def delete_product(product_id):
 
 
 
-# Allowed extensions
-ALLOWED_EXTENSIONS = {'csv'}
-
-def allowed_file(filename):
-    """Check if the file has an allowed extension."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
 @products_bp.route('/bulk_upload', methods=['POST'])
 @jwt_required
 @role_required(['SuperAdmin', 'ProductManager'])
+@idempotent
 def bulk_upload_products():
     file = request.files.get('file')
     # Check if file is received
@@ -331,114 +496,205 @@ def bulk_upload_products():
         return "No file was uploaded.", 400
     
     
-    if not allowed_file(file.filename):
-        return "Only CSV files are allowed", 400
-
-    # Secure the filename and save it temporarily in the system's temp directory
-    filename = secure_filename(file.filename)
-    temp_file_path = os.path.join(tempfile.gettempdir(), filename)
-    file.save(temp_file_path)
-
-    # Check MIME type to ensure it's CSV
-    mime_type = file.mimetype
-    if mime_type not in ['text/csv', 'application/vnd.ms-excel']:
-        os.remove(temp_file_path)
-        abort(400, "Invalid file type. Only CSV files are allowed")
-
-    # Verify file signature to ensure it’s a CSV file
-    mime = magic.Magic(mime=True)
-    file_signature_type = mime.from_file(temp_file_path)
-    if file_signature_type not in ['text/csv', 'text/plain']:
-        os.remove(temp_file_path)
-        abort(400, "Invalid file signature. Only CSV files are allowed")
-
-    # Limit file size (to 2 MB) to prevent DoS attack
-    if os.path.getsize(temp_file_path) > 2 * 1024 * 1024:
-        os.remove(temp_file_path)
-        abort(413, "File too large")
-
-    # Proceed with processing the CSV content if it passed all checks
-    products_added = 0
+    stream = csv_upload_stream(file)
+
+    # Job mode: hand the file to the background pool and return straight away
+    if get_bool_arg('async'):
+        job = bulk_jobs.submit_job(current_app._get_current_object(), request.user_id, stream)
+        return jsonify({"message": "Bulk upload queued.", "job": job.to_dict()}), 202
+
+    # Stream the rows in batches; invalid rows are reported instead of aborting the file
+    report = IngestReport(max_errors=current_app.config['BULK_UPLOAD_MAX_ERRORS'])
     try:
-        with open(temp_file_path, 'r') as csv_file:
-            reader = csv.DictReader(csv_file)
-            for row in reader:
-                # Validate required fields in each row
-                required_fields = ['name', 'description', 'price', 'stock', 'category_id']
-                for field in required_fields:
-                    if field not in row or not row[field]:
-                        os.remove(temp_file_path)
-                        abort(400, f"Missing required field in CSV: {field}")
-
-                # Parse and validate each field with explicit casting
-                price = float(row['price'])
-                stock = int(row['stock'])
-                stock_threshold = int(row.get('stock_threshold', 10))
-                category_id = int(row['category_id'])
-                subcategory_id = int(row['subcategory_id']) if row.get('subcategory_id') else None
-
-                product = Product(
-                    name=row['name'],
-                    description=row.get('description', ''),
-                    price=price,
-                    stock=stock,
-                    stock_threshold=stock_threshold,
-                    image=row.get('image'),
-                    category_id=category_id,
-                    subcategory_id=subcategory_id
-                )
-                db.session.add(product)
-                products_added += 1
+        ingest_products_csv(stream, batch_size=current_app.config['BULK_UPLOAD_BATCH_SIZE'], report=report)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e), "report": report.to_dict()}), 400
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Bulk upload failed: {str(e)}")
+        return jsonify({"error": "Bulk Upload failed.", "report": report.to_dict()}), 500
 
-        db.session.commit()
+    log_activity(request.user_id, f"Bulk upload by admin {request.user_id} added {report.inserted} products ({report.failed} rows rejected).")
 
-        
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Bulk upload by admin {request.user_id} added {products_added} products.")
-        db.session.add(activity_log)
+    return jsonify({
+        "message": f"Bulk upload finished. {report.inserted} products added.",
+        "report": report.to_dict()
+    }), 201
+
+
+# Poll the progress of a background bulk upload
+@products_bp.route('/bulk_upload/jobs/<job_id>', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def get_bulk_upload_job(job_id):
+    job = bulk_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+# Error report of a background bulk upload
+@products_bp.route('/bulk_upload/jobs/<job_id>/errors', methods=['GET'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def get_bulk_upload_job_errors(job_id):
+    job = bulk_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict(include_errors=True)), 200
+
+
+# Cancel a background bulk upload; rows already committed are kept
+@products_bp.route('/bulk_upload/jobs/<job_id>', methods=['DELETE'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def cancel_bulk_upload_job(job_id):
+    job = bulk_jobs.cancel_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"message": "Cancellation requested", "job": job.to_dict()}), 200
+
+
+# Set promotion for product: a product-scoped promotion, so the list price is kept
+@products_bp.route('/<int:product_id>/set_promotion', methods=['PUT'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def set_promotion(product_id):
+    product = Product.query.get_or_404(product_id)
+    data = request.json
+    # Validate that discounted_price is provided and is less than the original price
+    discounted_price = data.get('discounted_price')
+    if discounted_price is None:
+        abort(400, "Discounted price is required")
+
+    try:
+        discounted_price = Decimal(str(discounted_price)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        abort(400, "Discounted price must be a valid number")
+
+    if discounted_price <= 0:
+        abort(400, "Discounted price must be a positive number")
+    if discounted_price >= product.price:
+        abort(400, "Discounted price must be less than the original price")
+
+    starts_at, ends_at = _promotion_window(data)
+
+    try:
+        promotion = Promotion(
+            name=data.get('name') or f"Promotion for product {product_id}",
+            product_id=product_id,
+            discount_type='Fixed',
+            discount_value=product.price - discounted_price,
+            starts_at=starts_at,
+            ends_at=ends_at
+        )
+        db.session.add(promotion)
+        db.session.flush()
+        promotions.refresh_effective_prices(db.session.connection(), [product_id])
+        record_activity(request.user_id, f"Promotion set for product {product_id} by admin {request.user_id}")
         db.session.commit()
 
-        return jsonify({"message": f"Bulk upload successful. {products_added} products added."}), 201
+        product_data = product.to_dict()
+        product_data['effective_price'] = str(promotions.current_prices([product_id])[product_id])
+        return jsonify({"message": "Promotion set for product", "product": product_data, "promotion": promotion.to_dict()})
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": "Bulk Upload failed."}), 500
-    finally:
-        # Clean up the temporary file
-        os.remove(temp_file_path)
+        return jsonify({"error": "Failed to process request"}), 500
 
 
-# Set promotion for product
-@products_bp.route('/<int:product_id>/set_promotion', methods=['PUT'])
+def _promotion_window(data):
+    try:
+        starts_at = parse_datetime(data['starts_at'], 'starts_at') if data.get('starts_at') else datetime.utcnow()
+        ends_at = parse_datetime(data['ends_at'], 'ends_at') if data.get('ends_at') else None
+    except ValueError as e:
+        abort(400, str(e))
+    if ends_at is not None and ends_at <= starts_at:
+        abort(400, "ends_at must be after starts_at")
+    return starts_at, ends_at
+
+
+# List promotions; ?active=true keeps only those running now
+@products_bp.route('/promotions', methods=['GET'])
 @jwt_required
 @role_required(['SuperAdmin', 'ProductManager'])
-def set_promotion(product_id):
+def get_promotions():
+    query = Promotion.query
+    if get_bool_arg('active'):
+        now = datetime.utcnow()
+        query = query.filter(Promotion.starts_at <= now, or_(Promotion.ends_at.is_(None), Promotion.ends_at > now))
+    return jsonify([promotion.to_dict() for promotion in query.order_by(Promotion.starts_at).all()])
+
+
+# Schedule a promotion for a product, a category or a subcategory
+@products_bp.route('/promotions', methods=['POST'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def add_promotion():
+    if not request.is_json:
+        abort(400, "Request must be JSON")
+    data = request.json
+
+    required_fields = ['name', 'discount_type', 'discount_value']
+    for field in required_fields:
+        if field not in data:
+            abort(400, f"Missing required field: {field}")
+
+    scopes = [field for field in ('product_id', 'category_id', 'subcategory_id') if data.get(field) is not None]
+    if len(scopes) != 1:
+        abort(400, "Exactly one of product_id, category_id or subcategory_id is required")
+    if data['discount_type'] not in ('Percentage', 'Fixed'):
+        abort(400, "discount_type must be Percentage or Fixed")
     try:
-        product = Product.query.get_or_404(product_id)
-        data = request.json
-        # Validate that discounted_price is provided and is less than the original price
-        discounted_price = data.get('discounted_price')
-        if discounted_price is None:
-            abort(400, "Discounted price is required")
-        if float(discounted_price) >= float(product.price):
-            abort(400, "Discounted price must be less than the original price")
-
-        try:
-            discounted_price = float(discounted_price)
-        except (TypeError, ValueError):
-            abort(400, "Discounted price must be a valid number")
-
-        if discounted_price <= 0:
-            abort(400, "Discounted price must be a positive number")
-        if discounted_price >= float(product.price):
-            abort(400, "Discounted price must be less than the original price")
-
-        product.price = discounted_price
+        discount_value = Decimal(str(data['discount_value'])).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        abort(400, "discount_value must be a number")
+    if data['discount_type'] == 'Percentage' and discount_value > 100:
+        abort(400, "A percentage discount cannot exceed 100")
+
+    starts_at, ends_at = _promotion_window(data)
+
+    try:
+        promotion = Promotion(
+            name=data['name'],
+            discount_type=data['discount_type'],
+            discount_value=discount_value,
+            starts_at=starts_at,
+            ends_at=ends_at,
+            **{scopes[0]: data[scopes[0]]}
+        )
+        db.session.add(promotion)
+        db.session.flush()
+        connection = db.session.connection()
+        promotions.refresh_effective_prices(connection, promotions.promotion_product_ids(connection, promotion))
+        record_activity(request.user_id, f"Promotion {promotion.id} scheduled by admin {request.user_id}: {promotion.name}")
         db.session.commit()
 
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Promotion set for product {product_id} by admin {request.user_id}")
-        db.session.add(activity_log)
+        return jsonify(promotion.to_dict()), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to create promotion. Please try again."}), 500
+
+
+# Delete a promotion; affected products fall back to their next best price
+@products_bp.route('/promotions/<int:promotion_id>', methods=['DELETE'])
+@jwt_required
+@role_required(['SuperAdmin', 'ProductManager'])
+def delete_promotion(promotion_id):
+    promotion = Promotion.query.get_or_404(promotion_id)
+    try:
+        connection = db.session.connection()
+        product_ids = promotions.promotion_product_ids(connection, promotion)
+        db.session.delete(promotion)
+        db.session.flush()
+        promotions.refresh_effective_prices(connection, product_ids)
+        record_activity(request.user_id, f"Promotion {promotion_id} deleted by admin {request.user_id}")
         db.session.commit()
 
-        return jsonify({"message": "Promotion set for product", "product": product.to_dict()})
+        return jsonify({"message": "Promotion deleted"}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Failed to process request"}), 500
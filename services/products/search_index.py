@@ -0,0 +1,359 @@
+#authentic_lebanese_sentiment_shop/services/products/search_index.py
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from app import db
+from .models import Product, Category, Subcategory
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Field weights applied to term frequencies before BM25 scoring
+NAME_WEIGHT = 3
+TAXONOMY_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+class ProductSearchIndex:
+    """Inverted index over product name, description and category/subcategory names.
+
+    Postings map each term to {product_id: weighted term frequency}. A sorted
+    term list gives prefix expansion with a binary search.
+
+    A published index is never modified, so searches need no lock: changes are
+    applied to a copy() that then replaces it. The copy shares the per-term
+    postings and per-category member sets with the original and copies each one
+    the first time it changes them (see _owned).
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.terms = []  # Sorted list of indexed terms
+        self.products = {}  # product_id -> (name, description, category_id, subcategory_id)
+        self.doc_terms = {}  # product_id -> Counter of weighted term frequencies
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.category_names = {}
+        self.subcategory_names = {}
+        self.category_members = {}
+        self.subcategory_members = {}
+        self._owned = {}  # id -> postings dict or member set created by this index, safe to modify in place
+
+    def copy(self):
+        index = ProductSearchIndex()
+        index.postings = dict(self.postings)
+        index.terms = list(self.terms)
+        index.products = dict(self.products)
+        index.doc_terms = dict(self.doc_terms)
+        index.doc_lengths = dict(self.doc_lengths)
+        index.total_length = self.total_length
+        index.category_names = dict(self.category_names)
+        index.subcategory_names = dict(self.subcategory_names)
+        index.category_members = dict(self.category_members)
+        index.subcategory_members = dict(self.subcategory_members)
+        return index
+
+    # --- maintenance -----------------------------------------------------
+
+    def _writable(self, mapping, key, empty):
+        """mapping[key] to modify in place: copied first if it may be shared with another index."""
+        value = mapping.get(key)
+        if value is None or id(value) not in self._owned:
+            value = mapping[key] = empty() if value is None else value.copy()
+            self._owned[id(value)] = value
+        return value
+
+    def _document_terms(self, name, description, category_id, subcategory_id):
+        terms = Counter()
+        for token in tokenize(name):
+            terms[token] += NAME_WEIGHT
+        for token in tokenize(description):
+            terms[token] += DESCRIPTION_WEIGHT
+        for token in tokenize(self.category_names.get(category_id)):
+            terms[token] += TAXONOMY_WEIGHT
+        for token in tokenize(self.subcategory_names.get(subcategory_id)):
+            terms[token] += TAXONOMY_WEIGHT
+        return terms
+
+    def _add_term(self, term):
+        position = bisect.bisect_left(self.terms, term)
+        if position == len(self.terms) or self.terms[position] != term:
+            self.terms.insert(position, term)
+
+    def _drop_term(self, term):
+        self._owned.pop(id(self.postings.pop(term)), None)
+        position = bisect.bisect_left(self.terms, term)
+        if position < len(self.terms) and self.terms[position] == term:
+            del self.terms[position]
+
+    def upsert(self, product_id, name, description, category_id, subcategory_id):
+        self.remove(product_id)
+        terms = self._document_terms(name, description, category_id, subcategory_id)
+        for term, frequency in terms.items():
+            if term not in self.postings:
+                self._add_term(term)
+            self._writable(self.postings, term, dict)[product_id] = frequency
+        self.products[product_id] = (name, description, category_id, subcategory_id)
+        self.doc_terms[product_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[product_id] = length
+        self.total_length += length
+        self._writable(self.category_members, category_id, set).add(product_id)
+        if subcategory_id is not None:
+            self._writable(self.subcategory_members, subcategory_id, set).add(product_id)
+
+    def remove(self, product_id):
+        if product_id not in self.products:
+            return
+        _, _, category_id, subcategory_id = self.products.pop(product_id)
+        for term in self.doc_terms.pop(product_id):
+            postings = self._writable(self.postings, term, dict)
+            postings.pop(product_id, None)
+            if not postings:
+                self._drop_term(term)
+        self.total_length -= self.doc_lengths.pop(product_id)
+        self._writable(self.category_members, category_id, set).discard(product_id)
+        if subcategory_id is not None:
+            self._writable(self.subcategory_members, subcategory_id, set).discard(product_id)
+
+    @staticmethod
+    def _set_name(names, key, name):
+        if name is None:
+            names.pop(key, None)
+        else:
+            names[key] = name
+
+    def rename_category(self, category_id, name):
+        """Set a category's name, or drop it when deleted (name None), and re-index its products."""
+        self._set_name(self.category_names, category_id, name)
+        for product_id in list(self.category_members.get(category_id, ())):
+            self.upsert(product_id, *self.products[product_id])
+
+    def rename_subcategory(self, subcategory_id, name):
+        """Set a subcategory's name, or drop it when deleted (name None), and re-index its products."""
+        self._set_name(self.subcategory_names, subcategory_id, name)
+        for product_id in list(self.subcategory_members.get(subcategory_id, ())):
+            self.upsert(product_id, *self.products[product_id])
+
+    # --- querying --------------------------------------------------------
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self.postings else []
+        start = bisect.bisect_left(self.terms, token)
+        end = bisect.bisect_left(self.terms, token + '\uffff')
+        return self.terms[start:end]
+
+    def _score_token(self, token, prefix):
+        """Return {product_id: BM25 score} for one query token (best expansion for prefixes)."""
+        doc_count = len(self.products)
+        average_length = self.total_length / doc_count if doc_count else 0
+        scores = {}
+        for term in self._expand(token, prefix):
+            postings = self.postings[term]
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for product_id, frequency in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[product_id] / average_length)
+                score = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                if score > scores.get(product_id, 0):
+                    scores[product_id] = score
+        return scores
+
+    def search(self, query, limit=20, offset=0, category_id=None):
+        """Rank products matching every query token; the last token also matches as a prefix."""
+        tokens = tokenize(query)
+        if not tokens:
+            return {"total": 0, "results": [], "facets": []}
+
+        per_token = [self._score_token(token, prefix=(i == len(tokens) - 1)) for i, token in enumerate(tokens)]
+        per_token.sort(key=len)
+        candidates = per_token[0]
+        scores = dict(candidates)
+        for token_scores in per_token[1:]:
+            scores = {product_id: score + token_scores[product_id] for product_id, score in scores.items() if product_id in token_scores}
+            if not scores:
+                break
+
+        # Facet counts are computed before the category filter so the UI can show every bucket
+        facets = Counter(self.products[product_id][2] for product_id in scores)
+        if category_id is not None:
+            scores = {product_id: score for product_id, score in scores.items() if self.products[product_id][2] == category_id}
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], -item[0]))[offset:]
+        return {
+            "total": len(scores),
+            "results": [(product_id, round(score, 4)) for product_id, score in top],
+            "facets": [
+                {"category_id": facet_id, "category_name": self.category_names.get(facet_id), "count": count}
+                for facet_id, count in facets.most_common()
+            ]
+        }
+
+
+_lock = threading.Lock()
+_build_lock = threading.Lock()
+_index = None
+_built_at = 0.0
+_journal = None  # Changes committed while a rebuild is running, replayed onto the new index
+
+
+def _load_index():
+    """Build a fresh index from the database, streaming products in chunks."""
+    index = ProductSearchIndex()
+    with db.engine.connect() as connection:
+        index.category_names = dict(connection.execute(select(Category.id, Category.name)).all())
+        index.subcategory_names = dict(connection.execute(select(Subcategory.id, Subcategory.name)).all())
+        rows = connection.execution_options(yield_per=2000).execute(
+            select(Product.id, Product.name, Product.description, Product.category_id, Product.subcategory_id)
+        )
+        for row in rows:
+            index.upsert(*row)
+    return index
+
+
+def _apply(index, change):
+    kind, key, payload = change
+    if kind == 'product':
+        if payload is None:
+            index.remove(key)
+        else:
+            index.upsert(key, *payload)
+    elif kind == 'category':
+        index.rename_category(key, payload)
+    elif kind == 'subcategory':
+        index.rename_subcategory(key, payload)
+
+
+def _publish(index):
+    """Make `index` the live one. From here on it is only read: copies made from it share its containers."""
+    global _index
+    index._owned.clear()
+    _index = index
+
+
+def _is_fresh(max_age):
+    return _index is not None and time.monotonic() - _built_at < max_age
+
+
+def _get_index():
+    global _built_at, _journal
+    max_age = current_app.config['SEARCH_INDEX_MAX_AGE']
+    if _is_fresh(max_age):
+        return _index
+    # Keep serving the stale index while another thread rebuilds it
+    if not _build_lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        if _is_fresh(max_age):
+            return _index
+        with _lock:
+            _journal = []
+        try:
+            index = _load_index()
+        except Exception:
+            with _lock:
+                _journal = None
+            raise
+        with _lock:
+            for change in _journal:
+                _apply(index, change)
+            _publish(index)
+            _built_at, _journal = time.monotonic(), None
+        return _index
+    finally:
+        _build_lock.release()
+
+
+def search(query, limit=20, offset=0, category_id=None):
+    # The index returned is never modified (see ProductSearchIndex), so ranking needs no lock
+    return _get_index().search(query, limit=limit, offset=offset, category_id=category_id)
+
+
+def apply_changes(changes):
+    """Apply committed changes to a copy of the live index and publish it (and to a rebuild in progress)."""
+    with _lock:
+        if _journal is not None:
+            _journal.extend(changes)
+        if _index is not None:
+            index = _index.copy()
+            for change in changes:
+                _apply(index, change)
+            _publish(index)
+
+
+def reindex_products(product_ids):
+    """Reload products written with Core statements (which skip mapper events) into the index."""
+    if _index is None or not product_ids:
+        return
+    product_ids = list(product_ids)
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            select(Product.id, Product.name, Product.description, Product.category_id, Product.subcategory_id)
+            .where(Product.id.in_(product_ids))
+        ).all()
+    found = {row[0]: tuple(row[1:]) for row in rows}
+    apply_changes([('product', product_id, found.get(product_id)) for product_id in product_ids])
+
+
+# Record Product/Category/Subcategory writes on their session; apply them only once it commits
+def _record(target, kind, payload):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('search_index_changes', []).append((kind, target.id, payload))
+
+
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_update')
+def _index_product(mapper, connection, target):
+    _record(target, 'product', (target.name, target.description, target.category_id, target.subcategory_id))
+
+
+@event.listens_for(Product, 'after_delete')
+def _unindex_product(mapper, connection, target):
+    _record(target, 'product', None)
+
+
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+def _index_category(mapper, connection, target):
+    _record(target, 'category', target.name)
+
+
+@event.listens_for(Category, 'after_delete')
+def _unindex_category(mapper, connection, target):
+    _record(target, 'category', None)
+
+
+@event.listens_for(Subcategory, 'after_insert')
+@event.listens_for(Subcategory, 'after_update')
+def _index_subcategory(mapper, connection, target):
+    _record(target, 'subcategory', target.name)
+
+
+@event.listens_for(Subcategory, 'after_delete')
+def _unindex_subcategory(mapper, connection, target):
+    _record(target, 'subcategory', None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_on_commit(session):
+    changes = session.info.pop('search_index_changes', None)
+    if changes:
+        apply_changes(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('search_index_changes', None)
@@ -0,0 +1,15 @@
+#authentic_lebanese_sentiment_shop/services/serialization.py
+
+
+def loaded(instance, names):
+    """A model instance's values for `names`, read straight from its __dict__ when all are loaded.
+
+    Going through the instrumented attributes costs several times more than encoding
+    the result (see benchmarks/json_provider.py), so the serializers of listed models
+    read the instance dict instead. If any of `names` is expired (e.g. after a commit)
+    or not loaded yet, they are all read through getattr, which loads them as usual.
+    """
+    values = instance.__dict__
+    if values.keys() >= names:
+        return values
+    return {name: getattr(instance, name) for name in names}
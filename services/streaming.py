@@ -0,0 +1,32 @@
+#authentic_lebanese_sentiment_shop/services/streaming.py
+from app import db
+
+ROWS_PER_CHUNK = 500  # Records written per yielded chunk of the response body
+STREAM_BATCH_SIZE = 1000  # Rows fetched per round trip from the server-side cursor
+
+
+def row_to_dict(row):
+    return dict(row._mapping)
+
+
+def stream_rows(statement, batch_size=STREAM_BATCH_SIZE):
+    """Yield every row of a Core select through a server-side cursor, so memory stays flat."""
+    with db.engine.connect() as connection:
+        yield from connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+
+
+def generate_ndjson(dumps, statement, records=None):
+    """Stream a Core select as NDJSON, ROWS_PER_CHUNK lines per yielded chunk.
+
+    Each row is written as a dict of its columns, unless `records` is given: a function
+    turning the row iterator into the records to write (e.g. to fold several rows into one).
+    """
+    rows = stream_rows(statement)
+    lines = []
+    for record in (records(rows) if records is not None else map(row_to_dict, rows)):
+        lines.append(dumps(record))
+        if len(lines) >= ROWS_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
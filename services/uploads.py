@@ -0,0 +1,36 @@
+#authentic_lebanese_sentiment_shop/services/uploads.py
+import os
+from flask import abort, current_app
+import magic  # For file signature checking
+
+# Allowed extensions
+ALLOWED_EXTENSIONS = {'csv'}
+CSV_MIME_TYPES = ['text/csv', 'application/vnd.ms-excel']
+CSV_SIGNATURES = ['text/csv', 'text/plain']
+
+
+def allowed_file(filename):
+    """Check if the file has an allowed extension."""
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def csv_upload_stream(file):
+    """Check an uploaded CSV file and return its stream, rewound; aborts with 400 or 413 otherwise."""
+    if not allowed_file(file.filename):
+        abort(400, "Only CSV files are allowed")
+
+    # Check MIME type to ensure it's CSV
+    if file.mimetype not in CSV_MIME_TYPES:
+        abort(400, "Invalid file type. Only CSV files are allowed")
+
+    # Werkzeug already spools large uploads to disk, so sniff the signature from the stream head
+    stream = file.stream
+    if magic.from_buffer(stream.read(2048), mime=True) not in CSV_SIGNATURES:
+        abort(400, "Invalid file signature. Only CSV files are allowed")
+
+    # Limit file size to prevent DoS attack
+    stream.seek(0, os.SEEK_END)
+    if stream.tell() > current_app.config['BULK_UPLOAD_MAX_BYTES']:
+        abort(413, "File too large")
+    stream.seek(0)
+    return stream
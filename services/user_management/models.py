@@ -2,6 +2,7 @@
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.orm import validates
+from ..serialization import loaded
 
 
 class User(db.Model):
@@ -77,6 +78,9 @@ class AdminUser(db.Model):
 
 class ActivityLog(db.Model):
     __tablename__ = 'activity_logs'
+    __table_args__ = (
+        db.Index('ix_activity_logs_admin_id_timestamp', 'admin_id', 'timestamp'),  # An admin's own log, in time order
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey('admin_users.id'), nullable=False)
@@ -86,10 +90,13 @@ class ActivityLog(db.Model):
     def __repr__(self):
         return f"<ActivityLog {self.action} by Admin {self.admin_id} at {self.timestamp}>"
 
+    _serialized = frozenset(('id', 'admin_id', 'action', 'timestamp'))
+
     def to_dict(self):
+        values = loaded(self, self._serialized)
         return {
-            "id": self.id,
-            "admin_id": self.admin_id,
-            "action": self.action,
-            "timestamp": self.timestamp.isoformat()  # Converts datetime to a string
+            "id": values['id'],
+            "admin_id": values['admin_id'],
+            "action": values['action'],
+            "timestamp": values['timestamp'].isoformat()  # Converts datetime to a string
         }
\ No newline at end of file
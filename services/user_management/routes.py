@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from app import db
 # , limiter
 from .models import User, AdminUser, ActivityLog
+from ..audit import log_activity, flush as flush_audit_log
 from .utils import validate_email, validate_password, is_email_exist, is_username_exist, validate_username
 import secrets
 from flask import make_response
@@ -180,9 +181,7 @@ def create_admin():
         db.session.commit()
 
         # Log the admin creation
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Created admin {admin.username}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Created admin {admin.username}")
 
         return jsonify({"message": "Admin created", "admin": admin.to_dict()}), 201
     except Exception as e:
@@ -240,9 +239,7 @@ def update_user_profile(user_id):
         # Only log if the user has an admin role
         if request.user_role in ['SuperAdmin', 'Admin']:
             action_details = f"Updated fields: {', '.join(changes)}"
-            activity_log = ActivityLog(admin_id=request.user_id, action=f"Updated user profile {user_id}. {action_details}")
-            db.session.add(activity_log)
-            db.session.commit()
+            log_activity(request.user_id, f"Updated user profile {user_id}. {action_details}")
 
         return jsonify(user.to_dict())
     except Exception as e:
@@ -274,9 +271,7 @@ def delete_user(user_id):
 
         # Log deletion only if performed by an admin
         if request.user_role == 'SuperAdmin':
-            activity_log = ActivityLog(admin_id=request.user_id, action=f"Deleted user {user_id}")
-            db.session.add(activity_log)
-            db.session.commit()
+            log_activity(request.user_id, f"Deleted user {user_id}")
         
         return jsonify({"message": "User deleted"})
     except Exception as e:
@@ -318,9 +313,7 @@ def update_admin_user(user_id):
 
         db.session.commit()
 
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Updated admin {user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Updated admin {user_id}")
 
         return jsonify(admin_user.to_dict()), 200
     except Exception as e:
@@ -339,9 +332,7 @@ def delete_admin_user(user_id):
         db.session.delete(admin_user)
         db.session.commit()
 
-        activity_log = ActivityLog(admin_id=request.user_id, action=f"Deleted admin {user_id}")
-        db.session.add(activity_log)
-        db.session.commit()
+        log_activity(request.user_id, f"Deleted admin {user_id}")
 
         return jsonify({"message": "Admin user deleted successfully"}), 200
     except Exception as e:
@@ -352,6 +343,8 @@ def delete_admin_user(user_id):
 @users_bp.route('/admin/activity_logs', methods=['GET'])
 @jwt_required
 def get_activity_logs():
+    # Write out events still buffered in this process so admins see their latest actions
+    flush_audit_log()
     if request.user_role == 'SuperAdmin':
         logs = ActivityLog.query.all()  # SuperAdmin can access all logs
     elif request.user_role in ['InventoryManager', 'OrderManager', 'ProductManager']:
@@ -0,0 +1,34 @@
+#authentic_lebanese_sentiment_shop/tests/test_audit.py
+import glob
+import json
+from sqlalchemy import select, func
+
+
+def _count(db, action_prefix):
+    from services.user_management.models import ActivityLog
+    with db.engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(ActivityLog).where(ActivityLog.action.like(f"{action_prefix}%"))
+        ).scalar()
+
+
+def test_rejected_events_are_dead_lettered_without_blocking_the_queue(db, admin):
+    from services import audit
+
+    audit.log_activity(admin.id, 'audit-test before')
+    audit.log_activity(None, 'audit-test poison')  # admin_id is NOT NULL, as a deleted admin's id would fail the FK
+    audit.log_activity(admin.id, 'audit-test after')
+    audit.flush()
+
+    writer = audit._get_writer()
+    assert _count(db, 'audit-test ') == 2
+    assert not glob.glob(f"{glob.escape(writer.spool_path)}.*.flushing")
+    failed = glob.glob(f"{glob.escape(writer.spool_path)}.*.failed")
+    assert len(failed) == 1
+    with open(failed[0], encoding='utf-8') as dead_letters:
+        assert [json.loads(line)['action'] for line in dead_letters] == ['audit-test poison']
+
+    # Later batches still go through
+    audit.log_activity(admin.id, 'audit-test later')
+    audit.flush()
+    assert _count(db, 'audit-test ') == 3
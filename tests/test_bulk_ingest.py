@@ -0,0 +1,44 @@
+#authentic_lebanese_sentiment_shop/tests/test_bulk_ingest.py
+import io
+from sqlalchemy import event, insert, select, func
+
+
+def test_batch_touches_only_its_own_products(db):
+    from services.products.bulk_ingest import ingest_products_csv
+    from services.products.models import Category, Product
+    from services.inventory.models import Inventory, StockMovement
+
+    with db.engine.begin() as connection:
+        category_id = connection.execute(insert(Category.__table__).values(name='ingest-category')).inserted_primary_key[0]
+    other = {}
+
+    # Another writer's product commits between the batch's id snapshot and its INSERT
+    def other_writer(connection, clauseelement, multiparams, params, execution_options):
+        if not other and getattr(clauseelement, 'table', None) is Product.__table__ and clauseelement.is_insert:
+            other['id'] = None
+            other['id'] = connection.execute(insert(Product.__table__).values(
+                name='ingest-other-writer', description='d', price=1, stock=7, category_id=category_id
+            )).inserted_primary_key[0]
+    event.listen(db.engine, 'before_execute', other_writer)
+    try:
+        csv = "name,description,price,stock,category_id\n" + "".join(
+            f"ingest-product-{i},d,5.00,{i + 1},{category_id}\n" for i in range(3)
+        )
+        report = ingest_products_csv(io.BytesIO(csv.encode('utf-8')))
+    finally:
+        event.remove(db.engine, 'before_execute', other_writer)
+
+    assert report.inserted == 3 and other
+    with db.engine.connect() as connection:
+        new_ids = list(connection.execute(select(Product.id).where(Product.name.like('ingest-product-%'))).scalars())
+        inventory = dict(connection.execute(
+            select(Inventory.product_id, func.count()).where(Inventory.product_id.in_(new_ids + [other['id']]))
+            .group_by(Inventory.product_id)
+        ).all())
+        receipts = dict(connection.execute(
+            select(StockMovement.product_id, func.sum(StockMovement.delta))
+            .where(StockMovement.product_id.in_(new_ids + [other['id']]), StockMovement.reason == 'Receipt')
+            .group_by(StockMovement.product_id)
+        ).all())
+    assert inventory == {product_id: 1 for product_id in new_ids}
+    assert sorted(receipts.values()) == [1, 2, 3] and other['id'] not in receipts
@@ -0,0 +1,119 @@
+#authentic_lebanese_sentiment_shop/tests/test_bulk_stock.py
+import io
+from sqlalchemy import insert, select, func
+from conftest import CSRF_HEADERS
+
+
+def _seed(db, name):
+    """Two products: the first stocked at two locations (10 + 5), the second at one (8)."""
+    from services.products.models import Category, Product
+    from services.inventory.models import Inventory
+
+    with db.engine.begin() as connection:
+        category_id = connection.execute(insert(Category.__table__).values(name=f"{name}-category")).inserted_primary_key[0]
+        first, second = [
+            connection.execute(insert(Product.__table__).values(
+                name=f"{name}-{i}", description='d', price=10, stock=stock, category_id=category_id
+            )).inserted_primary_key[0]
+            for i, stock in enumerate((15, 8))
+        ]
+        connection.execute(insert(Inventory.__table__), [
+            {"product_id": first, "location": 'Main Warehouse', "stock_level": 10},
+            {"product_id": first, "location": 'Beirut', "stock_level": 5},
+            {"product_id": second, "location": 'Main Warehouse', "stock_level": 8},
+        ])
+    return first, second
+
+
+def _stock(db, product_ids):
+    """({product_id: products.stock}, {(product_id, location): stock_level})."""
+    from services.products.models import Product
+    from services.inventory.models import Inventory
+
+    with db.engine.connect() as connection:
+        totals = dict(connection.execute(select(Product.id, Product.stock).where(Product.id.in_(product_ids))).all())
+        levels = {
+            (product_id, location): level
+            for product_id, location, level in connection.execute(
+                select(Inventory.product_id, Inventory.location, Inventory.stock_level).where(Inventory.product_id.in_(product_ids))
+            )
+        }
+    return totals, levels
+
+
+def _sums(levels):
+    totals = {}
+    for (product_id, _), level in levels.items():
+        totals[product_id] = totals.get(product_id, 0) + level
+    return totals
+
+
+def test_json_changes_are_applied_in_order_with_a_result_per_row(client, db):
+    first, second = _seed(db, 'bulk-stock-json')
+    response = client.post('/inventory/bulk_update_stock', json={"changes": [
+        {"product_id": first, "location": 'Beirut', "delta": -2},
+        {"product_id": first, "location": 'Main Warehouse', "stock_level": 20},
+        {"product_id": second, "location": 'Tyre', "stock_level": 4},  # A new location
+        {"product_id": second, "location": 'Tyre', "delta": 3},  # Sees the row above
+        {"product_id": second, "location": 'Sidon', "delta": 1},
+        {"product_id": first, "location": 'Main Warehouse', "delta": -100},
+        {"product_id": first, "location": 'Beirut'},
+        {"product_id": 999999, "location": 'Beirut', "stock_level": 1},
+    ]}, headers=CSRF_HEADERS)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["applied"], body["failed"]) == (4, 4)
+    assert body["results"] == [
+        {"row": 1, "product_id": first, "location": 'Beirut', "stock_level": 3},
+        {"row": 2, "product_id": first, "location": 'Main Warehouse', "stock_level": 20},
+        {"row": 3, "product_id": second, "location": 'Tyre', "stock_level": 4},
+        {"row": 4, "product_id": second, "location": 'Tyre', "stock_level": 7},
+        {"row": 5, "product_id": second, "location": 'Sidon', "error": 'No inventory for this product at this location'},
+        {"row": 6, "product_id": first, "location": 'Main Warehouse', "error": 'Not enough stock (20 available)'},
+        {"row": 7, "error": 'Provide exactly one of stock_level or delta'},
+        {"row": 8, "product_id": 999999, "location": 'Beirut', "error": 'Product not found'},
+    ]
+
+    totals, levels = _stock(db, [first, second])
+    assert levels == {(first, 'Main Warehouse'): 20, (first, 'Beirut'): 3, (second, 'Main Warehouse'): 8, (second, 'Tyre'): 7}
+    assert totals == _sums(levels) == {first: 23, second: 15}
+
+
+def test_csv_upload_mixes_absolute_and_delta_rows(client, db):
+    first, second = _seed(db, 'bulk-stock-csv')
+    content = (
+        "product_id,location,stock_level,delta\n"
+        f"{first},Main Warehouse,,5\n"
+        f"{first},Beirut,0,\n"
+        f"{second},Main Warehouse,,-9\n"
+        f"{second},Main Warehouse,2,\n"
+        f"{second},Main Warehouse,1,1\n"
+    )
+    response = client.post('/inventory/bulk_update_stock', data={
+        'file': (io.BytesIO(content.encode('utf-8')), 'stock.csv', 'text/csv')
+    }, content_type='multipart/form-data', headers=CSRF_HEADERS)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["applied"], body["failed"]) == (3, 2)
+    # CSV rows are numbered by their line in the file, the header being line 1
+    assert body["results"] == [
+        {"row": 2, "product_id": first, "location": 'Main Warehouse', "stock_level": 15},
+        {"row": 3, "product_id": first, "location": 'Beirut', "stock_level": 0},
+        {"row": 4, "product_id": second, "location": 'Main Warehouse', "error": 'Not enough stock (8 available)'},
+        {"row": 5, "product_id": second, "location": 'Main Warehouse', "stock_level": 2},
+        {"row": 6, "error": 'Provide exactly one of stock_level or delta'},
+    ]
+
+    totals, levels = _stock(db, [first, second])
+    assert levels == {(first, 'Main Warehouse'): 15, (first, 'Beirut'): 0, (second, 'Main Warehouse'): 2}
+    assert totals == _sums(levels) == {first: 15, second: 2}
+
+
+def test_malformed_requests_are_rejected_whole(client, db):
+    first, _ = _seed(db, 'bulk-stock-bad')
+    missing_column = client.post('/inventory/bulk_update_stock', data={
+        'file': (io.BytesIO(f"product_id,stock_level\n{first},3\n".encode('utf-8')), 'stock.csv', 'text/csv')
+    }, content_type='multipart/form-data', headers=CSRF_HEADERS)
+    assert missing_column.status_code == 400
+    assert client.post('/inventory/bulk_update_stock', json={"changes": []}, headers=CSRF_HEADERS).status_code == 400
+    assert _stock(db, [first])[0] == {first: 15}
@@ -0,0 +1,52 @@
+#authentic_lebanese_sentiment_shop/tests/test_bulk_update.py
+from sqlalchemy import insert, select
+from conftest import CSRF_HEADERS
+
+
+def _seed(db):
+    from services.products.models import Category, Subcategory, Product
+
+    with db.engine.begin() as connection:
+        category_ids = [
+            connection.execute(insert(Category.__table__).values(name=f"bulk-update-category-{i}")).inserted_primary_key[0]
+            for i in range(2)
+        ]
+        subcategory_ids = [
+            connection.execute(insert(Subcategory.__table__).values(name='bulk-update-sub', category_id=category_id)).inserted_primary_key[0]
+            for category_id in category_ids
+        ]
+        product_id = connection.execute(insert(Product.__table__).values(
+            name='bulk-update-product', description='d', price=10, stock=0, category_id=category_ids[0]
+        )).inserted_primary_key[0]
+    return product_id, subcategory_ids
+
+
+def _subcategory(db, product_id):
+    from services.products.models import Product
+    with db.engine.connect() as connection:
+        return connection.execute(select(Product.subcategory_id).where(Product.id == product_id)).scalar()
+
+
+def test_subcategory_must_exist_under_the_products_category(client, db):
+    product_id, (own, foreign) = _seed(db)
+    missing = foreign + 1000
+
+    for subcategory_id in (foreign, missing):
+        by_id = client.put('/products/bulk_update', json={
+            "updates": [{"id": product_id, "subcategory_id": subcategory_id}]
+        }, headers=CSRF_HEADERS)
+        assert by_id.status_code == 400
+        by_filter = client.put('/products/bulk_update', json={
+            "filter": {"ids": [product_id]}, "patch": {"subcategory_id": subcategory_id}
+        }, headers=CSRF_HEADERS)
+        assert by_filter.status_code == 400
+        single = client.put(f'/products/{product_id}', json={"subcategory_id": subcategory_id}, headers=CSRF_HEADERS)
+        assert single.status_code == 400
+        assert _subcategory(db, product_id) is None
+
+    assert client.put('/products/bulk_update', json={
+        "updates": [{"id": product_id, "subcategory_id": own}]
+    }, headers=CSRF_HEADERS).status_code == 200
+    assert _subcategory(db, product_id) == own
+    assert client.put(f'/products/{product_id}', json={"subcategory_id": None}, headers=CSRF_HEADERS).status_code == 200
+    assert _subcategory(db, product_id) is None
@@ -0,0 +1,58 @@
+#authentic_lebanese_sentiment_shop/tests/test_idempotency.py
+import io
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from conftest import CSRF_HEADERS
+
+
+def _headers(key):
+    return {**CSRF_HEADERS, 'Idempotency-Key': key}
+
+
+def _upload(client, key, content):
+    return client.post('/inventory/bulk_update_stock', data={
+        'file': (io.BytesIO(content), 'stock.csv', 'text/csv')
+    }, content_type='multipart/form-data', headers=_headers(key))
+
+
+def test_uploads_are_fingerprinted_by_content(client):
+    first = _upload(client, 'upload-key', b"product_id,location,stock_level\n999999,Beirut,5\n")
+    assert first.status_code == 200
+
+    replayed = _upload(client, 'upload-key', b"product_id,location,stock_level\n999999,Beirut,5\n")
+    assert replayed.status_code == 200
+    assert replayed.headers.get('Idempotent-Replayed') == 'true'
+
+    # Same field and file name, different rows
+    changed = _upload(client, 'upload-key', b"product_id,location,stock_level\n999999,Beirut,7\n")
+    assert changed.status_code == 422
+
+
+def test_lapsed_lease_lets_a_retry_take_the_key_over(client, db):
+    from services.idempotency import IdempotencyKey
+
+    def stored_keys():
+        with db.engine.connect() as connection:
+            return set(connection.execute(select(IdempotencyKey.key)).scalars())
+
+    body = {"changes": [{"product_id": 999999, "location": 'Beirut', "stock_level": 1}]}
+    before = stored_keys()
+    assert client.post('/inventory/bulk_update_stock', json=body, headers=_headers('lease-key')).status_code == 200
+    (key,) = stored_keys() - before
+
+    def in_flight(lease_until):
+        # As if the original request were still running, or its worker had died, holding the key until `lease_until`
+        with db.engine.begin() as connection:
+            connection.execute(update(IdempotencyKey.__table__).where(IdempotencyKey.key == key).values(
+                status_code=None, body=None, processing_until=lease_until, expires_at=lease_until
+            ))
+
+    in_flight(datetime.utcnow() + timedelta(minutes=5))
+    assert client.post('/inventory/bulk_update_stock', json=body, headers=_headers('lease-key')).status_code == 409
+
+    in_flight(datetime.utcnow() - timedelta(seconds=1))
+    retried = client.post('/inventory/bulk_update_stock', json=body, headers=_headers('lease-key'))
+    assert retried.status_code == 200
+    assert 'Idempotent-Replayed' not in retried.headers
+    replayed = client.post('/inventory/bulk_update_stock', json=body, headers=_headers('lease-key'))
+    assert replayed.headers.get('Idempotent-Replayed') == 'true'
@@ -0,0 +1,50 @@
+#authentic_lebanese_sentiment_shop/tests/test_json_provider.py
+import json
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import insert
+from json_provider import OrjsonProvider
+
+PAYLOAD = {
+    "naive": datetime(2026, 3, 1, 14, 5, 9, 123456),
+    "aware": datetime(2026, 3, 1, 23, 30, tzinfo=timezone(timedelta(hours=2))),
+    "day": date(2026, 2, 28),
+    "price": Decimal('19.90'),
+    "nested": [{"b": 1, "a": None}, "text", 1.5],
+}
+
+
+def test_output_matches_the_default_provider(app):
+    default, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+    assert json.loads(fast.dumps(PAYLOAD)) == json.loads(default.dumps(PAYLOAD))
+    assert json.loads(fast.dumps(PAYLOAD))["naive"] == 'Sun, 01 Mar 2026 14:05:09 GMT'
+    assert json.loads(fast.dumps(PAYLOAD))["aware"] == 'Sun, 01 Mar 2026 21:30:00 GMT'
+    with app.test_request_context():
+        assert json.loads(fast.response(PAYLOAD).get_data()) == json.loads(default.response(PAYLOAD).get_data())
+
+
+def test_dumps_arguments_are_honored(app):
+    fast = OrjsonProvider(app)
+    assert fast.dumps({"b": 1, "a": 2}) == '{"b":1,"a":2}'
+    assert fast.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a":2,"b":1}'
+    assert fast.dumps({"a": [1]}, indent=2) == json.dumps({"a": [1]}, indent=2)
+    # No orjson option for these, so the standard library encoder writes them
+    assert fast.dumps({"a": [1]}, indent=4) == json.dumps({"a": [1]}, indent=4)
+    assert fast.dumps({"a": 1, "b": 'é'}, separators=(',', ':')) == '{"a":1,"b":"\\u00e9"}'
+    assert fast.loads('{"a": 1.5}', parse_float=Decimal) == {"a": Decimal('1.5')}
+
+
+def test_serializers_reload_expired_attributes(db):
+    from services.products.models import Category, Product
+
+    with db.engine.begin() as connection:
+        category_id = connection.execute(insert(Category.__table__).values(name='serializer-category')).inserted_primary_key[0]
+    product = Product(name='serializer-product', description='d', price=Decimal('4.50'), stock=0, category_id=category_id)
+    db.session.add(product)
+    db.session.commit()  # Expires every attribute
+
+    assert 'price' not in product.__dict__
+    first = product.to_dict(score=1.0)
+    assert (first["id"], first["price"], first["score"]) == (product.id, '4.50', 1.0)
+    assert product.to_dict() == {key: value for key, value in first.items() if key != 'score'}
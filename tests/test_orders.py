@@ -0,0 +1,51 @@
+#authentic_lebanese_sentiment_shop/tests/test_orders.py
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+
+
+@pytest.fixture(scope='module')
+def dated_orders(db):
+    """Orders of one user: some sharing a date, some without one. Returns their ids."""
+    from services.user_management.models import User
+    from services.orders.models import Order
+
+    now = datetime(2026, 1, 1)
+    dates = [now, now, None, now - timedelta(days=1), None, now + timedelta(days=1), None]
+    with db.engine.begin() as connection:
+        user_id = connection.execute(insert(User.__table__).values(
+            username='paging-user', email='paging-user@example.com', password_hash='x'
+        )).inserted_primary_key[0]
+        ids = [
+            connection.execute(insert(Order.__table__).values(
+                user_id=user_id, total_price=1, status='Pending', delivery_option='Standard', order_date=date
+            )).inserted_primary_key[0]
+            for date in dates
+        ]
+    return user_id, dict(zip(ids, dates))
+
+
+def _all_pages(client, url):
+    ids, cursor = [], None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200, response.get_json()
+        page = response.get_json()
+        ids.extend(order["id"] for order in page["orders"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize('order', ['desc', 'asc'])
+def test_order_date_paging_handles_undated_orders(client, dated_orders, order):
+    user_id, dates = dated_orders
+    # Undated orders sort as the oldest, ties broken by id
+    oldest_first = sorted(dates, key=lambda order_id: (dates[order_id] is not None, dates[order_id] or datetime.min, order_id))
+    expected = oldest_first[::-1] if order == 'desc' else oldest_first
+
+    assert _all_pages(client, f'/orders/?user_id={user_id}&sort=order_date&order={order}&limit=2') == expected
+
+
+def test_unknown_sort_order_is_rejected(client):
+    assert client.get('/orders/?sort=order_date&order=sideways').status_code == 400
@@ -0,0 +1,25 @@
+#authentic_lebanese_sentiment_shop/tests/test_pagination.py
+from datetime import datetime
+import pytest
+from services.pagination import parse_datetime
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-03-01', datetime(2026, 3, 1)),
+    ('2026-03-01T10:30:00', datetime(2026, 3, 1, 10, 30)),
+    ('2026-03-01T10:30:00Z', datetime(2026, 3, 1, 10, 30)),
+    ('2026-03-01T12:30:00+02:00', datetime(2026, 3, 1, 10, 30)),
+])
+def test_parse_datetime_returns_naive_utc(value, expected):
+    assert parse_datetime(value, 'at') == expected
+
+
+def test_parse_datetime_names_the_field():
+    with pytest.raises(ValueError, match='date_from must be an ISO 8601 date/time'):
+        parse_datetime('last tuesday', 'date_from')
+
+
+def test_date_arguments_share_the_parser(client):
+    assert client.get('/orders/?date_from=2026-03-01T10:30:00Z').status_code == 200
+    response = client.get('/orders/?date_from=last-tuesday')
+    assert response.status_code == 400
@@ -0,0 +1,227 @@
+#authentic_lebanese_sentiment_shop/tests/test_query_plans.py
+# EXPLAIN regression tests for the hot read paths. Each test calls the real route,
+# captures the SELECTs it issues, and checks the database's plan for the table under
+# test: it must be read through one of the expected indexes, never by a full scan.
+import datetime
+import random
+import re
+import pytest
+from sqlalchemy import event, insert, text
+from conftest import CSRF_HEADERS
+
+USERS = 200
+ADMINS = 20
+PRODUCTS = 3000
+ORDERS = 20000
+CATEGORIES = 20
+LOCATIONS = ['Main Warehouse', 'Beirut', 'Tripoli']
+
+
+@pytest.fixture(scope='module')
+def seeded(app, db, admin):
+    """A catalog, order history and return queue large enough for the planner to prefer indexes."""
+    from services.user_management.models import User, AdminUser, ActivityLog
+    from services.products.models import Category, Product
+    from services.orders.models import Order, OrderItem, Return
+    from services.inventory.models import Inventory
+
+    rng = random.Random(19)
+    now = datetime.datetime.utcnow()
+    with db.engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"username": f"plan-user-{i}", "email": f"plan-user-{i}@example.com", "password_hash": "x"}
+            for i in range(USERS)
+        ])
+        user_ids = [row[0] for row in connection.execute(text(
+            "SELECT id FROM users WHERE username LIKE 'plan-user-%'"))]
+        connection.execute(insert(Category.__table__), [{"name": f"plan-category-{i}"} for i in range(CATEGORIES)])
+        category_ids = [row[0] for row in connection.execute(text(
+            "SELECT id FROM categories WHERE name LIKE 'plan-category-%'"))]
+        connection.execute(insert(Product.__table__), [
+            {"name": f"plan-product-{i:05d}", "description": "d", "price": rng.randint(1, 500), "stock": 30,
+             "stock_threshold": 10, "category_id": rng.choice(category_ids)}
+            for i in range(PRODUCTS)
+        ])
+        product_ids = [row[0] for row in connection.execute(text(
+            "SELECT id FROM products WHERE name LIKE 'plan-product-%'"))]
+        connection.execute(insert(Inventory.__table__), [
+            {"product_id": product_id, "location": location, "stock_level": 10}
+            for product_id in product_ids for location in LOCATIONS
+        ])
+        connection.execute(insert(Order.__table__), [
+            {"user_id": rng.choice(user_ids), "total_price": 10,
+             "status": rng.choice(['Pending', 'Processing', 'Shipped', 'Delivered', 'Canceled']),
+             "delivery_option": 'Standard', "order_date": now - datetime.timedelta(minutes=i)}
+            for i in range(ORDERS)
+        ])
+        order_ids = [row[0] for row in connection.execute(text("SELECT id FROM orders"))]
+        connection.execute(insert(OrderItem.__table__), [
+            {"order_id": order_id, "product_id": rng.choice(product_ids), "quantity": 1, "price": 10}
+            for order_id in order_ids for _ in range(2)
+        ])
+        item_ids = [row[0] for row in connection.execute(text("SELECT id FROM order_items"))]
+        connection.execute(insert(Return.__table__), [
+            {"order_item_id": item_id, "reason": "r", "status": 'Pending' if i % 20 == 0 else 'Approved',
+             "created_at": now - datetime.timedelta(minutes=i)}
+            for i, item_id in enumerate(rng.sample(item_ids, 4000))
+        ])
+        connection.execute(insert(AdminUser.__table__), [
+            {"username": f"plan-admin-{i}", "email": f"plan-admin-{i}@example.com", "password_hash": "x",
+             "role": 'InventoryManager'}
+            for i in range(ADMINS)
+        ])
+        admin_ids = [row[0] for row in connection.execute(text("SELECT id FROM admin_users"))]
+        connection.execute(insert(ActivityLog.__table__), [
+            {"admin_id": admin_ids[i % len(admin_ids)], "action": f"plan action {i}", "timestamp": now}
+            for i in range(ADMINS * 100)
+        ])
+    _analyze(db)
+    return {"user_ids": user_ids, "category_ids": category_ids, "product_ids": product_ids, "order_ids": order_ids}
+
+
+def _analyze(db):
+    """Refresh the planner statistics, as a production database would have them."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as connection:
+        if dialect == 'mysql':
+            for table in ('users', 'products', 'inventory', 'orders', 'order_items', 'returns', 'activity_logs'):
+                connection.exec_driver_sql(f'ANALYZE TABLE {table}')
+        else:
+            connection.exec_driver_sql('ANALYZE')
+
+
+@pytest.fixture
+def captured(db):
+    """Collect the (statement, parameters) of every SELECT sent to the database."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+
+def _plan(db, statement, parameters):
+    """[(table, index or None, full_scan)] for every table access in the statement's plan."""
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as connection:
+        if dialect == 'sqlite':
+            rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+            accesses = []
+            for row in rows:
+                detail = row[-1]
+                match = re.match(r'(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?(?:INDEX (\w+)|(INTEGER PRIMARY KEY)))?', detail)
+                if match:
+                    kind, table, index, rowid = match.groups()
+                    index = index or ('PRIMARY' if rowid else None)
+                    accesses.append((table, index, kind == 'SCAN' and index is None))
+            return accesses
+        if dialect == 'mysql':
+            rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().all()
+            return [(row['table'], row['key'], row['type'] == 'ALL') for row in rows]
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).all()
+        accesses = []
+        for (line,) in rows:
+            match = re.search(r'(Seq Scan|Index Scan|Index Only Scan|Bitmap Index Scan) on (\w+)(?: using (\w+))?', line)
+            if match:
+                kind, name, index = match.groups()
+                accesses.append((name, index or (name if 'Bitmap' in kind else None), kind == 'Seq Scan'))
+        return accesses
+
+
+def _statements_on(statements, table):
+    pattern = re.compile(rf'\bFROM\s+["`]?{table}["`]?\b|\bJOIN\s+["`]?{table}["`]?\b', re.IGNORECASE)
+    return [(statement, parameters) for statement, parameters in statements if pattern.search(statement)]
+
+
+def _is_primary_key(index):
+    return index in ('PRIMARY',) or index.endswith('_pkey')
+
+
+def assert_uses_index(db, statements, table, indexes):
+    """No captured SELECT scans `table`, and at least one reads it through one of `indexes`.
+
+    Lookups by primary key (e.g. loading the rows of a page by id) are always accepted.
+    """
+    matching = _statements_on(statements, table)
+    assert matching, f"no SELECT on {table} was issued"
+    used = set()
+    for statement, parameters in matching:
+        accesses = [access for access in _plan(db, statement, parameters) if access[0] == table]
+        assert accesses, f"{table} missing from the plan of: {statement}"
+        for _, index, full_scan in accesses:
+            assert not full_scan, f"full scan of {table} in: {statement}"
+            assert index is not None, f"{table} read without an index in: {statement}"
+            expected = any(index.startswith(name) for name in indexes)
+            assert expected or _is_primary_key(index), \
+                f"{table} read through {index!r}, expected one of {indexes}, in: {statement}"
+            used.add(index)
+    assert any(index.startswith(name) for index in used for name in indexes), \
+        f"{table} never read through any of {indexes}; used {sorted(used)}"
+
+
+def test_orders_of_a_user_by_status(client, db, seeded, captured):
+    user_id = seeded["user_ids"][0]
+    response = client.get(f'/orders/?user_id={user_id}&status=Pending')
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'orders', ['ix_orders_user_id_status_order_date'])
+
+
+def test_orders_by_status_newest_first(client, db, seeded, captured):
+    response = client.get('/orders/?status=Shipped&sort=order_date&order=desc&limit=50')
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'orders', ['ix_orders_status_order_date'])
+
+
+def test_orders_in_a_date_range(client, db, seeded, captured):
+    date_from = (datetime.datetime.utcnow() - datetime.timedelta(hours=2)).isoformat()
+    response = client.get(f'/orders/?date_from={date_from}&sort=order_date')
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'orders', ['ix_orders_order_date', 'ix_orders_status_order_date'])
+
+
+def test_order_page_loads_items_by_order(client, db, seeded, captured):
+    response = client.get('/orders/?limit=100')
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'order_items', ['ix_order_items_order_id'])
+
+
+def test_pending_returns_queue(client, db, seeded, captured):
+    response = client.get('/orders/returns?status=Pending&limit=50')
+    assert response.status_code == 200
+    assert response.get_json()["returns"]
+    assert_uses_index(db, captured, 'returns', ['ix_returns_status_id'])
+
+
+def test_inventory_by_product_and_location(client, db, seeded, captured):
+    product_id = seeded["product_ids"][0]
+    response = client.post('/inventory/update_stock', json={
+        "product_id": product_id, "location": 'Beirut', "stock_level": 12
+    }, headers=CSRF_HEADERS)
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'inventory', ['uq_inventory_product_id_location', 'sqlite_autoindex_inventory'])
+
+
+def test_inventory_listing_by_location(client, db, seeded, captured):
+    response = client.get('/inventory/all?location=Tripoli&limit=50')
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'inventory', ['ix_inventory_location', 'PRIMARY', 'inventory_pkey'])
+
+
+def test_catalog_keyset_by_category(client, db, seeded, captured):
+    category_id = seeded["category_ids"][0]
+    first = client.get(f'/products/?category_id={category_id}&limit=20').get_json()
+    assert first["next_cursor"]
+    captured.clear()
+    response = client.get(f'/products/?category_id={category_id}&limit=20&cursor={first["next_cursor"]}')
+    assert response.status_code == 200
+    assert_uses_index(db, captured, 'products', ['ix_products_category_id'])
+
+
+def test_admin_activity_log(db, seeded, admin, captured):
+    # The query /user/activity_logs runs for a non-SuperAdmin reading their own log
+    from services.user_management.models import ActivityLog
+    ActivityLog.query.filter_by(admin_id=admin.id).all()
+    assert_uses_index(db, captured, 'activity_logs', ['ix_activity_logs_admin_id_timestamp'])
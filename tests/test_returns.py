@@ -0,0 +1,125 @@
+#authentic_lebanese_sentiment_shop/tests/test_returns.py
+import pytest
+from sqlalchemy import insert, select, func
+from conftest import CSRF_HEADERS
+
+STOCK = 20
+
+
+def _seed(db, name, count):
+    from services.products.models import Category, Product
+    from services.inventory.models import Inventory
+
+    with db.engine.begin() as connection:
+        category_id = connection.execute(insert(Category.__table__).values(name=f"{name}-category")).inserted_primary_key[0]
+        product_ids = [
+            connection.execute(insert(Product.__table__).values(
+                name=f"{name}-{i}", description='d', price=10, stock=STOCK, category_id=category_id
+            )).inserted_primary_key[0]
+            for i in range(count)
+        ]
+        connection.execute(insert(Inventory.__table__), [
+            {"product_id": product_id, "location": 'Main Warehouse', "stock_level": STOCK} for product_id in product_ids
+        ])
+    return product_ids
+
+
+def _stock(db, product_ids):
+    from services.products.models import Product
+    from services.inventory.models import Inventory
+
+    with db.engine.connect() as connection:
+        totals = dict(connection.execute(select(Product.id, Product.stock).where(Product.id.in_(product_ids))).all())
+        levels = dict(connection.execute(
+            select(Inventory.product_id, func.sum(Inventory.stock_level))
+            .where(Inventory.product_id.in_(product_ids))
+            .group_by(Inventory.product_id)
+        ).all())
+    return totals, levels
+
+
+def _rollup(db, product_ids):
+    """{product_id: (units_sold, units_returned)}, products with nothing sold or returned left out."""
+    from services.orders.models import ProductSalesDaily
+
+    with db.engine.connect() as connection:
+        return {
+            product_id: (int(sold), int(returned))
+            for product_id, sold, returned in connection.execute(
+                select(ProductSalesDaily.product_id, func.sum(ProductSalesDaily.units_sold), func.sum(ProductSalesDaily.units_returned))
+                .where(ProductSalesDaily.product_id.in_(product_ids))
+                .group_by(ProductSalesDaily.product_id)
+            )
+            if sold or returned
+        }
+
+
+def _delivered_order_with_return(client, customer, product_ids, quantities):
+    """Place, deliver and return the first item of an order; returns (order_id, return_id)."""
+    placed = client.post('/orders/', json={
+        "user_id": customer.id,
+        "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in zip(product_ids, quantities)]
+    }, headers=CSRF_HEADERS)
+    assert placed.status_code == 201, placed.get_json()
+    order = placed.get_json()
+    item_id = next(item["id"] for item in order["items"] if item["product_id"] == product_ids[0])
+    assert client.put(f'/orders/{order["id"]}/update_info', json={"status": 'Delivered'}, headers=CSRF_HEADERS).status_code == 200
+    filed = client.post(f'/orders/{order["id"]}/return_item', json={"order_item_id": item_id, "reason": 'damaged'}, headers=CSRF_HEADERS)
+    assert filed.status_code == 201, filed.get_json()
+    return order["id"], filed.get_json()["return"]["id"]
+
+
+@pytest.mark.parametrize('remove', ['cancel', 'delete'])
+def test_returned_items_are_not_restocked_twice(client, db, customer, remove):
+    from services.orders import sales_rollup
+
+    returned, kept = product_ids = _seed(db, f"returns-{remove}", 2)
+    order_id, return_id = _delivered_order_with_return(client, customer, product_ids, [2, 3])
+    assert client.put(f'/orders/returns/{return_id}', json={"status": 'Approved'}, headers=CSRF_HEADERS).status_code == 200
+    assert _stock(db, product_ids)[0] == {returned: STOCK, kept: STOCK - 3}
+
+    if remove == 'cancel':
+        response = client.put(f'/orders/{order_id}/update_info', json={"status": 'Canceled'}, headers=CSRF_HEADERS)
+    else:
+        response = client.delete(f'/orders/{order_id}', headers=CSRF_HEADERS)
+    assert response.status_code == 200
+
+    totals, levels = _stock(db, product_ids)
+    assert totals == levels == {returned: STOCK, kept: STOCK}
+    # The returned item's sale stays counted next to its return; the rest of the order is taken out
+    rollup = _rollup(db, product_ids)
+    assert rollup == {returned: (2, 2)}
+    if remove == 'cancel':
+        sales_rollup.rebuild()
+        assert _rollup(db, product_ids) == rollup
+
+
+def test_bulk_cancel_leaves_returned_items_out(client, db, customer):
+    returned, kept = product_ids = _seed(db, 'returns-bulk', 2)
+    order_id, return_id = _delivered_order_with_return(client, customer, product_ids, [2, 3])
+    assert client.put(f'/orders/returns/{return_id}', json={"status": 'Approved'}, headers=CSRF_HEADERS).status_code == 200
+    # Bulk cancellation only takes Pending or Processing orders
+    assert client.put(f'/orders/{order_id}/update_info', json={"status": 'Processing'}, headers=CSRF_HEADERS).status_code == 200
+
+    response = client.put('/orders/bulk_status', json={"order_ids": [order_id], "status": 'Canceled'}, headers=CSRF_HEADERS)
+    assert response.get_json()["updated"] == 1
+
+    totals, levels = _stock(db, product_ids)
+    assert totals == levels == {returned: STOCK, kept: STOCK}
+    assert _rollup(db, product_ids) == {returned: (2, 2)}
+
+
+def test_a_return_is_resolved_once(client, db, customer):
+    returned, kept = product_ids = _seed(db, 'returns-once', 2)
+    _, return_id = _delivered_order_with_return(client, customer, product_ids, [2, 3])
+
+    for status in ('Pending', 'Completed', None):
+        assert client.put(f'/orders/returns/{return_id}', json={"status": status}, headers=CSRF_HEADERS).status_code == 400
+    approved = client.put(f'/orders/returns/{return_id}', json={"status": 'Approved'}, headers=CSRF_HEADERS)
+    assert approved.status_code == 200 and approved.get_json()["status"] == 'Approved'
+
+    # Neither reopened nor resolved again, so the restock happens once
+    for status in ('Pending', 'Approved', 'Denied'):
+        assert client.put(f'/orders/returns/{return_id}', json={"status": status}, headers=CSRF_HEADERS).status_code == 400
+    assert _stock(db, product_ids)[0] == {returned: STOCK, kept: STOCK - 3}
+    assert _rollup(db, product_ids) == {returned: (2, 2), kept: (3, 0)}
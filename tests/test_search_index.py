@@ -0,0 +1,102 @@
+#authentic_lebanese_sentiment_shop/tests/test_search_index.py
+
+
+def _ids(result):
+    return [product_id for product_id, _ in result["results"]]
+
+
+def _catalog(db, name, subcategory=None):
+    from services.products.models import Category, Subcategory
+
+    category = Category(name=name)
+    db.session.add(category)
+    db.session.flush()
+    if subcategory is not None:
+        subcategory = Subcategory(name=subcategory, category_id=category.id)
+        db.session.add(subcategory)
+    db.session.commit()
+    return category, subcategory
+
+
+def _product(db, category, name, description='plain', subcategory=None):
+    from services.products.models import Product
+
+    product = Product(
+        name=name, description=description, price=10, stock=0, category_id=category.id,
+        subcategory_id=subcategory.id if subcategory is not None else None
+    )
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def test_prefix_matching_ranking_and_facets(db):
+    from services.products import search_index
+
+    lamps, _ = _catalog(db, 'lamps')
+    lanterns, _ = _catalog(db, 'lanterns')
+    in_name = _product(db, lamps, 'Quokkalamp brass')
+    in_description = _product(db, lamps, 'Reading light', 'a quokkalamp for reading')
+    other = _product(db, lanterns, 'Quokkalantern')
+
+    # The last token matches as a prefix, and a name match outranks a description match
+    assert _ids(search_index.search('quokkalamp')) == [in_name.id, in_description.id]
+    result = search_index.search('quokkala')
+    assert sorted(_ids(result)) == sorted([in_name.id, in_description.id, other.id])
+    assert result["facets"] == [
+        {"category_id": lamps.id, "category_name": 'lamps', "count": 2},
+        {"category_id": lanterns.id, "category_name": 'lanterns', "count": 1},
+    ]
+    # Earlier tokens must match whole terms
+    assert search_index.search('quokkala brass')["total"] == 0
+    assert _ids(search_index.search('quokkalamp brass')) == [in_name.id]
+
+    # Filtering by category keeps every facet
+    filtered = search_index.search('quokkala', category_id=lanterns.id)
+    assert (filtered["total"], _ids(filtered), filtered["facets"]) == (1, [other.id], result["facets"])
+    assert _ids(search_index.search('quokkala', limit=1, offset=2)) == _ids(result)[2:]
+
+
+def test_index_follows_commits_and_ignores_rollbacks(db):
+    from services.products import search_index
+    from services.products.models import Product
+
+    category, _ = _catalog(db, 'wombatcategory')
+    product = _product(db, category, 'Wombatseat')
+    assert _ids(search_index.search('wombatseat')) == [product.id]
+
+    discarded = Product(name='Wombatstool', description='d', price=10, stock=0, category_id=category.id)
+    db.session.add(discarded)
+    db.session.flush()
+    db.session.rollback()
+    assert search_index.search('wombatstool')["total"] == 0
+
+    index_before = search_index._get_index()
+    product.name = 'Wombatchair'
+    db.session.commit()
+    assert search_index.search('wombatseat')["total"] == 0
+    assert _ids(search_index.search('wombatchair')) == [product.id]
+    # A search already holding the previous index keeps a consistent view of it
+    assert _ids(index_before.search('wombatseat')) == [product.id]
+
+    category.name = 'numbatcategory'
+    db.session.commit()
+    assert search_index.search('wombatcategory')["total"] == 0
+    assert _ids(search_index.search('numbatcategory')) == [product.id]
+
+    db.session.delete(product)
+    db.session.commit()
+    assert search_index.search('wombatchair')["total"] == 0
+
+
+def test_deleted_subcategories_leave_the_index(db):
+    from services.products import search_index
+
+    category, subcategory = _catalog(db, 'bilbycategory', subcategory='bilbysubcategory')
+    product = _product(db, category, 'Bilbybowl', subcategory=subcategory)
+    assert _ids(search_index.search('bilbysubcategory')) == [product.id]
+
+    db.session.delete(subcategory)
+    db.session.commit()
+    assert search_index.search('bilbysubcategory')["total"] == 0
+    assert subcategory.id not in search_index._get_index().subcategory_names
@@ -0,0 +1,42 @@
+#authentic_lebanese_sentiment_shop/tests/test_stock_alerts.py
+from datetime import datetime, timedelta
+from sqlalchemy import insert, delete
+
+
+def _add_events(db, ids, created_at):
+    from services.inventory.models import StockAlertEvent
+    with db.engine.begin() as connection:
+        connection.execute(insert(StockAlertEvent.__table__), [
+            {"id": event_id, "kind": 'Raised', "product_id": 1, "location": 'Beirut', "stock_level": 0,
+             "stock_threshold": 5, "created_at": created_at}
+            for event_id in ids
+        ])
+
+
+def test_subscription_cursor_stops_below_an_open_gap(db):
+    from services.inventory import alerts
+    from services.inventory.models import StockAlertEvent
+
+    with db.engine.begin() as connection:
+        connection.execute(delete(StockAlertEvent.__table__))
+    old = datetime.utcnow() - alerts.GAP_GRACE - timedelta(seconds=5)
+    _add_events(db, [1, 2, 3], old)
+    # Event 4 is still being committed; 5 and 6 already are
+    _add_events(db, [5, 6], datetime.utcnow())
+    assert alerts.last_event() == 3
+    db.session.rollback()  # A new request, with a new snapshot
+
+    _add_events(db, [4], datetime.utcnow())
+    assert alerts.last_event() == 6
+
+
+def test_subscription_cursor_passes_gaps_older_than_the_grace(db):
+    from services.inventory import alerts
+    from services.inventory.models import StockAlertEvent
+
+    with db.engine.begin() as connection:
+        connection.execute(delete(StockAlertEvent.__table__))
+    old = datetime.utcnow() - alerts.GAP_GRACE - timedelta(seconds=5)
+    _add_events(db, [1, 3], old)  # 2 was rolled back long ago
+    _add_events(db, [4], datetime.utcnow())
+    assert alerts.last_event() == 4
@@ -0,0 +1,112 @@
+#authentic_lebanese_sentiment_shop/tests/test_stock_concurrency.py
+# Stress test for reserve_stock: many clients checking out the same few products at
+# once, through the real POST /orders/ route, against a file-backed database (or the
+# one in TEST_DATABASE_URL). Demand is several times the stock, so most late orders
+# must be refused; none may oversell or leave the per-location levels out of step.
+import random
+import threading
+import time
+from sqlalchemy import insert, select, func
+from conftest import CSRF_HEADERS
+
+CLIENTS = 60
+ORDERS_PER_CLIENT = 10
+PRODUCTS = 5
+LEVELS = {'Main Warehouse': 25, 'Beirut': 15}  # Per product; the primary location first
+
+
+def _seed(db):
+    from services.products.models import Category, Product
+    from services.inventory.models import Inventory
+
+    with db.engine.begin() as connection:
+        category_id = connection.execute(
+            insert(Category.__table__).values(name='stress-category')
+        ).inserted_primary_key[0]
+        product_ids = [
+            connection.execute(insert(Product.__table__).values(
+                name=f"stress-product-{i}", description='d', price=10, stock=sum(LEVELS.values()),
+                stock_threshold=5, category_id=category_id
+            )).inserted_primary_key[0]
+            for i in range(PRODUCTS)
+        ]
+        connection.execute(insert(Inventory.__table__), [
+            {"product_id": product_id, "location": location, "stock_level": level}
+            for product_id in product_ids for location, level in LEVELS.items()
+        ])
+    return product_ids
+
+
+def _stock(db, product_ids):
+    from services.products.models import Product
+    from services.inventory.models import Inventory
+
+    with db.engine.connect() as connection:
+        totals = dict(connection.execute(select(Product.id, Product.stock).where(Product.id.in_(product_ids))).all())
+        levels = dict(connection.execute(
+            select(Inventory.product_id, func.sum(Inventory.stock_level))
+            .where(Inventory.product_id.in_(product_ids))
+            .group_by(Inventory.product_id)
+        ).all())
+        lowest = connection.execute(
+            select(func.min(Inventory.stock_level)).where(Inventory.product_id.in_(product_ids))
+        ).scalar()
+    return totals, levels, lowest
+
+
+def test_concurrent_checkouts_never_oversell(db, make_client, customer, serialized_writes, capsys):
+    from services.inventory.models import StockMovement
+
+    product_ids = _seed(db)
+    before, _, _ = _stock(db, product_ids)
+    sold = {product_id: 0 for product_id in product_ids}
+    outcomes = []
+    lock = threading.Lock()
+    start = threading.Barrier(CLIENTS)
+
+    def checkout(seed):
+        rng = random.Random(seed)
+        client = make_client()
+        start.wait()
+        for _ in range(ORDERS_PER_CLIENT):
+            # One or two products per order, so all-or-nothing reservation is exercised too
+            quantities = {product_id: rng.randint(1, 3) for product_id in rng.sample(product_ids, rng.randint(1, 2))}
+            response = client.post('/orders/', json={
+                "user_id": customer.id,
+                "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()]
+            }, headers=CSRF_HEADERS)
+            with lock:
+                outcomes.append(response.status_code)
+                if response.status_code == 201:
+                    for product_id, quantity in quantities.items():
+                        sold[product_id] += quantity
+
+    threads = [threading.Thread(target=checkout, args=(seed,)) for seed in range(CLIENTS)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    after, levels, lowest = _stock(db, product_ids)
+    with db.engine.connect() as connection:
+        drawn = dict(connection.execute(
+            select(StockMovement.product_id, func.sum(-StockMovement.delta))
+            .where(StockMovement.product_id.in_(product_ids), StockMovement.reason == 'Order')
+            .group_by(StockMovement.product_id)
+        ).all())
+
+    placed = outcomes.count(201)
+    with capsys.disabled():
+        print(f"\n{len(outcomes)} checkouts from {CLIENTS} clients in {elapsed:.2f}s: {len(outcomes) / elapsed:.0f} orders/s, "
+              f"{placed} placed, {outcomes.count(400)} refused for stock")
+
+    assert set(outcomes) <= {201, 400}, f"unexpected statuses: {sorted(set(outcomes))}"
+    assert placed and outcomes.count(400), "the run should both place and refuse orders"
+    assert lowest >= 0
+    for product_id in product_ids:
+        assert after[product_id] >= 0
+        assert levels[product_id] == after[product_id]
+        assert before[product_id] - after[product_id] == sold[product_id]
+        assert drawn.get(product_id, 0) == sold[product_id]